@@ -1,6 +1,8 @@
 import streamlit as st
 
-from rentradar.db.duckdb import DuckDBManager
+from rentradar.db.catalog import get_schema_catalog
+
+DB_PATH = "rentradar/db/rentradar.db"
 
 
 def main():
@@ -36,8 +38,7 @@ def main():
 
     st.markdown("## Database Schema")
 
-    with DuckDBManager("rentradar/db/rentradar.db") as db_manager:
-        schema_df = db_manager.get_database_schema()
+    schema_df = get_schema_catalog(DB_PATH).to_frame()
 
     st.dataframe(schema_df, height=300, use_container_width=True)
 
@@ -1,38 +1,81 @@
-import pandas as pd
+from typing import List
+
 import streamlit as st
 from pygwalker.api.streamlit import StreamlitRenderer
+from pygwalker.data_parsers.database_parser import Connector
 
-from rentradar.db.duckdb import DuckDBManager
+from rentradar.db.cache import QueryCache, VersionedResource, database_version
+from rentradar.db.duckdb import DuckDBConnectionPool
 
 DB_PATH = "rentradar/db/rentradar.db"
+DB_URL = f"duckdb:///{DB_PATH}"
 DEFAULT_TABLE = "properties"
+# renderers kept across reruns and sessions, one per query
+MAX_RENDERERS = 16
 
 
 @st.cache_resource
-def get_pyg_renderer(df: pd.DataFrame) -> "StreamlitRenderer":
-    return StreamlitRenderer(df, spec_io_mode="rw")
+def get_pools() -> VersionedResource[DuckDBConnectionPool]:
+    # one pool at a time, shared by every session; the pool of an older database version is
+    # closed, which releases its file lock
+    return VersionedResource(
+        lambda: DuckDBConnectionPool(DB_PATH, read_only=True, cache=QueryCache()),
+        DuckDBConnectionPool.close,
+    )
+
+
+def get_pool(db_version: float) -> DuckDBConnectionPool:
+    # each session thread gets its own read-only cursor
+    return get_pools().get(db_version)
+
+
+@st.cache_data
+def list_tables(db_version: float) -> List[str]:
+    with get_pool(db_version).agent() as agent:
+        return agent.list_tables()["name"].tolist()
+
+
+@st.cache_data
+def count_rows(query: str, db_version: float) -> int:
+    with get_pool(db_version).agent() as agent:
+        columns = agent.fetch_columns(f"SELECT count(*) AS n FROM ({query})")
+    return columns["n"][0]
+
+
+@st.cache_resource(max_entries=MAX_RENDERERS)
+def get_pyg_renderer(query: str, db_version: float) -> "StreamlitRenderer":
+    """
+    A chart builder over the result of `query`. pygwalker runs the aggregations of each chart
+    as SQL over the query in DuckDB (kernel computation), so only the aggregated rows reach
+    the browser instead of the whole table. Keyed on the query text and the database version
+    rather than on a DataFrame, so reruns neither re-run the query nor hash its result.
+    """
+    connector = Connector(
+        DB_URL, query, engine_params={"connect_args": {"read_only": True}}
+    )
+    return StreamlitRenderer(connector, spec_io_mode="rw", kernel_computation=True)
+
+
+def render_explorer(query: str, db_version: float):
+    st.sidebar.caption(f"{count_rows(query, db_version):,} rows")
+    get_pyg_renderer(query, db_version).explorer()
 
 
-def render_table_explorer(db_manager: DuckDBManager, default_table: str):
-    tables = db_manager.list_tables()["name"].tolist()
+def render_table_explorer(default_table: str, db_version: float):
+    tables = list_tables(db_version)
     selected_table = st.sidebar.selectbox(
         "Select a table:", tables, index=tables.index(default_table)
     )
 
     if selected_table:
-        query = f"SELECT * FROM {selected_table}"
-        df = db_manager.execute_query(query)
-        renderer = get_pyg_renderer(df)
-        renderer.explorer()
+        render_explorer(f"SELECT * FROM {selected_table}", db_version)
 
 
-def render_sql_query_explorer(db_manager: DuckDBManager):
+def render_sql_query_explorer(db_version: float):
     query = st.sidebar.text_area("Enter your SQL query:")
 
     if query:
-        df = db_manager.execute_query(query)
-        renderer = get_pyg_renderer(df)
-        renderer.explorer()
+        render_explorer(query.strip().rstrip(";"), db_version)
 
 
 def main():
@@ -42,11 +85,12 @@ def main():
 
     input_option = st.sidebar.radio("Select an option:", ("Table", "SQL Query"))
 
-    with DuckDBManager(DB_PATH) as db_manager:
-        if input_option == "Table":
-            render_table_explorer(db_manager, DEFAULT_TABLE)
-        elif input_option == "SQL Query":
-            render_sql_query_explorer(db_manager)
+    # cached results are keyed on the database version, so a data reload refreshes them
+    db_version = database_version(DB_PATH)
+    if input_option == "Table":
+        render_table_explorer(DEFAULT_TABLE, db_version)
+    elif input_option == "SQL Query":
+        render_sql_query_explorer(db_version)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,50 @@
 import streamlit as st
+from langchain.sql_database import SQLDatabase
 
-from rentradar.llm.agent import RentRadarLLMAgent
+from rentradar.db.cache import VersionedResource, database_version
+from rentradar.llm.agent import RentRadarLLMAgent, sql_database
+from rentradar.llm.cache import AnswerCache
+
+DB_PATH = "rentradar/db/rentradar.db"
+DB_URI = f"duckdb:///{DB_PATH}"
+# agents kept across reruns and sessions, one per API key, rebuilt after an hour
+MAX_AGENTS = 16
+AGENT_TTL = 3600
+
+
+@st.cache_resource
+def get_sql_databases() -> VersionedResource[SQLDatabase]:
+    # one engine at a time; the engine of an older database version is disposed, which
+    # closes its pooled connections
+    return VersionedResource(
+        lambda: sql_database(DB_URI), lambda db: db._engine.dispose()
+    )
+
+
+def get_sql_database(db_version: float) -> SQLDatabase:
+    # one engine and one table reflection per database version, shared by every agent
+    return get_sql_databases().get(db_version)
+
+
+@st.cache_resource
+def get_answer_cache() -> AnswerCache:
+    # answers don't depend on the API key, so every agent and session shares them
+    return AnswerCache(DB_PATH)
+
+
+@st.cache_resource(max_entries=MAX_AGENTS, ttl=AGENT_TTL)
+def get_agent(openai_api_key: str, db_version: float) -> RentRadarLLMAgent:
+    """
+    The agent for an API key, built once and reused for every question and session, so a
+    chat turn only waits on the LLM. Keyed on the database version, so a data reload
+    rebuilds it over the new tables.
+    """
+    return RentRadarLLMAgent(
+        DB_URI,
+        openai_api_key=openai_api_key,
+        db=get_sql_database(db_version),
+        cache=get_answer_cache(),
+    )
 
 
 def initialize_sidebar():
@@ -33,7 +77,24 @@ def append_and_display_message(role, content):
         st.success(message)
 
 
-def handle_user_input(openai_api_key):
+def display_usage():
+    """Show the prompt size and token usage of the last answer in the sidebar."""
+    usage = st.session_state.get("usage")
+    if not usage:
+        return
+    if usage["cached"]:
+        st.sidebar.caption("Last answer: from cache, 0 tokens")
+    else:
+        st.sidebar.caption(
+            f"Last answer: {usage['llm_calls']} LLM calls, "
+            f"{usage['prompt_tokens']:,} prompt tokens, "
+            f"{usage['completion_tokens']:,} completion tokens. "
+            f"Schema: {usage['schema_tokens']:,} tokens "
+            f"({', '.join(usage['tables'])})"
+        )
+
+
+def handle_user_input(openai_api_key, db_version):
     """Process the user input using the chatbot agent."""
     user_input = st.text_input("Type your question here:")
     if st.button("Send") and user_input:
@@ -42,13 +103,12 @@ def handle_user_input(openai_api_key):
             st.stop()
 
         append_and_display_message("User", user_input)
-        agent = RentRadarLLMAgent(
-            db_uri="duckdb:///rentradar/db/rentradar.db", openai_api_key=openai_api_key
-        )
+        agent = get_agent(openai_api_key, db_version)
 
         try:
             response = agent.execute_query(user_input)
             response_message = response
+            st.session_state["usage"] = agent.last_usage
         except Exception as e:
             response_message = "Sorry, I encountered an error processing your query."
             st.exception(e)
@@ -69,8 +129,15 @@ def run_chatbot():
             "Assistant: Hello! How can I assist you with real estate data today?"
         ]
 
+    # warm the shared database and, once a key is entered, its agent before the first question
+    db_version = database_version(DB_PATH)
+    get_sql_database(db_version)
+    if openai_api_key:
+        get_agent(openai_api_key, db_version)
+
     display_messages()
-    handle_user_input(openai_api_key)
+    display_usage()
+    handle_user_input(openai_api_key, db_version)
 
 
 if __name__ == "__main__":
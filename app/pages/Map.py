@@ -1,4 +1,111 @@
+import math
+
+import pandas as pd
+import pydeck as pdk
 import streamlit as st
 
-st.markdown("# Map 🗺️")
-st.sidebar.markdown("# Map 🗺️")
+from rentradar.db.cache import QueryCache, VersionedResource, database_version
+from rentradar.db.duckdb import DuckDBConnectionPool
+from rentradar.db.spatial import tile_bbox, tile_size
+
+DB_PATH = "rentradar/db/rentradar.db"
+# tiles are 256px wide, so a ~1000px wide map shows about four of them across
+VIEWPORT_TILES = 4
+# viewports kept across reruns and sessions, and how long before they are recomputed
+MAX_VIEWPORTS = 256
+CACHE_TTL = 3600
+
+
+@st.cache_resource
+def get_pools() -> VersionedResource[DuckDBConnectionPool]:
+    # one pool at a time, shared by every session; the pool of an older database version is
+    # closed, which releases its file lock
+    return VersionedResource(
+        lambda: DuckDBConnectionPool(DB_PATH, read_only=True, cache=QueryCache()),
+        DuckDBConnectionPool.close,
+    )
+
+
+def get_pool(db_version: float) -> DuckDBConnectionPool:
+    # each session thread gets its own cursor, and map tiles are cached across sessions. A
+    # new database version gets a new pool, whose tile cache starts empty.
+    return get_pools().get(db_version)
+
+
+@st.cache_data(max_entries=1, ttl=CACHE_TTL)
+def get_counties(db_version: float) -> pd.DataFrame:
+    with get_pool(db_version).agent() as agent:
+        return agent.execute_query(
+            "SELECT county, avg(latitude) AS latitude, avg(longitude) AS longitude "
+            "FROM properties WHERE county IS NOT NULL GROUP BY county ORDER BY county"
+        )
+
+
+def center_tile(latitude: float, longitude: float, zoom: int):
+    """The (x, y) map tile containing a point, as in `rentradar.db.spatial.tile_bbox`."""
+    size = tile_size(zoom)
+    return math.floor((longitude + 180) / size), math.floor((latitude + 90) / size)
+
+
+@st.cache_data(max_entries=MAX_VIEWPORTS, ttl=CACHE_TTL)
+def get_clusters(x: int, y: int, zoom: int, db_version: float) -> pd.DataFrame:
+    """
+    The clusters of the viewport centered on tile (x, y). Keyed on the tile rather than the
+    exact center, so every center within a tile shares one entry, like the server's per-tile
+    cache.
+    """
+    min_lat, min_lon, max_lat, max_lon = tile_bbox(zoom, x, y)
+    latitude, longitude = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    half = VIEWPORT_TILES * tile_size(zoom) / 2
+    with get_pool(db_version).agent() as agent:
+        columns = agent.get_map_clusters(
+            latitude - half / 2,
+            longitude - half,
+            latitude + half / 2,
+            longitude + half,
+            zoom,
+        )
+    return pd.DataFrame(columns)
+
+
+def render_map(clusters: pd.DataFrame, latitude: float, longitude: float, zoom: int):
+    clusters["radius"] = clusters["count"] ** 0.5
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        clusters,
+        get_position=["longitude", "latitude"],
+        get_radius="radius",
+        radius_units="pixels",
+        radius_scale=3,
+        get_fill_color=[200, 30, 0, 160],
+        pickable=True,
+    )
+    view = pdk.ViewState(latitude=latitude, longitude=longitude, zoom=zoom)
+    tooltip = {
+        "text": "{count} properties\nMedian rent: {medianRent}\nMedian price: {medianPrice}"
+    }
+    st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=view, tooltip=tooltip))
+
+
+def main():
+    st.set_page_config(page_title="RentRadar - Map", layout="wide")
+    st.sidebar.markdown("# Map 🗺️")
+    st.markdown("# Map 🗺️")
+
+    # cached results are keyed on the database version, so a data reload refreshes them
+    db_version = database_version(DB_PATH)
+    counties = get_counties(db_version)
+    county = st.sidebar.selectbox("Center on:", counties["county"])
+    zoom = st.sidebar.slider("Zoom", min_value=6, max_value=16, value=11)
+
+    center = counties[counties["county"] == county].iloc[0]
+    x, y = center_tile(center["latitude"], center["longitude"], zoom)
+    clusters = get_clusters(x, y, zoom, db_version)
+    st.sidebar.caption(
+        f"{len(clusters)} clusters, {clusters['count'].sum()} properties"
+    )
+    render_map(clusters, center["latitude"], center["longitude"], zoom)
+
+
+if __name__ == "__main__":
+    main()
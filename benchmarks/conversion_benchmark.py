@@ -0,0 +1,69 @@
+"""
+Microbenchmark for turning DuckDB results into Strawberry `Property` objects.
+
+Compares the previous row-wise path (`fetchdf` + `iterrows` + `convert_nan_to_none`) with the
+columnar path (`fetch_columns` + `build_objects`) on a synthetic `properties` table.
+
+Usage:
+    python benchmarks/conversion_benchmark.py --rows 100000
+"""
+
+import argparse
+import time
+
+from rentradar.api.schema import Property
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.utils.utils import build_objects, convert_nan_to_none
+
+SYNTHETIC_PROPERTIES = """
+CREATE TABLE properties AS
+SELECT
+    uuid()::VARCHAR AS property_id,
+    i::VARCHAR AS id,
+    i || ' Main St, Charlottesville, VA 22903' AS formattedAddress,
+    22901 + i % 10 AS zipCode,
+    CASE WHEN i % 2 = 0 THEN 'Albemarle County' END AS county,
+    CASE WHEN i % 3 = 0 THEN 'Belmont' END AS subdivision,
+    38.0 + random() / 10 AS latitude,
+    -78.5 + random() / 10 AS longitude,
+    'Single Family' AS propertyType,
+    i % 2 = 0 AS ownerOccupied,
+    CASE WHEN i % 5 <> 0 THEN 1900.0 + i % 120 END AS yearBuilt,
+    CASE WHEN i % 4 = 0 THEN '2020-01-01T00:00:00.000Z' END AS lastSaleDate,
+    CASE WHEN i % 4 = 0 THEN 250000.0 + i END AS lastSalePrice,
+    'R1' AS zoning,
+    CASE WHEN i % 2 = 1 THEN 'A' || i END AS assessorID,
+    NULL::VARCHAR AS legalDescription
+FROM range(?) t(i)
+"""
+
+
+def rowwise(db: DuckDBManager) -> list:
+    df = db.execute_query("SELECT * FROM properties")
+    return [Property(**convert_nan_to_none(row.to_dict())) for _, row in df.iterrows()]
+
+
+def columnar(db: DuckDBManager) -> list:
+    return build_objects(Property, db.fetch_columns("SELECT * FROM properties"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with DuckDBManager(":memory:") as db:
+        db.conn.execute(SYNTHETIC_PROPERTIES, [args.rows])
+        for name, convert in (("rowwise", rowwise), ("columnar", columnar)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                objects = convert(db)
+                best = min(best, time.perf_counter() - start)
+            assert len(objects) == args.rows
+            print(f"{name:>9}: {args.rows / best:>12,.0f} rows/sec ({best:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
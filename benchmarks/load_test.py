@@ -0,0 +1,180 @@
+"""
+Load test for the GraphQL server.
+
+Starts `rentradar.api.deploy:app` under uvicorn on a local port and drives it with a synthetic
+client: `--concurrency` workers each send one request at a time, for `--duration` seconds, from
+a mix of point lookups, paginated lists and property pages whose relationship fields fan out
+into DataLoader batches. Property ids and zip codes are sampled from the database. Reports
+throughput and latency percentiles. The query cache is disabled by default
+(`--cache-mb 0`) so every request reaches DuckDB.
+
+Usage:
+    python benchmarks/load_test.py --db rentradar/db/rentradar.db --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+import duckdb
+import httpx
+import numpy as np
+
+PROPERTY = """
+query ($id: ID!) {
+  propertyById(id: $id) {
+    formattedAddress
+    features { bedrooms bathrooms squareFootage }
+    owners { owner }
+    taxes { year total }
+    longTermRentals { price status }
+  }
+}
+"""
+PROPERTIES_PAGE = """
+query ($zipCode: Int) {
+  properties(first: 20, filter: {zipCode: $zipCode}) {
+    edges { node { propertyId features { bedrooms } saleListings { price } } }
+  }
+}
+"""
+RENTALS_PAGE = """
+query ($zipCode: Int) {
+  longTermRentals(first: 50, filter: {zipCode: $zipCode}) {
+    edges { node { id price status } }
+  }
+}
+"""
+MARKET_STATS = """
+query ($zipCode: Int!) {
+  marketStatsByZip(zipcode: $zipCode) { bedrooms averageRent totalListings }
+}
+"""
+
+
+def sample_requests(db_path: str, count: int = 1000, seed: int = 0) -> list:
+    """A shuffled mix of request bodies over ids and zip codes sampled from the database."""
+    conn = duckdb.connect(db_path, read_only=True)
+    property_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT property_id FROM properties USING SAMPLE 500 ROWS"
+        ).fetchall()
+    ]
+    zip_codes = [
+        row[0]
+        for row in conn.execute("SELECT DISTINCT zipCode FROM properties").fetchall()
+    ]
+    conn.close()
+
+    rng = random.Random(seed)
+    requests = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            body = {"query": PROPERTY, "variables": {"id": rng.choice(property_ids)}}
+        else:
+            query = (PROPERTIES_PAGE, RENTALS_PAGE, MARKET_STATS)[kind - 1]
+            body = {"query": query, "variables": {"zipCode": rng.choice(zip_codes)}}
+        requests.append(body)
+    rng.shuffle(requests)
+    return requests
+
+
+async def worker(client, url, requests, deadline, latencies, errors):
+    i = random.randrange(len(requests))
+    while time.perf_counter() < deadline:
+        body = requests[i % len(requests)]
+        i += 1
+        start = time.perf_counter()
+        response = await client.post(url, json=body)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200 or response.json().get("errors"):
+            errors.append(response.text)
+
+
+async def run_load(url: str, requests: list, concurrency: int, duration: float):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        # warm up connections, the parser and validation caches and the prepared statements
+        await asyncio.gather(*(client.post(url, json=body) for body in requests[:50]))
+        latencies, errors = [], []
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *(
+                worker(client, url, requests, deadline, latencies, errors)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    return np.array(latencies), errors, elapsed
+
+
+def start_server(args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "RENTRADAR_DB_PATH": args.db,
+        "RENTRADAR_CACHE_MB": str(args.cache_mb),
+    }
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "rentradar.api.deploy:app",
+        "--port",
+        str(args.port),
+        "--log-level",
+        "warning",
+    ]
+    server = subprocess.Popen(command, env=env)
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{args.port}/cache")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("The server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="rentradar/db/rentradar.db")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--cache-mb", type=int, default=0)
+    args = parser.parse_args()
+
+    requests = sample_requests(args.db)
+    server = start_server(args)
+    try:
+        latencies, errors, elapsed = asyncio.run(
+            run_load(
+                f"http://127.0.0.1:{args.port}/",
+                requests,
+                args.concurrency,
+                args.duration,
+            )
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+    print(f"requests:    {len(latencies):>10,} ({len(errors)} errors)")
+    print(f"throughput:  {len(latencies) / elapsed:>10,.1f} req/s")
+    print(f"latency p50: {p50:>10.1f} ms")
+    print(f"latency p90: {p90:>10.1f} ms")
+    print(f"latency p99: {p99:>10.1f} ms")
+    if errors:
+        print(f"first error: {errors[0][:500]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark for building the RentRadar tables from raw RentCast properties.
+
+Times each table builder in `rentradar.process` on synthetic properties whose nested columns
+are JSON strings (as written by the ingest sinks) or Python reprs (as in the CSV exports), and
+compares the tax assessment step with the notebook's `iterrows`/`literal_eval` version on a
+sample.
+
+Usage:
+    python benchmarks/process_benchmark.py --rows 1000000
+"""
+
+import argparse
+import ast
+import json
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from rentradar.process import process_rentcast_data as process
+
+
+def synthetic_properties(
+    rows: int, nested: str = "json", seed: int = 0
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    encode = json.dumps if nested == "json" else repr
+    years = [str(year) for year in range(2019, 2024)]
+    counties = np.array(["Albemarle", "Albemarle County", "Charlottesville", None])
+    types = np.array(["Single Family", "Condo", "Townhouse", "Multi Family"])
+    values = rng.integers(100_000, 900_000, rows)
+
+    return pd.DataFrame(
+        {
+            "id": [f"{i} Main St, Charlottesville, VA 22903" for i in range(rows)],
+            "formattedAddress": [f"{i} Main St" for i in range(rows)],
+            "zipCode": 22901 + rng.integers(0, 10, rows),
+            "county": counties[rng.integers(0, len(counties), rows)],
+            "latitude": 38.0 + rng.random(rows) / 10,
+            "longitude": -78.5 + rng.random(rows) / 10,
+            "propertyType": types[rng.integers(0, len(types), rows)],
+            "bedrooms": rng.integers(1, 6, rows).astype(float),
+            "bathrooms": rng.integers(1, 4, rows).astype(float),
+            "squareFootage": rng.integers(600, 4000, rows).astype(float),
+            "lotSize": rng.integers(2000, 40000, rows).astype(float),
+            "features": [
+                encode({"floorCount": 2, "garage": bool(i % 2), "cooling": True})
+                for i in range(rows)
+            ],
+            "owner": [
+                encode(
+                    {"names": [f"Owner {i % 50_000}"], "mailingAddress": {"id": str(i)}}
+                )
+                for i in range(rows)
+            ],
+            "taxAssessments": [
+                encode(
+                    {
+                        year: {"year": int(year), "value": int(v), "land": int(v) // 4}
+                        for year in years
+                    }
+                )
+                for v in values
+            ],
+            "propertyTaxes": [
+                encode(
+                    {
+                        year: {"year": int(year), "total": int(v) // 100}
+                        for year in years
+                    }
+                )
+                for v in values
+            ],
+        }
+    )
+
+
+def legacy_tax_assessments(properties: pd.DataFrame) -> pd.DataFrame:
+    """The notebook's implementation, kept for comparison."""
+    tax_assessments = properties[["property_id", "taxAssessments"]].copy()
+    tax_assessments["taxAssessments"] = tax_assessments["taxAssessments"].apply(
+        ast.literal_eval
+    )
+    rows = []
+    for _, row in tax_assessments.iterrows():
+        for year, assessment in row["taxAssessments"].items():
+            rows.append(
+                {
+                    "property_id": row["property_id"],
+                    "year": year,
+                    "total_value": assessment.get("value", None),
+                    "land_value": assessment.get("land", None),
+                    "improvements_value": assessment.get("improvements", None),
+                }
+            )
+    tax_assessments = pd.DataFrame(rows)
+    tax_assessments["assessment_id"] = tax_assessments.apply(
+        lambda row: uuid.uuid5(
+            uuid.NAMESPACE_DNS, str(row["property_id"]) + str(row["year"])
+        ),
+        axis=1,
+    )
+    return tax_assessments
+
+
+def timed(label: str, rows: int, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:32} {elapsed:8.2f}s  {rows / elapsed:>12,.0f} properties/sec")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--nested", choices=["json", "repr"], default="json")
+    parser.add_argument("--legacy-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    raw = synthetic_properties(args.rows, args.nested)
+    properties = timed(
+        "normalize_properties", args.rows, process.normalize_properties, raw
+    )
+    for name in (
+        "build_counties",
+        "build_property_types",
+        "build_tax_assessments",
+        "build_property_taxes",
+        "build_property_features",
+        "build_property_owners",
+        "build_properties",
+    ):
+        timed(name, args.rows, getattr(process, name), properties)
+
+    if args.legacy_rows:
+        sample = process.normalize_properties(
+            synthetic_properties(args.legacy_rows, "repr")
+        )
+        print(f"\ntax assessments on {args.legacy_rows:,} properties (repr input):")
+        timed("legacy (notebook)", args.legacy_rows, legacy_tax_assessments, sample)
+        timed(
+            "build_tax_assessments",
+            args.legacy_rows,
+            process.build_tax_assessments,
+            sample,
+        )
+
+
+if __name__ == "__main__":
+    main()
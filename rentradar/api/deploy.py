@@ -1,11 +1,184 @@
+import os
+from contextlib import ExitStack, asynccontextmanager
+
 import strawberry
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
 from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
 from strawberry.asgi import GraphQL
+from strawberry.extensions import ParserCache, QueryDepthLimiter, ValidationCache
+from strawberry.http import GraphQLRequestData
+from strawberry.unset import UNSET
+
+from rentradar.db.cache import QueryCache
+from rentradar.db.duckdb import DuckDBConnectionPool
+from rentradar.model.comps import comps_index_path, get_comps_index
 
+from .export import COMPRESSIONS, EXPORT_FORMATS, parse_filters
 from .graphql import RentRadarGraphQLAPI
+from .limits import QueryCostLimiter, QueryTimeBudget
+from .loaders import RentRadarLoaders
+from .persisted import PersistedQueryNotFound, PersistedQueryStore
+
+DB_PATH = os.environ.get("RENTRADAR_DB_PATH", "rentradar/db/rentradar.db")
+
+CACHE_MAX_BYTES = int(os.environ.get("RENTRADAR_CACHE_MB", "256")) * 1024 * 1024
+CACHE_TTL = float(os.environ.get("RENTRADAR_CACHE_TTL", "300"))
+# threads resolvers run DuckDB queries on, each with its own cursor
+QUERY_THREADS = int(os.environ.get("RENTRADAR_QUERY_THREADS", "4"))
+# parsed and validated documents kept, so repeated (e.g. persisted) queries skip both steps
+DOCUMENT_CACHE_SIZE = 1024
+# per-operation limits, see `limits.py`
+MAX_QUERY_DEPTH = int(os.environ.get("RENTRADAR_MAX_QUERY_DEPTH", "10"))
+MAX_QUERY_COST = int(os.environ.get("RENTRADAR_MAX_QUERY_COST", "100000"))
+QUERY_TIMEOUT = float(os.environ.get("RENTRADAR_QUERY_TIMEOUT", "10"))
+
+pool = DuckDBConnectionPool(
+    DB_PATH,
+    read_only=True,
+    cache=QueryCache(max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL),
+    max_workers=QUERY_THREADS,
+)
+persisted_queries = PersistedQueryStore(os.environ.get("RENTRADAR_PERSISTED_QUERIES"))
+
+
+class RentRadarGraphQL(GraphQL):
+    """
+    GraphQL ASGI app that hands resolvers the shared connection pool and a fresh set of
+    DataLoaders through the request context, and resolves persisted queries (see
+    `PersistedQueryStore`) in JSON POST and GET requests.
+    """
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        content_type = request.content_type or ""
+        if "application/json" in content_type:
+            data = self.parse_json(await request.get_body())
+        elif request.method == "GET":
+            data = self.parse_query_params(request.query_params)
+            if isinstance(data.get("extensions"), str):
+                data["extensions"] = self.parse_json(data["extensions"])
+        else:
+            return await super().parse_http_body(request)
+        return GraphQLRequestData(
+            query=persisted_queries.resolve(data.get("query"), data.get("extensions")),
+            variables=data.get("variables"),
+            operation_name=data.get("operationName"),
+        )
+
+    def should_render_graphql_ide(self, request) -> bool:
+        # a GET with a persisted query hash and no document is an operation, not the IDE
+        return (
+            "extensions" not in request.query_params
+            and super().should_render_graphql_ide(request)
+        )
+
+    async def run(self, request, context=UNSET, root_value=UNSET):
+        try:
+            return await super().run(request, context, root_value)
+        except PersistedQueryNotFound as e:
+            # a GraphQL error rather than an HTTP one, so clients retry with the document
+            return JSONResponse(e.to_response())
+
+    async def get_context(self, request, response) -> dict:
+        return {
+            "request": request,
+            "response": response,
+            "pool": pool,
+            "loaders": RentRadarLoaders(pool),
+        }
+
 
-schema = strawberry.Schema(query=RentRadarGraphQLAPI)
-app = GraphQL(schema)
+async def cache_stats(request: Request) -> JSONResponse:
+    return JSONResponse(pool.cache.stats())
+
+
+def map_tile(request: Request) -> JSONResponse:
+    """Clusters for one map tile as JSON columns, e.g. `/tiles/8/72/51`."""
+    zoom, x, y = (request.path_params[name] for name in ("zoom", "x", "y"))
+    try:
+        with pool.agent() as agent:
+            columns = agent.get_map_tile(zoom, x, y)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse(
+        columns, headers={"Cache-Control": f"public, max-age={int(CACHE_TTL)}"}
+    )
+
+
+def export(request: Request):
+    """
+    Streams a table as Arrow IPC (default) or Parquet, filtered like its GraphQL field, e.g.
+    `/export/long_term_rentals?format=parquet&zipCode=22903&status=Active`.
+    """
+    params = dict(request.query_params)
+    export_format = params.pop("format", "arrow")
+    if export_format not in EXPORT_FORMATS:
+        return JSONResponse(
+            {"error": f"format must be one of {sorted(EXPORT_FORMATS)}"},
+            status_code=400,
+        )
+    encode, media_type, extension, compression = EXPORT_FORMATS[export_format]
+    compression = params.pop("compression", compression)
+    if compression not in COMPRESSIONS:
+        return JSONResponse(
+            {"error": f"compression must be one of {list(COMPRESSIONS)}"},
+            status_code=400,
+        )
+
+    table = request.path_params["table"]
+    # the batches are pulled from the thread pool, so the export gets a cursor of its own
+    # that lives as long as the response; it is closed once the response ends, including
+    # when the client disconnects before the body starts
+    stack = ExitStack()
+    agent = stack.enter_context(pool.agent(own_cursor=True))
+    try:
+        reader = agent.export_batches(table, **parse_filters(params))
+    except ValueError as e:
+        stack.close()
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    return StreamingResponse(
+        encode(reader, compression),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'},
+        background=BackgroundTask(stack.close),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    pool.open()
+    # load the comps index up front rather than on the first comps query
+    if os.path.exists(comps_index_path(DB_PATH)):
+        get_comps_index(comps_index_path(DB_PATH))
+    yield
+    pool.close()
+
+
+schema = strawberry.Schema(
+    query=RentRadarGraphQLAPI,
+    extensions=[
+        ParserCache(maxsize=DOCUMENT_CACHE_SIZE),
+        QueryDepthLimiter(max_depth=MAX_QUERY_DEPTH),
+        ValidationCache(maxsize=DOCUMENT_CACHE_SIZE),
+        QueryCostLimiter(max_cost=MAX_QUERY_COST),
+        QueryTimeBudget(seconds=QUERY_TIMEOUT),
+    ],
+)
+graphql_app = RentRadarGraphQL(schema)
+
+app = Starlette(
+    routes=[
+        Route("/cache", cache_stats),
+        Route("/tiles/{zoom:int}/{x:int}/{y:int}", map_tile),
+        Route("/export/{table}", export),
+        Mount("/", app=graphql_app),
+    ],
+    lifespan=lifespan,
+)
 
 app = CORSMiddleware(
     app,
@@ -1,17 +1,32 @@
 from typing import List, Optional
 
 import strawberry
+from strawberry.types import Info
 
 from rentradar.db.duckdb import RentRadarQueryAgent
-from rentradar.utils.utils import convert_nan_to_none
+from rentradar.utils.utils import build_objects
 
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    build_connection,
+    check_page_size,
+    decode_cursor,
+)
 from .schema import (
+    Comp,
+    CompKind,
+    Connection,
     County,
+    GeographyType,
     HistoricMarketStat,
+    ListingFilter,
     LongTermRental,
+    MapCluster,
     MarketStat,
+    MarketTrend,
     Property,
     PropertyFeature,
+    PropertyFilter,
     PropertyOwner,
     PropertyTax,
     PropertyType,
@@ -19,240 +34,419 @@ from .schema import (
     TaxAssessment,
 )
 
-DB_PATH = "rentradar/db/rentradar.db"
-
 
 @strawberry.type
 class RentRadarGraphQLAPI:
 
     @strawberry.field
-    def all_properties(self) -> Optional[List[Property]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_all_properties()
-            if not df.empty:
-                properties = [
-                    Property(**convert_nan_to_none(row.to_dict()))
-                    for index, row in df.iterrows()
-                ]
-                return properties
-        return None
+    async def all_properties(self, info: Info) -> Optional[List[Property]]:
+        columns = await info.context["pool"].run(RentRadarQueryAgent.get_all_properties)
+        objects = build_objects(Property, columns)
+        return objects or None
+
+    @strawberry.field
+    async def properties(
+        self,
+        info: Info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+        filter: Optional[PropertyFilter] = None,
+    ) -> Connection[Property]:
+        filter = filter or PropertyFilter()
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_properties_page,
+            check_page_size(first),
+            after=decode_cursor(after),
+            zip_code=filter.zipCode,
+            county=filter.county,
+            property_type=filter.propertyType,
+            min_price=filter.minPrice,
+            max_price=filter.maxPrice,
+        )
+        return build_connection(Property, columns, "property_id", first)
+
+    @strawberry.field
+    async def properties_within(
+        self,
+        info: Info,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        first: int = DEFAULT_PAGE_SIZE,
+    ) -> List[Property]:
+        check_page_size(first)
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.properties_within, latitude, longitude, radius_km, first
+        )
+        return build_objects(Property, columns)
+
+    @strawberry.field
+    async def properties_in_bbox(
+        self,
+        info: Info,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        first: int = DEFAULT_PAGE_SIZE,
+    ) -> List[Property]:
+        check_page_size(first)
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.properties_in_bbox,
+            min_latitude,
+            min_longitude,
+            max_latitude,
+            max_longitude,
+            first,
+        )
+        return build_objects(Property, columns)
+
+    @strawberry.field
+    async def nearest_properties(
+        self, info: Info, latitude: float, longitude: float, k: int = 10
+    ) -> List[Property]:
+        check_page_size(k)
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.nearest_properties, latitude, longitude, k
+        )
+        return build_objects(Property, columns)
+
+    @strawberry.field(
+        description="Property clusters for a map viewport, binned per tile at the zoom level"
+    )
+    async def map_clusters(
+        self,
+        info: Info,
+        min_latitude: float,
+        min_longitude: float,
+        max_latitude: float,
+        max_longitude: float,
+        zoom: int,
+    ) -> List[MapCluster]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_map_clusters,
+            min_latitude,
+            min_longitude,
+            max_latitude,
+            max_longitude,
+            zoom,
+        )
+        return build_objects(MapCluster, columns)
+
+    @strawberry.field(
+        description="The listed properties most comparable to a property, most similar first"
+    )
+    async def comps(
+        self,
+        info: Info,
+        property_id: strawberry.ID,
+        k: int = 10,
+        kind: CompKind = CompKind.RENT,
+    ) -> List[Comp]:
+        check_page_size(k)
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.comps, property_id, k, kind.value
+        )
+        return build_objects(Comp, columns)
 
     @strawberry.field
-    def property_by_id(self, id: strawberry.ID) -> Property:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_property_by_id(id)
-            if not df.empty:
-                cleaned_data = convert_nan_to_none(df.iloc[0].to_dict())
-                return Property(**cleaned_data)
-        return None
+    async def property_by_id(self, info: Info, id: strawberry.ID) -> Property:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_property_by_id, id
+        )
+        objects = build_objects(Property, columns)
+        return objects[0] if objects else None
 
     @strawberry.field
-    def property_features_by_property_id(
-        self, property_id: strawberry.ID
+    async def property_features_by_property_id(
+        self, info: Info, property_id: strawberry.ID
     ) -> Optional[PropertyFeature]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_property_features_by_property_id(property_id)
-            if not df.empty:
-                cleaned_data = convert_nan_to_none(df.iloc[0].to_dict())
-                return PropertyFeature(**cleaned_data)
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_property_features_by_property_id, property_id
+        )
+        objects = build_objects(PropertyFeature, columns)
+        return objects[0] if objects else None
 
     @strawberry.field
-    def owners_by_property_id(
-        self, property_id: strawberry.ID
+    async def owners_by_property_id(
+        self, info: Info, property_id: strawberry.ID
     ) -> Optional[List[PropertyOwner]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_owners_by_property_id(property_id)
-            if not df.empty:
-                return [PropertyOwner(**row) for row in df.to_dict("records")]
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_owners_by_property_id, property_id
+        )
+        objects = build_objects(PropertyOwner, columns)
+        return objects or None
 
     @strawberry.field
-    def properties_by_owner_id(
-        self, owner_id: strawberry.ID
+    async def properties_by_owner_id(
+        self, info: Info, owner_id: strawberry.ID
     ) -> Optional[List[PropertyOwner]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_properties_by_owner_id(owner_id)
-            if not df.empty:
-                return [PropertyOwner(**row) for row in df.to_dict("records")]
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_properties_by_owner_id, owner_id
+        )
+        objects = build_objects(PropertyOwner, columns)
+        return objects or None
 
     @strawberry.field
-    def county_by_id(self, id: strawberry.ID) -> Optional[County]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_county_by_id(id)
-            if not df.empty:
-                return County(**df.iloc[0].to_dict())
-        return None
+    async def county_by_id(self, info: Info, id: strawberry.ID) -> Optional[County]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_county_by_id, id
+        )
+        objects = build_objects(County, columns)
+        return objects[0] if objects else None
 
     @strawberry.field
-    def all_counties(self) -> List[County]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_all_counties()
-            return [County(**row) for row in df.to_dict("records")]
+    async def all_counties(self, info: Info) -> List[County]:
+        columns = await info.context["pool"].run(RentRadarQueryAgent.get_all_counties)
+        objects = build_objects(County, columns)
+        return objects
 
     @strawberry.field
-    def market_stats_by_zip(self, zipcode: int) -> Optional[List[MarketStat]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_market_stats_by_zip(zipcode)
-            if not df.empty:
-                return [MarketStat(**row) for row in df.to_dict("records")]
-        return None
+    async def market_stats_by_zip(
+        self, info: Info, zipcode: int
+    ) -> Optional[List[MarketStat]]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_market_stats_by_zip, zipcode
+        )
+        objects = build_objects(MarketStat, columns)
+        return objects or None
+
+    @strawberry.field
+    async def market_stats_by_bedrooms(
+        self, info: Info, bedrooms: int
+    ) -> Optional[List[MarketStat]]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_market_stats_by_bedrooms, bedrooms
+        )
+        objects = build_objects(MarketStat, columns)
+        return objects or None
+
+    @strawberry.field(
+        description="A month of market rollups; the latest month unless one is given"
+    )
+    async def market_trend(
+        self,
+        info: Info,
+        geography_type: GeographyType,
+        geography: str = "all",
+        bedrooms: Optional[int] = None,
+        month: Optional[str] = None,
+    ) -> Optional[MarketTrend]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_market_trend,
+            geography_type.value,
+            geography,
+            bedrooms,
+            month,
+        )
+        objects = build_objects(MarketTrend, columns)
+        return objects[0] if objects else None
 
     @strawberry.field
-    def market_stats_by_bedrooms(self, bedrooms: int) -> Optional[List[MarketStat]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_market_stats_by_bedrooms(bedrooms)
-            if not df.empty:
-                return [MarketStat(**row) for row in df.to_dict("records")]
-        return None
+    async def market_trends(
+        self,
+        info: Info,
+        geography_type: GeographyType,
+        geography: str = "all",
+        bedrooms: Optional[int] = None,
+        since: Optional[str] = None,
+    ) -> List[MarketTrend]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_market_trends,
+            geography_type.value,
+            geography,
+            bedrooms,
+            since,
+        )
+        return build_objects(MarketTrend, columns)
 
     @strawberry.field
-    def historic_market_stats_by_zip(
-        self, zipCode: int
+    async def historic_market_stats_by_zip(
+        self, info: Info, zipCode: int
     ) -> Optional[List[HistoricMarketStat]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_historic_market_stats_by_zip(zipCode)
-            if not df.empty:
-                return [
-                    HistoricMarketStat(**convert_nan_to_none(row))
-                    for row in df.to_dict("records")
-                ]
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_historic_market_stats_by_zip, zipCode
+        )
+        objects = build_objects(HistoricMarketStat, columns)
+        return objects or None
 
     @strawberry.field
-    def historic_market_stats_by_bedrooms(
-        self, bedrooms: int, zipCode: int
+    async def historic_market_stats_by_bedrooms(
+        self, info: Info, bedrooms: int, zipCode: int
     ) -> Optional[List[HistoricMarketStat]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_historic_market_stats_by_bedrooms(bedrooms, zipCode)
-            if not df.empty:
-                return [
-                    HistoricMarketStat(**convert_nan_to_none(row))
-                    for row in df.to_dict("records")
-                ]
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_historic_market_stats_by_bedrooms, bedrooms, zipCode
+        )
+        objects = build_objects(HistoricMarketStat, columns)
+        return objects or None
 
     @strawberry.field
-    def long_term_rentals_by_property_id(
-        self, property_id: strawberry.ID
+    async def long_term_rentals_by_property_id(
+        self, info: Info, property_id: strawberry.ID
     ) -> Optional[List[LongTermRental]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_long_term_rentals_by_property_id(property_id)
-            if not df.empty:
-                return [
-                    LongTermRental(**convert_nan_to_none(row))
-                    for row in df.to_dict("records")
-                ]
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_long_term_rentals_by_property_id, property_id
+        )
+        objects = build_objects(LongTermRental, columns)
+        return objects or None
 
     @strawberry.field
-    def all_long_term_rentals(self) -> Optional[List[LongTermRental]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_all_long_term_rentals()
-            if not df.empty:
-                return [
-                    LongTermRental(**convert_nan_to_none(row))
-                    for row in df.to_dict("records")
-                ]
-        return None
+    async def all_long_term_rentals(self, info: Info) -> Optional[List[LongTermRental]]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_all_long_term_rentals
+        )
+        objects = build_objects(LongTermRental, columns)
+        return objects or None
 
     @strawberry.field
-    def property_taxes_by_property_id(
-        self, property_id: strawberry.ID
+    async def long_term_rentals(
+        self,
+        info: Info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+        filter: Optional[ListingFilter] = None,
+    ) -> Connection[LongTermRental]:
+        filter = filter or ListingFilter()
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_long_term_rentals_page,
+            check_page_size(first),
+            after=decode_cursor(after),
+            zip_code=filter.zipCode,
+            county=filter.county,
+            property_type=filter.propertyType,
+            status=filter.status,
+            min_price=filter.minPrice,
+            max_price=filter.maxPrice,
+        )
+        return build_connection(LongTermRental, columns, "id", first)
+
+    @strawberry.field
+    async def property_taxes_by_property_id(
+        self, info: Info, property_id: strawberry.ID
     ) -> Optional[List[PropertyTax]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_property_taxes_by_property_id(property_id)
-            if not df.empty:
-                return [PropertyTax(**row) for row in df.to_dict("records")]
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_property_taxes_by_property_id, property_id
+        )
+        objects = build_objects(PropertyTax, columns)
+        return objects or None
 
     @strawberry.field
-    def property_taxes_by_year(self, year: str) -> Optional[List[PropertyTax]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_property_taxes_by_year(year)
-            if not df.empty:
-                return [PropertyTax(**row) for row in df.to_dict("records")]
-        return None
+    async def property_taxes_by_year(
+        self, info: Info, year: str
+    ) -> Optional[List[PropertyTax]]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_property_taxes_by_year, year
+        )
+        objects = build_objects(PropertyTax, columns)
+        return objects or None
 
     @strawberry.field
-    def property_taxes_by_property_id_and_year(
-        self, property_id: strawberry.ID, year: str
+    async def property_taxes_by_property_id_and_year(
+        self, info: Info, property_id: strawberry.ID, year: str
     ) -> Optional[PropertyTax]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_property_taxes_by_property_id_and_year(property_id, year)
-            if not df.empty:
-                return PropertyTax(**df.iloc[0].to_dict())
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_property_taxes_by_property_id_and_year,
+            property_id,
+            year,
+        )
+        objects = build_objects(PropertyTax, columns)
+        return objects[0] if objects else None
 
     @strawberry.field
-    def property_type_by_id(self, id: strawberry.ID) -> Optional[PropertyType]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_property_type_by_id(id)
-            if not df.empty:
-                return PropertyType(**df.iloc[0].to_dict())
-        return None
+    async def property_type_by_id(
+        self, info: Info, id: strawberry.ID
+    ) -> Optional[PropertyType]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_property_type_by_id, id
+        )
+        objects = build_objects(PropertyType, columns)
+        return objects[0] if objects else None
 
     @strawberry.field
-    def all_property_types(self) -> Optional[List[PropertyType]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_all_property_types()
-            if not df.empty:
-                return [PropertyType(**row) for row in df.to_dict("records")]
-        return None
+    async def all_property_types(self, info: Info) -> Optional[List[PropertyType]]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_all_property_types
+        )
+        objects = build_objects(PropertyType, columns)
+        return objects or None
 
     @strawberry.field
-    def description_by_property_type(self, propertyType: str) -> Optional[str]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_description_by_property_type(propertyType)
-            if not df.empty:
-                return df.iloc[0]["description"]
-        return None
+    async def description_by_property_type(
+        self, info: Info, propertyType: str
+    ) -> Optional[str]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_description_by_property_type, propertyType
+        )
+        return columns["description"][0] if columns["description"] else None
 
     @strawberry.field
-    def sale_listings_by_property_id(
-        self, property_id: strawberry.ID
+    async def sale_listings_by_property_id(
+        self, info: Info, property_id: strawberry.ID
     ) -> Optional[List[SaleListing]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_sale_listings_by_property_id(property_id)
-            if not df.empty:
-                return [SaleListing(**row) for row in df.to_dict("records")]
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_sale_listings_by_property_id, property_id
+        )
+        objects = build_objects(SaleListing, columns)
+        return objects or None
+
+    @strawberry.field
+    async def all_sale_listings(self, info: Info) -> Optional[List[SaleListing]]:
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_all_sale_listings
+        )
+        objects = build_objects(SaleListing, columns)
+        return objects or None
 
     @strawberry.field
-    def all_sale_listings(self) -> Optional[List[SaleListing]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_all_sale_listings()
-            if not df.empty:
-                return [SaleListing(**row) for row in df.to_dict("records")]
-        return None
+    async def sale_listings(
+        self,
+        info: Info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+        filter: Optional[ListingFilter] = None,
+    ) -> Connection[SaleListing]:
+        filter = filter or ListingFilter()
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_sale_listings_page,
+            check_page_size(first),
+            after=decode_cursor(after),
+            zip_code=filter.zipCode,
+            county=filter.county,
+            property_type=filter.propertyType,
+            status=filter.status,
+            min_price=filter.minPrice,
+            max_price=filter.maxPrice,
+        )
+        return build_connection(SaleListing, columns, "id", first)
 
     @strawberry.field
-    def tax_assessments_by_property_id(
-        self, property_id: strawberry.ID
+    async def tax_assessments_by_property_id(
+        self, info: Info, property_id: strawberry.ID
     ) -> Optional[List[TaxAssessment]]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_tax_assessments_by_property_id(property_id)
-            if not df.empty:
-                return [TaxAssessment(**row) for row in df.to_dict("records")]
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_tax_assessments_by_property_id, property_id
+        )
+        objects = build_objects(TaxAssessment, columns)
+        return objects or None
 
     @strawberry.field
-    def tax_assessment_by_id(
-        self, assessment_id: strawberry.ID
+    async def tax_assessment_by_id(
+        self, info: Info, assessment_id: strawberry.ID
     ) -> Optional[TaxAssessment]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_tax_assessment_by_id(assessment_id)
-            if not df.empty:
-                return TaxAssessment(**df.iloc[0].to_dict())
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_tax_assessment_by_id, assessment_id
+        )
+        objects = build_objects(TaxAssessment, columns)
+        return objects[0] if objects else None
 
     @strawberry.field
-    def tax_assessment_by_property_id_and_year(
-        self, property_id: strawberry.ID, year: str
+    async def tax_assessment_by_property_id_and_year(
+        self, info: Info, property_id: strawberry.ID, year: str
     ) -> Optional[TaxAssessment]:
-        with RentRadarQueryAgent(DB_PATH) as agent:
-            df = agent.get_tax_assessment_by_property_id_and_year(property_id, year)
-            if not df.empty:
-                return TaxAssessment(**df.iloc[0].to_dict())
-        return None
+        columns = await info.context["pool"].run(
+            RentRadarQueryAgent.get_tax_assessment_by_property_id_and_year,
+            property_id,
+            year,
+        )
+        objects = build_objects(TaxAssessment, columns)
+        return objects[0] if objects else None
@@ -0,0 +1,241 @@
+"""
+Limits on what a single GraphQL request can cost the server.
+
+`QueryCostLimiter` rejects operations whose estimated cost is above a budget before they run.
+An object field costs one unit per object it returns, plus the cost of its selections for
+each of them; scalar fields are free. How many objects a list field returns is estimated as
+follows:
+- the `all*` fields return every row of their table (`FIELD_TABLES`), counted from DuckDB's
+  catalog;
+- fields with a page size argument (`first`, `k`) return that many;
+- connection `edges` are already counted by the connection's page size;
+- other lists are assumed to return `DEFAULT_LIST_SIZE` objects.
+
+`QueryTimeBudget` gives the DuckDB queries of a request a shared time budget; queries still
+running when it runs out are interrupted (see `rentradar.db.timeout`).
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Mapping, Optional
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLList,
+    GraphQLNamedType,
+    GraphQLObjectType,
+    GraphQLSchema,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    Undefined,
+    get_named_type,
+    get_nullable_type,
+    value_from_ast,
+)
+from graphql.execution import ExecutionResult as GraphQLExecutionResult
+from strawberry.extensions import SchemaExtension
+
+from rentradar.db.timeout import time_budget
+
+if TYPE_CHECKING:
+    from rentradar.db.duckdb import DuckDBConnectionPool
+
+FIELD_TABLES = {
+    "allProperties": "properties",
+    "allLongTermRentals": "long_term_rentals",
+    "allSaleListings": "sale_listings",
+    "allCounties": "counties",
+    "allPropertyTypes": "property_types",
+}
+SIZE_ARGUMENTS = ("first", "k")
+PAGE_LISTS = ("edges",)
+DEFAULT_LIST_SIZE = 10
+
+
+def query_cost(
+    schema: GraphQLSchema,
+    document: DocumentNode,
+    operation_name: Optional[str] = None,
+    variables: Optional[Dict[str, Any]] = None,
+    row_counts: Optional[Mapping[str, int]] = None,
+) -> int:
+    """
+    The estimated cost of an operation of `document`, given the row counts of the tables behind
+    the `FIELD_TABLES` fields (which count as `DEFAULT_LIST_SIZE` rows when not given).
+    """
+    operations = [
+        definition
+        for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+        and (operation_name is None or definition.name.value == operation_name)
+    ]
+    if not operations:
+        return 0
+    operation = operations[0]
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    root = schema.get_root_type(operation.operation)
+    return _selection_cost(
+        schema,
+        root,
+        operation.selection_set,
+        fragments,
+        variables or {},
+        {} if row_counts is None else row_counts,
+    )
+
+
+def _selection_cost(
+    schema: GraphQLSchema,
+    parent: GraphQLNamedType,
+    selection_set: SelectionSetNode,
+    fragments: Dict[str, FragmentDefinitionNode],
+    variables: Dict[str, Any],
+    row_counts: Mapping[str, int],
+) -> int:
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FragmentSpreadNode):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                condition = schema.get_type(fragment.type_condition.name.value)
+                cost += _selection_cost(
+                    schema,
+                    condition,
+                    fragment.selection_set,
+                    fragments,
+                    variables,
+                    row_counts,
+                )
+        elif isinstance(selection, InlineFragmentNode):
+            condition = parent
+            if selection.type_condition is not None:
+                condition = schema.get_type(selection.type_condition.name.value)
+            cost += _selection_cost(
+                schema,
+                condition,
+                selection.selection_set,
+                fragments,
+                variables,
+                row_counts,
+            )
+        elif isinstance(selection, FieldNode):
+            cost += _field_cost(
+                schema, parent, selection, fragments, variables, row_counts
+            )
+    return cost
+
+
+def _field_cost(
+    schema: GraphQLSchema,
+    parent: GraphQLNamedType,
+    node: FieldNode,
+    fragments: Dict[str, FragmentDefinitionNode],
+    variables: Dict[str, Any],
+    row_counts: Mapping[str, int],
+) -> int:
+    name = node.name.value
+    field = getattr(parent, "fields", {}).get(name)
+    if field is None or node.selection_set is None:
+        return 0
+
+    size = None
+    arguments = {argument.name.value: argument.value for argument in node.arguments}
+    for argument_name in SIZE_ARGUMENTS:
+        if argument_name not in field.args:
+            continue
+        definition = field.args[argument_name]
+        if argument_name in arguments:
+            size = value_from_ast(arguments[argument_name], definition.type, variables)
+        if size is None or size is Undefined:
+            size = definition.default_value
+        if size is Undefined:
+            size = None
+    if size is None and name in FIELD_TABLES:
+        size = row_counts.get(FIELD_TABLES[name], DEFAULT_LIST_SIZE)
+    if size is None:
+        is_list = isinstance(get_nullable_type(field.type), GraphQLList)
+        size = DEFAULT_LIST_SIZE if is_list and name not in PAGE_LISTS else 1
+
+    child = get_named_type(field.type)
+    if not isinstance(child, GraphQLObjectType):
+        return 0
+    selections = _selection_cost(
+        schema, child, node.selection_set, fragments, variables, row_counts
+    )
+    return int(size) * (1 + selections)
+
+
+class _PoolRowCounts(Mapping):
+    """Table row counts read from a connection pool when first needed."""
+
+    def __init__(self, pool: "DuckDBConnectionPool") -> None:
+        self.pool = pool
+        self._counts: Optional[Dict[str, int]] = None
+
+    def _load(self) -> Dict[str, int]:
+        if self._counts is None:
+            with self.pool.agent() as agent:
+                self._counts = agent.get_table_row_counts()
+        return self._counts
+
+    def __getitem__(self, table: str) -> int:
+        return self._load()[table]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Rejects operations whose `query_cost` is above `max_cost` with a `QUERY_TOO_COSTLY` error,
+    without running them. Row counts come from the connection pool in the request context.
+    """
+
+    def __init__(self, max_cost: int) -> None:
+        self.max_cost = max_cost
+
+    def on_execute(self):
+        execution_context = self.execution_context
+        pool = (execution_context.context or {}).get("pool")
+        cost = query_cost(
+            execution_context.schema._schema,
+            execution_context.graphql_document,
+            execution_context.operation_name,
+            execution_context.variables,
+            _PoolRowCounts(pool) if pool is not None else None,
+        )
+        if cost > self.max_cost:
+            error = GraphQLError(
+                f"Query cost {cost} exceeds the maximum of {self.max_cost}",
+                extensions={
+                    "code": "QUERY_TOO_COSTLY",
+                    "cost": cost,
+                    "maxCost": self.max_cost,
+                },
+            )
+            execution_context.result = GraphQLExecutionResult(data=None, errors=[error])
+        yield
+
+
+class QueryTimeBudget(SchemaExtension):
+    """
+    Gives the DuckDB queries of each operation `seconds` in total, after which they are
+    interrupted and their fields fail with a `QueryTimeoutError`.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def on_execute(self):
+        with time_budget(self.seconds):
+            yield
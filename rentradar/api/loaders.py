@@ -0,0 +1,114 @@
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Type
+
+from strawberry.dataloader import DataLoader
+
+from rentradar.db.duckdb import DuckDBConnectionPool, RentRadarQueryAgent
+from rentradar.utils.utils import build_objects
+
+from .schema import (
+    LongTermRental,
+    PropertyFeature,
+    PropertyOwner,
+    PropertyTax,
+    SaleListing,
+    TaxAssessment,
+)
+
+
+class RentRadarLoaders:
+    """
+    Per-request DataLoaders for the relationship fields on `Property`. Each loader collects the
+    property_ids requested while resolving a query and fetches them with a single
+    `WHERE property_id IN (...)` query per table.
+
+    Attributes:
+        pool (DuckDBConnectionPool): The connection pool the batched queries run against.
+    """
+
+    def __init__(self, pool: DuckDBConnectionPool) -> None:
+        self.pool = pool
+        self.features = DataLoader(load_fn=self.load_features)
+        self.owners = DataLoader(load_fn=self.load_owners)
+        self.taxes = DataLoader(load_fn=self.load_taxes)
+        self.assessments = DataLoader(load_fn=self.load_assessments)
+        self.long_term_rentals = DataLoader(load_fn=self.load_long_term_rentals)
+        self.sale_listings = DataLoader(load_fn=self.load_sale_listings)
+        self.rent_estimates = DataLoader(load_fn=self.load_rent_estimates)
+
+    async def _group_by_property_id(
+        self,
+        fetch: Callable[[RentRadarQueryAgent, List[str]], Dict[str, list]],
+        cls: Type,
+        property_ids: List[str],
+    ) -> List[list]:
+        """
+        Runs one batched query and returns the matching objects for each key, in key order.
+        """
+        columns = await self.pool.run(fetch, property_ids)
+        objects = build_objects(cls, columns)
+
+        grouped = defaultdict(list)
+        for obj in objects:
+            grouped[obj.property_id].append(obj)
+        return [grouped.get(property_id, []) for property_id in property_ids]
+
+    async def load_features(
+        self, property_ids: List[str]
+    ) -> List[Optional[PropertyFeature]]:
+        grouped = await self._group_by_property_id(
+            RentRadarQueryAgent.get_property_features_by_property_ids,
+            PropertyFeature,
+            property_ids,
+        )
+        return [features[0] if features else None for features in grouped]
+
+    async def load_owners(self, property_ids: List[str]) -> List[List[PropertyOwner]]:
+        return await self._group_by_property_id(
+            RentRadarQueryAgent.get_owners_by_property_ids, PropertyOwner, property_ids
+        )
+
+    async def load_taxes(self, property_ids: List[str]) -> List[List[PropertyTax]]:
+        return await self._group_by_property_id(
+            RentRadarQueryAgent.get_property_taxes_by_property_ids,
+            PropertyTax,
+            property_ids,
+        )
+
+    async def load_assessments(
+        self, property_ids: List[str]
+    ) -> List[List[TaxAssessment]]:
+        return await self._group_by_property_id(
+            RentRadarQueryAgent.get_tax_assessments_by_property_ids,
+            TaxAssessment,
+            property_ids,
+        )
+
+    async def load_long_term_rentals(
+        self, property_ids: List[str]
+    ) -> List[List[LongTermRental]]:
+        return await self._group_by_property_id(
+            RentRadarQueryAgent.get_long_term_rentals_by_property_ids,
+            LongTermRental,
+            property_ids,
+        )
+
+    async def load_sale_listings(
+        self, property_ids: List[str]
+    ) -> List[List[SaleListing]]:
+        return await self._group_by_property_id(
+            RentRadarQueryAgent.get_sale_listings_by_property_ids,
+            SaleListing,
+            property_ids,
+        )
+
+    async def load_rent_estimates(
+        self, property_ids: List[str]
+    ) -> List[Optional[float]]:
+        columns = await self.pool.run(
+            RentRadarQueryAgent.get_rent_estimates_by_property_ids, property_ids
+        )
+        estimates = dict(
+            zip(columns.get("property_id", []), columns.get("fair_rent_estimate", []))
+        )
+        return [estimates.get(property_id) for property_id in property_ids]
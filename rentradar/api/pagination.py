@@ -0,0 +1,64 @@
+import base64
+from typing import Dict, Optional, Type, TypeVar
+
+from rentradar.utils.utils import build_objects
+
+from .schema import Connection, Edge, PageInfo
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(key: str) -> str:
+    """Encodes a keyset pagination key as an opaque cursor."""
+    return base64.urlsafe_b64encode(str(key).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+    """Decodes a cursor produced by `encode_cursor`, passing None through."""
+    if cursor is None:
+        return None
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+
+
+def check_page_size(first: int) -> int:
+    """Validates the requested page size and returns the number of rows to fetch."""
+    if not 0 < first <= MAX_PAGE_SIZE:
+        raise ValueError(f"first must be between 1 and {MAX_PAGE_SIZE}, got {first}")
+    # one extra row tells us whether there is a next page
+    return first + 1
+
+
+def build_connection(
+    cls: Type[T], columns: Dict[str, list], key: str, first: int
+) -> Connection[T]:
+    """
+    Builds a Relay-style connection from a page fetched with `first + 1` rows.
+
+    Args:
+        cls (Type[T]): The node type to construct.
+        columns (Dict[str, list]): The fetched page, ordered by `key`.
+        key (str): The attribute used as the keyset pagination key.
+        first (int): The requested page size.
+
+    Returns:
+        Connection[T]: The page's edges and page info.
+    """
+    nodes = build_objects(cls, columns)
+    has_next_page = len(nodes) > first
+    edges = [
+        Edge(cursor=encode_cursor(getattr(node, key)), node=node)
+        for node in nodes[:first]
+    ]
+    return Connection(
+        edges=edges,
+        pageInfo=PageInfo(
+            hasNextPage=has_next_page,
+            endCursor=edges[-1].cursor if edges else None,
+        ),
+    )
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from strawberry.http.exceptions import HTTPException
+
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+
+
+class PersistedQueryNotFound(Exception):
+    """The request only carries the hash of a document the server does not know."""
+
+    def to_response(self) -> dict:
+        return {
+            "errors": [
+                {
+                    "message": PERSISTED_QUERY_NOT_FOUND,
+                    "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"},
+                }
+            ]
+        }
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueryStore:
+    """
+    GraphQL documents by the SHA-256 hash of their text, following Apollo's automatic
+    persisted queries protocol: a client sends `extensions.persistedQuery.sha256Hash` instead of
+    the document, and on a `PersistedQueryNotFound` error repeats the request with the document
+    included, which registers it. Documents can also be preloaded from a JSON file of
+    `{hash: document}`, e.g. one generated at build time from the frontend's queries.
+
+    Attributes:
+        path (Optional[str]): JSON file of preloaded documents.
+        max_size (int): Registered documents kept, least recently used first out. Preloaded
+            documents are never evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_size: int = 10_000) -> None:
+        self.max_size = max_size
+        self._preloaded: Dict[str, str] = {}
+        self._registered: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            with open(path) as f:
+                documents = json.load(f)
+            for sha256, query in documents.items():
+                if query_hash(query) != sha256:
+                    raise ValueError(
+                        f"Persisted query {sha256} does not match its hash"
+                    )
+            self._preloaded.update(documents)
+
+    def __len__(self) -> int:
+        return len(self._preloaded) + len(self._registered)
+
+    def get(self, sha256: str) -> Optional[str]:
+        query = self._preloaded.get(sha256)
+        if query is not None:
+            return query
+        with self._lock:
+            query = self._registered.get(sha256)
+            if query is not None:
+                self._registered.move_to_end(sha256)
+        return query
+
+    def register(self, sha256: str, query: str) -> None:
+        if query_hash(query) != sha256:
+            raise HTTPException(400, "provided sha does not match query")
+        if sha256 in self._preloaded:
+            return
+        with self._lock:
+            self._registered[sha256] = query
+            self._registered.move_to_end(sha256)
+            while len(self._registered) > self.max_size:
+                self._registered.popitem(last=False)
+
+    def resolve(
+        self, query: Optional[str], extensions: Mapping[str, Any]
+    ) -> Optional[str]:
+        """
+        The document of a request: registers `query` when the request carries both a document
+        and its hash, and looks the hash up when it carries only the hash.
+        """
+        persisted = (extensions or {}).get("persistedQuery")
+        if not persisted:
+            return query
+        sha256 = persisted.get("sha256Hash")
+        if persisted.get("version", 1) != 1 or not isinstance(sha256, str):
+            raise HTTPException(400, "Unsupported persisted query")
+        if query is not None:
+            self.register(sha256, query)
+            return query
+        query = self.get(sha256)
+        if query is None:
+            raise PersistedQueryNotFound(sha256)
+        return query
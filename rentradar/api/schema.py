@@ -1,6 +1,10 @@
-from typing import Optional
+from enum import Enum
+from typing import Generic, List, Optional, TypeVar
 
 import strawberry
+from strawberry.types import Info
+
+T = TypeVar("T")
 
 
 @strawberry.type
@@ -22,6 +26,36 @@ class Property:
     assessorID: Optional[str]
     legalDescription: Optional[str]
 
+    @strawberry.field
+    async def features(self, info: Info) -> Optional["PropertyFeature"]:
+        return await info.context["loaders"].features.load(self.property_id)
+
+    @strawberry.field
+    async def owners(self, info: Info) -> List["PropertyOwner"]:
+        return await info.context["loaders"].owners.load(self.property_id)
+
+    @strawberry.field
+    async def taxes(self, info: Info) -> List["PropertyTax"]:
+        return await info.context["loaders"].taxes.load(self.property_id)
+
+    @strawberry.field
+    async def assessments(self, info: Info) -> List["TaxAssessment"]:
+        return await info.context["loaders"].assessments.load(self.property_id)
+
+    @strawberry.field
+    async def long_term_rentals(self, info: Info) -> List["LongTermRental"]:
+        return await info.context["loaders"].long_term_rentals.load(self.property_id)
+
+    @strawberry.field
+    async def sale_listings(self, info: Info) -> List["SaleListing"]:
+        return await info.context["loaders"].sale_listings.load(self.property_id)
+
+    @strawberry.field(
+        description="Precomputed fair-value rent estimate from the rent estimator model"
+    )
+    async def fair_rent_estimate(self, info: Info) -> Optional[float]:
+        return await info.context["loaders"].rent_estimates.load(self.property_id)
+
 
 @strawberry.type
 class County:
@@ -51,6 +85,34 @@ class HistoricMarketStat:
     zipCode: int
 
 
+@strawberry.enum
+class GeographyType(Enum):
+    ZIP = "zip"
+    COUNTY = "county"
+    ALL = "all"
+
+
+@strawberry.type
+class MarketTrend:
+    geography_type: str
+    geography: str
+    bedrooms: Optional[int]
+    month: str
+    rentals: int
+    median_rent: Optional[float]
+    sales: int
+    median_price: Optional[float]
+    market_rent: Optional[float] = strawberry.field(
+        description="RentCast's average rent, weighted by its listing counts"
+    )
+    rent_to_price: Optional[float] = strawberry.field(
+        description="Annual median rent divided by the median sale listing price"
+    )
+    median_rent_yoy: Optional[float]
+    median_price_yoy: Optional[float]
+    market_rent_yoy: Optional[float]
+
+
 @strawberry.type
 class LongTermRental:
     property_id: strawberry.ID
@@ -135,3 +197,82 @@ class TaxAssessment:
     total_value: Optional[float]
     land_value: Optional[float]
     improvements_value: Optional[float]
+
+
+@strawberry.enum
+class CompKind(Enum):
+    RENT = "rent"
+    SALE = "sale"
+
+
+@strawberry.type
+class Comp:
+    property_id: strawberry.ID
+    formattedAddress: Optional[str]
+    propertyType: Optional[str]
+    latitude: float
+    longitude: float
+    bedrooms: Optional[float]
+    bathrooms: Optional[float]
+    squareFootage: Optional[float]
+    yearBuilt: Optional[float]
+    price: float = strawberry.field(description="Price of the comp's latest listing")
+    status: Optional[str]
+    listedDate: Optional[str]
+    similarity_distance: float = strawberry.field(
+        description="Distance in normalized feature units; lower is more comparable"
+    )
+    distance_km: float
+
+
+@strawberry.type
+class MapCluster:
+    id: str
+    count: int
+    latitude: float
+    longitude: float
+    medianRent: Optional[float]
+    medianPrice: Optional[float] = strawberry.field(
+        description="Median asking price of the cluster's sale listings"
+    )
+
+
+@strawberry.type
+class PageInfo:
+    hasNextPage: bool
+    endCursor: Optional[str]
+
+
+@strawberry.type
+class Edge(Generic[T]):
+    cursor: str
+    node: T
+
+
+@strawberry.type
+class Connection(Generic[T]):
+    edges: List[Edge[T]]
+    pageInfo: PageInfo
+
+
+@strawberry.input
+class PropertyFilter:
+    zipCode: Optional[int] = None
+    county: Optional[str] = None
+    propertyType: Optional[str] = None
+    minPrice: Optional[float] = strawberry.field(
+        default=None, description="Minimum last sale price."
+    )
+    maxPrice: Optional[float] = strawberry.field(
+        default=None, description="Maximum last sale price."
+    )
+
+
+@strawberry.input
+class ListingFilter:
+    zipCode: Optional[int] = None
+    county: Optional[str] = None
+    propertyType: Optional[str] = None
+    status: Optional[str] = None
+    minPrice: Optional[float] = None
+    maxPrice: Optional[float] = None
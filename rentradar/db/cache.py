@@ -0,0 +1,255 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generic,
+    Hashable,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import pandas as pd
+
+T = TypeVar("T")
+
+TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+
+
+class TableVersions:
+    """
+    Process-wide registry of per-table version counters. A table's version is bumped whenever
+    it is replaced, which lets caches detect stale results without re-running the query.
+    Tables are keyed by database path so unrelated databases don't invalidate each other.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: Dict[Tuple[str, str], int] = {}
+
+    @staticmethod
+    def _key(db_path: str, table_name: str) -> Tuple[str, str]:
+        if db_path != ":memory:":
+            db_path = os.path.abspath(db_path)
+        return db_path, table_name.lower()
+
+    def get(self, db_path: str, table_name: str) -> int:
+        return self._versions.get(self._key(db_path, table_name), 0)
+
+    def bump(self, db_path: str, table_name: str) -> int:
+        key = self._key(db_path, table_name)
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+    def snapshot(self, db_path: str, tables: FrozenSet[str]) -> Tuple[int, ...]:
+        return tuple(self.get(db_path, table) for table in sorted(tables))
+
+
+table_versions = TableVersions()
+
+
+def database_version(db_path: str) -> float:
+    """
+    A version of a database file that changes whenever any process writes to it: the latest
+    modification time of the file and its write-ahead log. `TableVersions` only sees writes made
+    through this process, so caches in other processes (e.g. the Streamlit app) key on this.
+    """
+    versions = [0.0]
+    for path in (db_path, f"{db_path}.wal"):
+        try:
+            versions.append(os.stat(path).st_mtime_ns / 1e9)
+        except FileNotFoundError:
+            pass
+    return max(versions)
+
+
+class VersionedResource(Generic[T]):
+    """
+    Holds a resource (e.g. a connection pool) for the current `database_version`. It is built
+    with `create` on first use and again whenever the version changes, and the previous one is
+    released with `close`. Caches that evict resources without releasing them (such as
+    Streamlit's `cache_resource`) would leave every old handle's connections, and the file
+    lock, open.
+
+    Attributes:
+        create (Callable[[], T]): Builds the resource.
+        close (Callable[[T], None]): Releases a resource that has been replaced.
+    """
+
+    def __init__(self, create: Callable[[], T], close: Callable[[T], None]) -> None:
+        self.create = create
+        self.close = close
+        self._lock = threading.Lock()
+        self._resource: Optional[T] = None
+        self._version: Optional[float] = None
+
+    def get(self, version: float) -> T:
+        """
+        The resource for `version`, replacing the one for an older version. A caller that read
+        the version before a reload gets the current resource rather than replacing it.
+        """
+        with self._lock:
+            if self._resource is None or version > self._version:
+                replaced = self._resource
+                self._resource, self._version = self.create(), version
+                if replaced is not None:
+                    self.close(replaced)
+            return self._resource
+
+
+@lru_cache(maxsize=1024)
+def referenced_tables(query: str) -> FrozenSet[str]:
+    """
+    Returns the names of the tables a query reads from (identifiers following FROM or JOIN).
+    """
+    return frozenset(name.lower() for name in TABLE_PATTERN.findall(query))
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimates the in-memory size of a cached result in bytes. Column dictionaries are sized
+    from a sample of each column rather than by visiting every value.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        size = sys.getsizeof(value)
+        for column in value.values():
+            size += sys.getsizeof(column)
+            sample = column[:64] if isinstance(column, list) else []
+            if sample:
+                per_value = sum(sys.getsizeof(v) for v in sample) / len(sample)
+                size += int(per_value * len(column))
+        return size
+    return sys.getsizeof(value)
+
+
+def freeze(params: Any) -> Hashable:
+    """
+    Converts query parameters (which may contain lists) into a hashable cache key component.
+    """
+    if isinstance(params, (list, tuple)):
+        return tuple(freeze(param) for param in params)
+    if isinstance(params, dict):
+        return tuple(sorted((key, freeze(value)) for key, value in params.items()))
+    return params
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    versions: Tuple[int, ...]
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache for query results, bounded by an estimated size in bytes. Entries
+    expire after `ttl` seconds and are dropped as soon as any table the query reads from has
+    been replaced (see `TableVersions`).
+
+    Attributes:
+        max_bytes (int): The maximum estimated size of all cached results.
+        ttl (Optional[float]): Seconds an entry stays valid, or None to never expire.
+        hits, misses, evictions, expirations, invalidations (int): Usage counters.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: Optional[float] = 300.0,
+        versions: TableVersions = table_versions,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def get_or_compute(
+        self,
+        db_path: str,
+        query: str,
+        params: Optional[tuple],
+        compute: Callable[[], Any],
+    ) -> Any:
+        """
+        Returns the cached result for (db_path, query, params), running `compute` on a miss.
+        """
+        key = (db_path, query, freeze(params or ()))
+        tables = referenced_tables(query)
+        versions = self.versions.snapshot(db_path, tables)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.versions != versions:
+                    self.invalidations += 1
+                    self._drop(key)
+                elif entry.expires_at < time.monotonic():
+                    self.expirations += 1
+                    self._drop(key)
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return entry.value
+            self.misses += 1
+
+        value = compute()
+        self.put(key, value, versions)
+        return value
+
+    def put(self, key: Hashable, value: Any, versions: Tuple[int, ...]) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = (
+            time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        )
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = CacheEntry(value, size, expires_at, versions)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,214 @@
+"""
+Schema catalog of a RentRadar database.
+
+Every table, its columns and types, its approximate row count and a few sample rows, read with
+one query over `duckdb_columns()` plus one `LIMIT` query per table. The catalog is built once
+per database version (see `database_version`), kept in-process and stored next to the database
+as JSON, so the Streamlit landing page and the LLM agent don't introspect the database on every
+load. Any write to the database changes its version and rebuilds the catalog on next use.
+
+Usage:
+    python -m rentradar.db.catalog --db rentradar/db/rentradar.db
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from rentradar.db.cache import database_version
+from rentradar.utils.utils import column_to_list
+
+if TYPE_CHECKING:
+    from rentradar.db.duckdb import DuckDBManager
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_ROWS = 3
+# sample values are cut to this many characters, as LangChain's SQLDatabase does
+MAX_SAMPLE_LENGTH = 100
+
+CATALOG_QUERY = """
+SELECT t.table_name, t.estimated_size, c.column_name, c.data_type, c.is_nullable
+FROM duckdb_tables() t
+JOIN duckdb_columns() c USING (database_name, schema_name, table_name)
+WHERE NOT t.temporary AND t.schema_name = 'main'
+ORDER BY t.table_name, c.column_index
+"""
+
+_loaded: Dict[str, "SchemaCatalog"] = {}
+_load_lock = threading.Lock()
+
+
+def catalog_path(db_path: str) -> str:
+    """Where the catalog of a database is stored: next to it, e.g. `rentradar.catalog.json`."""
+    return os.path.splitext(db_path)[0] + ".catalog.json"
+
+
+@dataclass
+class TableInfo:
+    name: str
+    row_count: int
+    columns: List[Tuple[str, str, bool]] = field(default_factory=list)
+    sample_rows: List[list] = field(default_factory=list)
+
+    @property
+    def column_names(self) -> List[str]:
+        return [name for name, _, _ in self.columns]
+
+    def create_statement(self) -> str:
+        columns = ",\n".join(
+            f"\t{name} {data_type}{'' if nullable else ' NOT NULL'}"
+            for name, data_type, nullable in self.columns
+        )
+        return f"CREATE TABLE {self.name} (\n{columns}\n)"
+
+    def table_info(self) -> str:
+        """
+        The table in the format of LangChain's `SQLDatabase.get_table_info`: its CREATE TABLE
+        statement followed by a comment with the sample rows.
+        """
+        rows = "\n".join(
+            "\t".join(str(value)[:MAX_SAMPLE_LENGTH] for value in row)
+            for row in self.sample_rows
+        )
+        return (
+            f"{self.create_statement()}\n\n/*\n{len(self.sample_rows)} rows from "
+            f"{self.name} table:\n{chr(9).join(self.column_names)}\n{rows}\n*/"
+        )
+
+
+@dataclass
+class SchemaCatalog:
+    """
+    The tables of a database as of `version`.
+
+    Attributes:
+        version (float): The `database_version` the catalog was built at.
+        tables (Dict[str, TableInfo]): Every table by name.
+    """
+
+    version: float
+    tables: Dict[str, TableInfo]
+
+    @classmethod
+    def build(
+        cls, db: "DuckDBManager", sample_rows: int = SAMPLE_ROWS
+    ) -> "SchemaCatalog":
+        version = database_version(db.db_path)
+        columns = db.conn.execute(CATALOG_QUERY).fetchall()
+        tables: Dict[str, TableInfo] = {}
+        for table_name, row_count, column_name, data_type, nullable in columns:
+            table = tables.setdefault(table_name, TableInfo(table_name, row_count))
+            table.columns.append((column_name, data_type, nullable))
+        for table in tables.values():
+            if not sample_rows:
+                break
+            samples = db.conn.execute(
+                f'SELECT * FROM "{table.name}" LIMIT {sample_rows}'
+            ).fetchnumpy()
+            table.sample_rows = [
+                list(row) for row in zip(*map(column_to_list, samples.values()))
+            ]
+        return cls(version=version, tables=tables)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Column names and types indexed by (table_name, column_index)."""
+        rows = [
+            (table.name, index, name, data_type)
+            for table in self.tables.values()
+            for index, (name, data_type, _) in enumerate(table.columns)
+        ]
+        frame = pd.DataFrame(
+            rows, columns=["table_name", "column_index", "name", "type"]
+        )
+        return frame.set_index(["table_name", "column_index"])
+
+    def table_info(self) -> Dict[str, str]:
+        """LangChain-style table info by table name, for `SQLDatabase(custom_table_info=)`."""
+        return {name: table.table_info() for name, table in self.tables.items()}
+
+    def save(self, path: str) -> None:
+        """Writes the catalog to `path`, replacing it atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f, default=str)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SchemaCatalog":
+        with open(path) as f:
+            data = json.load(f)
+        tables = {
+            name: TableInfo(
+                name=table["name"],
+                row_count=table["row_count"],
+                columns=[tuple(column) for column in table["columns"]],
+                sample_rows=table["sample_rows"],
+            )
+            for name, table in data["tables"].items()
+        }
+        return cls(version=data["version"], tables=tables)
+
+
+def get_schema_catalog(
+    db_path: str, db: Optional["DuckDBManager"] = None
+) -> SchemaCatalog:
+    """
+    The catalog of the database at `db_path` for its current version: the one in memory, else
+    the one stored next to the database, else a new one built through `db` (or a read-only
+    connection opened for the purpose) and stored.
+    """
+    version = database_version(db_path)
+    with _load_lock:
+        catalog = _loaded.get(db_path)
+        if catalog is not None and catalog.version == version:
+            return catalog
+
+        path = catalog_path(db_path)
+        catalog = None
+        if os.path.exists(path):
+            try:
+                catalog = SchemaCatalog.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Ignoring unreadable schema catalog %s: %s", path, e)
+        if catalog is None or catalog.version != version:
+            catalog = _build(db_path, db)
+            try:
+                catalog.save(path)
+            except OSError as e:
+                logger.warning("Could not store schema catalog %s: %s", path, e)
+            logger.info("Built schema catalog of %s", db_path)
+        _loaded[db_path] = catalog
+        return catalog
+
+
+def _build(db_path: str, db: Optional["DuckDBManager"]) -> SchemaCatalog:
+    if db is not None:
+        return SchemaCatalog.build(db)
+    from rentradar.db.duckdb import DuckDBManager
+
+    with DuckDBManager(db_path, read_only=True) as db:
+        return SchemaCatalog.build(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default="rentradar/db/rentradar.db")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = get_schema_catalog(args.db)
+    for table in catalog.tables.values():
+        print(
+            f"{table.name:28} {len(table.columns):>4} columns {table.row_count:>12,} rows"
+        )
+
+
+if __name__ == "__main__":
+    main()
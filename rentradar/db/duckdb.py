@@ -1,13 +1,159 @@
+import asyncio
+import contextvars
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import duckdb
 import pandas as pd
 
+from rentradar.db.cache import QueryCache, table_versions
+from rentradar.db.catalog import SchemaCatalog
+from rentradar.db.prepared import StatementRegistry
+from rentradar.db.spatial import (
+    BINS_PER_TILE,
+    DISTANCE_SQL,
+    MAP_TILE_QUERY,
+    BBox,
+    bbox_filter,
+    radius_bbox,
+    tile_bbox,
+    tile_size,
+    viewport_tiles,
+)
+from rentradar.db.timeout import deadline_guard
+from rentradar.utils.utils import column_to_list
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
+T = TypeVar("T")
+
+# tables served by the bulk export endpoint, with the key they are exported in order of
+EXPORT_TABLES = {
+    "properties": "property_id",
+    "long_term_rentals": "id",
+    "sale_listings": "id",
+}
+EXPORT_BATCH_ROWS = 100_000
+
+# point lookups of RentRadarQueryAgent, prepared once per connection (see `prepared.py`)
+STATEMENTS = StatementRegistry(
+    {
+        "all_properties": "SELECT * FROM properties",
+        "property_by_id": "SELECT * FROM properties WHERE property_id = ?",
+        "property_features_by_property_id": (
+            "SELECT * FROM property_features WHERE property_id = ?"
+        ),
+        "property_features_by_property_ids": (
+            "SELECT * FROM property_features WHERE property_id IN (SELECT UNNEST(?))"
+        ),
+        "rent_estimates_by_property_ids": (
+            "SELECT * FROM rent_estimates WHERE property_id IN (SELECT UNNEST(?))"
+        ),
+        "county_by_id": "SELECT * FROM counties WHERE id = ?",
+        "all_counties": "SELECT * FROM counties",
+        "market_stats_by_zip": "SELECT * FROM current_market_stats WHERE zipCode = ?",
+        "market_stats_by_bedrooms": (
+            "SELECT * FROM current_market_stats WHERE bedrooms = ?"
+        ),
+        "historic_market_stats_by_zip": (
+            "SELECT * FROM historic_market_stats WHERE zipCode = ?"
+        ),
+        "historic_market_stats_by_bedrooms": (
+            "SELECT * FROM historic_market_stats WHERE bedrooms = ? AND zipCode = ?"
+        ),
+        "long_term_rentals_by_property_id": (
+            "SELECT * FROM long_term_rentals WHERE property_id = ?"
+        ),
+        "long_term_rentals_by_property_ids": (
+            "SELECT * FROM long_term_rentals WHERE property_id IN (SELECT UNNEST(?))"
+        ),
+        "all_long_term_rentals": "SELECT * FROM long_term_rentals",
+        "owners_by_property_id": "SELECT * FROM property_owners WHERE property_id = ?",
+        "owners_by_property_ids": (
+            "SELECT * FROM property_owners WHERE property_id IN (SELECT UNNEST(?))"
+        ),
+        "properties_by_owner_id": "SELECT * FROM property_owners WHERE owner_id = ?",
+        "property_taxes_by_property_id": (
+            "SELECT * FROM property_taxes WHERE property_id = ?"
+        ),
+        "property_taxes_by_property_ids": (
+            "SELECT * FROM property_taxes WHERE property_id IN (SELECT UNNEST(?))"
+        ),
+        "property_taxes_by_year": "SELECT * FROM property_taxes WHERE year = ?",
+        "property_taxes_by_property_id_and_year": (
+            "SELECT * FROM property_taxes WHERE property_id = ? AND year = ?"
+        ),
+        "property_type_by_id": "SELECT * FROM property_types WHERE id = ?",
+        "all_property_types": "SELECT * FROM property_types",
+        "description_by_property_type": (
+            "SELECT description FROM property_types WHERE propertyType = ?"
+        ),
+        "sale_listings_by_property_id": (
+            "SELECT * FROM sale_listings WHERE property_id = ?"
+        ),
+        "sale_listings_by_property_ids": (
+            "SELECT * FROM sale_listings WHERE property_id IN (SELECT UNNEST(?))"
+        ),
+        "all_sale_listings": "SELECT * FROM sale_listings",
+        "tax_assessments_by_property_id": (
+            "SELECT * FROM tax_assessments WHERE property_id = ?"
+        ),
+        "tax_assessments_by_property_ids": (
+            "SELECT * FROM tax_assessments WHERE property_id IN (SELECT UNNEST(?))"
+        ),
+        "tax_assessment_by_id": "SELECT * FROM tax_assessments WHERE assessment_id = ?",
+        "tax_assessment_by_property_id_and_year": (
+            "SELECT * FROM tax_assessments WHERE property_id = ? AND year = ?"
+        ),
+        "market_trends": (
+            "SELECT * FROM market_trends WHERE geography_type = ? AND geography = ? "
+            "AND bedrooms IS NOT DISTINCT FROM ? AND month >= ? ORDER BY month"
+        ),
+    }
+)
+
+LoadMode = Literal["replace", "append", "upsert"]
+
+
+def _where(conditions: List[Tuple[str, Any]]) -> Tuple[str, list]:
+    """
+    The WHERE clause and parameters of filter conditions; conditions whose value is None are
+    skipped.
+    """
+    clauses = [clause for clause, value in conditions if value is not None]
+    params = [value for _, value in conditions if value is not None]
+    return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def quote_identifier(name: str) -> str:
+    """
+    Quotes a table or column name for use in a DuckDB statement.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
 
 class DuckDBManager:
     """
@@ -17,53 +163,169 @@ class DuckDBManager:
 
     Attributes:
         db_path (str): The path to the DuckDB database file.
+        read_only (bool): Whether the connection is opened in read-only mode.
         conn (duckdb.DuckDBPyConnection): The connection object to the DuckDB database.
     """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(
+        self,
+        db_path: str,
+        read_only: bool = False,
+        conn: Optional[duckdb.DuckDBPyConnection] = None,
+    ) -> None:
         """
-        Initializes or connects to a DuckDB database at the specified path.
+        Initializes or connects to a DuckDB database at the specified path. If an existing
+        connection (e.g. a cursor borrowed from a DuckDBConnectionPool) is passed, it is used
+        instead and left open when the manager is closed.
         """
         self.db_path = db_path
-        self.conn = duckdb.connect(database=self.db_path, read_only=False)
+        self.read_only = read_only
+        self._owns_connection = conn is None
+        if conn is None:
+            conn = duckdb.connect(database=self.db_path, read_only=self.read_only)
+        self.conn = conn
 
     def open_connection(self) -> None:
         """
         Opens a connection to the DuckDB database.
         """
         try:
-            self.conn = duckdb.connect(database=self.db_path, read_only=False)
+            self.conn = duckdb.connect(database=self.db_path, read_only=self.read_only)
+            self._owns_connection = True
             logger.info("Connected to DuckDB database at %s", self.db_path)
         except Exception as e:
             logger.error("Failed to connect to DuckDB database: %s", e)
             raise
 
-    def table_from_dataframe(self, df: pd.DataFrame, table_name: str) -> None:
+    def table_from_query(
+        self,
+        source: str,
+        table_name: str,
+        mode: LoadMode = "replace",
+        key: Optional[Union[str, List[str]]] = None,
+    ) -> None:
         """
-        Creates a table in the DuckDB database from a pandas DataFrame.
+        Loads the rows produced by the `source` SELECT into `table_name`.
+
+        - "replace" builds the new table in a staging table and swaps it in inside a single
+          transaction, so readers never see a missing or half-loaded table.
+        - "append" inserts the rows by column name.
+        - "upsert" deletes the rows whose `key` columns match an incoming row and inserts the
+          new rows, in one transaction.
+        UUID columns are stored as VARCHAR, matching how the ids are queried.
+        """
+        if mode not in ("replace", "append", "upsert"):
+            raise ValueError(f"Unsupported load mode: {mode}")
+        if mode == "upsert" and not key:
+            raise ValueError("A key is required to upsert into a table")
+
+        target = quote_identifier(table_name)
+        columns = self.conn.execute(f"DESCRIBE {source}").fetchall()
+        select = ", ".join(
+            (
+                f"CAST({quote_identifier(name)} AS VARCHAR) AS {quote_identifier(name)}"
+                if column_type == "UUID"
+                else quote_identifier(name)
+            )
+            for name, column_type, *_ in columns
+        )
+        rows = f"SELECT {select} FROM ({source})"
+
+        if mode == "replace":
+            staging = quote_identifier(f"{table_name}__staging")
+            self.conn.execute(f"DROP TABLE IF EXISTS {staging}")
+            self.conn.execute(f"CREATE TABLE {staging} AS {rows}")
+            statements = [
+                f"DROP TABLE IF EXISTS {target}",
+                f"ALTER TABLE {staging} RENAME TO {target}",
+            ]
+        elif mode == "append":
+            statements = [f"INSERT INTO {target} BY NAME {rows}"]
+        else:
+            keys = [key] if isinstance(key, str) else list(key)
+            matches = " AND ".join(
+                f"{target}.{quote_identifier(k)} = incoming.{quote_identifier(k)}"
+                for k in keys
+            )
+            statements = [
+                f"DELETE FROM {target} USING ({rows}) AS incoming WHERE {matches}",
+                f"INSERT INTO {target} BY NAME {rows}",
+            ]
+
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            for statement in statements:
+                self.conn.execute(statement)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            if mode == "replace":
+                self.conn.execute(f"DROP TABLE IF EXISTS {staging}")
+            raise
+        table_versions.bump(self.db_path, table_name)
+
+    def table_from_dataframe(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        mode: LoadMode = "replace",
+        key: Optional[Union[str, List[str]]] = None,
+    ) -> None:
+        """
+        Creates a table in the DuckDB database from a pandas DataFrame (or pyarrow Table). The
+        frame is registered with DuckDB and read in place rather than inserted row by row.
+        See `table_from_query` for the load modes.
         """
+        view_name = f"__{table_name}_source"
+        # DuckDB can't infer a type for object columns with no values; store them as text
+        # like to_sql did, so later loads with values still fit.
+        empty_columns = []
+        if isinstance(df, pd.DataFrame):
+            empty_columns = [
+                quote_identifier(str(column))
+                for column in df.columns
+                if df[column].dtype == object and df[column].isna().all()
+            ]
+        replace = ", ".join(f"CAST({c} AS VARCHAR) AS {c}" for c in empty_columns)
+        select = f"* REPLACE ({replace})" if replace else "*"
         try:
-            df.to_sql(table_name, self.conn, if_exists="replace", index=False)
-            logger.info("Table '%s' created from DataFrame", table_name)
+            self.conn.register(view_name, df)
+            try:
+                self.table_from_query(
+                    f"SELECT {select} FROM {quote_identifier(view_name)}",
+                    table_name,
+                    mode=mode,
+                    key=key,
+                )
+            finally:
+                self.conn.unregister(view_name)
+            logger.info("Table '%s' created from DataFrame (%s)", table_name, mode)
         except Exception as e:
             logger.error("Failed to create table: %s", e)
             raise
 
     def table_from_file(
-        self, file_path: str, table_name: str, file_format: str = "csv"
+        self,
+        file_path: str,
+        table_name: str,
+        file_format: str = "csv",
+        mode: LoadMode = "replace",
+        key: Optional[Union[str, List[str]]] = None,
     ) -> None:
         """
-        Creates a table in the database from a file.
+        Creates a table in the database from a file, reading it with DuckDB's own CSV/Parquet
+        readers. See `table_from_query` for the load modes.
         """
         try:
+            path = file_path.replace("'", "''")
             if file_format.lower() == "csv":
-                df = pd.read_csv(file_path)
+                source = f"SELECT * FROM read_csv_auto('{path}')"
             elif file_format.lower() == "parquet":
-                df = pd.read_parquet(file_path)
+                source = f"SELECT * FROM read_parquet('{path}')"
             else:
                 raise ValueError(f"Unsupported file format: {file_format}")
 
-            self.table_from_dataframe(df, table_name)
+            self.table_from_query(source, table_name, mode=mode, key=key)
             logger.info("Table '%s' created from file %s", table_name, file_path)
         except Exception as e:
             logger.error(
@@ -73,16 +335,49 @@ class DuckDBManager:
 
     def execute_query(self, query: str, params=None) -> pd.DataFrame:
         try:
-            if params:
-                result = self.conn.execute(query, params).fetchdf()
-            else:
-                result = self.conn.execute(query).fetchdf()
-            logger.info("Executed query: %s", query)
+            with deadline_guard(self.conn):
+                if params:
+                    result = self.conn.execute(query, params).fetchdf()
+                else:
+                    result = self.conn.execute(query).fetchdf()
+            logger.debug("Executed query: %s", query)
             return result
         except Exception as e:
             logger.error("Failed to execute query: %s: %s", query, e)
             raise
 
+    def fetch_columns(self, query: str, params=None) -> Dict[str, list]:
+        """
+        Executes a query and returns its result column by column, as lists of Python objects
+        with nulls replaced by None. Skips building a DataFrame, which makes it the cheaper
+        path when the rows are going to be turned into objects anyway.
+        """
+        try:
+            with deadline_guard(self.conn):
+                if params:
+                    result = self.conn.execute(query, params).fetchnumpy()
+                else:
+                    result = self.conn.execute(query).fetchnumpy()
+            logger.debug("Executed query: %s", query)
+            return {name: column_to_list(values) for name, values in result.items()}
+        except Exception as e:
+            logger.error("Failed to execute query: %s: %s", query, e)
+            raise
+
+    def fetch_statement(self, name: str, params: Sequence = ()) -> Dict[str, list]:
+        """
+        Like `fetch_columns`, for a statement of the `STATEMENTS` registry, which is prepared
+        once per connection instead of being parsed and planned on every call.
+        """
+        try:
+            with deadline_guard(self.conn):
+                result = STATEMENTS.execute(self.conn, name, params).fetchnumpy()
+            logger.debug("Executed statement %s%s", name, tuple(params))
+            return {name: column_to_list(values) for name, values in result.items()}
+        except Exception as e:
+            logger.error("Failed to execute statement %s: %s", name, e)
+            raise
+
     def list_tables(self) -> pd.DataFrame:
         """
         Lists all tables in the database.
@@ -98,26 +393,12 @@ class DuckDBManager:
 
     def get_database_schema(self) -> pd.DataFrame:
         """
-        Returns the schema of all tables in the database as a DataFrame, grouped by table names,
-        showing only the column names and their types.
+        Returns the schema of all tables in the database as a DataFrame indexed by table name
+        and column index, showing only the column names and their types. Read from DuckDB's
+        catalog in a single query; see `get_schema_catalog` for a cached version.
         """
         try:
-            tables = self.list_tables()["name"].tolist()
-            schema_data = []
-            for table_name in tables:
-                table_schema = self.get_table_schema(table_name)
-                table_schema["table_name"] = table_name
-                schema_data.append(table_schema)
-
-            schema_df = pd.concat(schema_data, ignore_index=True)
-            schema_df = schema_df[["table_name", "name", "type"]]
-
-            schema_df = schema_df.groupby("table_name").apply(
-                lambda x: x.reset_index(drop=True)
-            )
-            schema_df.index.names = ["table_name", "column_index"]
-            schema_df = schema_df.drop("table_name", axis=1)
-
+            schema_df = SchemaCatalog.build(self, sample_rows=0).to_frame()
             logger.info("Retrieved database schema as DataFrame")
             return schema_df
         except Exception as e:
@@ -126,9 +407,9 @@ class DuckDBManager:
 
     def close(self) -> None:
         """
-        Closes the connection to the database.
+        Closes the connection to the database. Borrowed connections are left open for their owner.
         """
-        if self.conn:
+        if self.conn and self._owns_connection:
             self.conn.close()
             logger.info("Database connection closed.")
 
@@ -149,106 +430,609 @@ class RentRadarQueryAgent(DuckDBManager):
     """
     Specialized DuckDBManager for the RentRadar application, facilitating specific queries on rentradar tables.
     Simplifies data access by encapsulating SQL operations tailored to RentRadar's data model.
+    Results are returned column by column (see `fetch_columns`), ready for `build_objects`.
     """
 
-    def get_all_properties(self) -> pd.DataFrame:
-        query = "SELECT * FROM properties"
-        return self.execute_query(query)
+    def __init__(
+        self,
+        db_path: str,
+        read_only: bool = False,
+        conn: Optional[duckdb.DuckDBPyConnection] = None,
+        cache: Optional[QueryCache] = None,
+    ) -> None:
+        """
+        Initializes the agent. If a QueryCache is given, query results are served from it until
+        the tables they read from are replaced or the entries expire.
+        """
+        super().__init__(db_path, read_only=read_only, conn=conn)
+        self.cache = cache
+
+    def fetch_columns(self, query: str, params=None) -> Dict[str, list]:
+        if self.cache is None:
+            return super().fetch_columns(query, params)
+        return self.cache.get_or_compute(
+            self.db_path, query, params, partial(super().fetch_columns, query, params)
+        )
+
+    def fetch_statement(self, name: str, params: Sequence = ()) -> Dict[str, list]:
+        if self.cache is None:
+            return super().fetch_statement(name, params)
+        return self.cache.get_or_compute(
+            self.db_path,
+            STATEMENTS.sql(name),
+            params,
+            partial(super().fetch_statement, name, params),
+        )
+
+    def _fetch_page(
+        self,
+        table: str,
+        key: str,
+        first: int,
+        after: Optional[str],
+        conditions: List[Tuple[str, Any]],
+    ) -> Dict[str, list]:
+        """
+        Fetches up to `first` rows of `table` ordered by `key`, starting after the `after` key
+        (keyset pagination). Conditions whose value is None are skipped, so callers can pass
+        every optional filter through as-is.
+        """
+        if after is not None:
+            conditions = [*conditions, (f"{key} > ?", after)]
+        where, params = _where(conditions)
+        query = f"SELECT * FROM {table}{where} ORDER BY {key} LIMIT ?"
+        return self.fetch_columns(query, params=(*params, first))
+
+    def _property_conditions(
+        self,
+        zip_code: Optional[int],
+        county: Optional[str],
+        property_type: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+    ) -> List[Tuple[str, Any]]:
+        return [
+            ("zipCode = ?", zip_code),
+            ("county = ?", county),
+            ("propertyType = ?", property_type),
+            ("lastSalePrice >= ?", min_price),
+            ("lastSalePrice <= ?", max_price),
+        ]
+
+    def _listing_conditions(
+        self,
+        zip_code: Optional[int],
+        county: Optional[str],
+        property_type: Optional[str],
+        status: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+    ) -> List[Tuple[str, Any]]:
+        """
+        Builds the filter conditions shared by the listing tables. Location and type filters live
+        on `properties`, so they are applied through a property_id semi-join.
+        """
+        conditions = [
+            ("status = ?", status),
+            ("price >= ?", min_price),
+            ("price <= ?", max_price),
+        ]
+        for clause, value in (
+            ("zipCode = ?", zip_code),
+            ("county = ?", county),
+            ("propertyType = ?", property_type),
+        ):
+            conditions.append(
+                (
+                    f"property_id IN (SELECT property_id FROM properties WHERE {clause})",
+                    value,
+                )
+            )
+        return conditions
+
+    def get_table_row_counts(self) -> Dict[str, int]:
+        """
+        The approximate row count of every table, from DuckDB's catalog rather than a scan.
+        """
+        columns = self.fetch_columns(
+            "SELECT table_name, estimated_size FROM duckdb_tables()"
+        )
+        return dict(zip(columns["table_name"], columns["estimated_size"]))
+
+    def get_all_properties(self) -> Dict[str, list]:
+        return self.fetch_statement("all_properties")
+
+    def get_properties_page(
+        self,
+        first: int,
+        after: Optional[str] = None,
+        zip_code: Optional[int] = None,
+        county: Optional[str] = None,
+        property_type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> Dict[str, list]:
+        conditions = self._property_conditions(
+            zip_code, county, property_type, min_price, max_price
+        )
+        return self._fetch_page("properties", "property_id", first, after, conditions)
+
+    def export_batches(
+        self,
+        table: str,
+        batch_rows: int = EXPORT_BATCH_ROWS,
+        zip_code: Optional[int] = None,
+        county: Optional[str] = None,
+        property_type: Optional[str] = None,
+        status: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> "pa.RecordBatchReader":
+        """
+        Streams the rows of an `EXPORT_TABLES` table matching the same filters as its paginated
+        GraphQL field, in key order, as Arrow record batches of up to `batch_rows` rows. The
+        batches come straight out of DuckDB's Arrow result, so nothing is materialized as
+        Python objects and only one batch is held at a time. Bypasses the query cache.
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(
+                f"table must be one of {sorted(EXPORT_TABLES)}, got {table!r}"
+            )
+        if table == "properties":
+            if status is not None:
+                raise ValueError("properties cannot be filtered by status")
+            conditions = self._property_conditions(
+                zip_code, county, property_type, min_price, max_price
+            )
+        else:
+            conditions = self._listing_conditions(
+                zip_code, county, property_type, status, min_price, max_price
+            )
+        where, params = _where(conditions)
+        query = f"SELECT * FROM {table}{where} ORDER BY {EXPORT_TABLES[table]}"
+        logger.debug("Exporting query: %s", query)
+        return self.conn.execute(query, params).fetch_record_batch(batch_rows)
+
+    def properties_in_bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        limit: Optional[int] = None,
+    ) -> Dict[str, list]:
+        """
+        Properties inside a bounding box, found through the `cell` spatial index (see
+        `rentradar.db.spatial`).
+        """
+        where, params = bbox_filter((min_lat, min_lon, max_lat, max_lon))
+        query = f"SELECT * FROM properties WHERE {where} ORDER BY property_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self.fetch_columns(query, params=params)
+
+    def _properties_near(
+        self, lat: float, lon: float, bbox: BBox, radius: float, limit: Optional[int]
+    ) -> Dict[str, list]:
+        where, params = bbox_filter(bbox)
+        query = (
+            f"SELECT * FROM (SELECT *, {DISTANCE_SQL} AS distance_km FROM properties "
+            f"WHERE {where}) WHERE distance_km <= ? ORDER BY distance_km, property_id"
+        )
+        params = [lat, lat, lon, *params, radius]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self.fetch_columns(query, params=params)
+
+    def properties_within(
+        self, lat: float, lon: float, radius: float, limit: Optional[int] = None
+    ) -> Dict[str, list]:
+        """
+        Properties within `radius` kilometers of a point, nearest first, with their distance in
+        a `distance_km` column.
+        """
+        return self._properties_near(
+            lat, lon, radius_bbox(lat, lon, radius), radius, limit
+        )
+
+    def nearest_properties(
+        self, lat: float, lon: float, k: int = 10, max_radius: float = 100.0
+    ) -> Dict[str, list]:
+        """
+        The `k` properties nearest to a point (within `max_radius` kilometers). The search
+        radius starts small and doubles until enough properties are found, so dense areas only
+        touch a handful of cells.
+        """
+        radius = 1.0
+        while True:
+            radius = min(radius, max_radius)
+            columns = self.properties_within(lat, lon, radius, limit=k)
+            if radius >= max_radius or len(columns["property_id"]) >= k:
+                return columns
+            radius *= 2
 
-    def get_property_by_id(self, property_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM properties WHERE property_id = ?"
-        return self.execute_query(query, params=(property_id,))
+    def get_map_tile(self, zoom: int, x: int, y: int) -> Dict[str, list]:
+        """
+        Property clusters for one map tile (see `rentradar.db.spatial`): the property count,
+        mean location and median rent and sale listing price of each of the tile's bins.
+        Results are cached per tile when the agent has a QueryCache.
+        """
+        bbox = tile_bbox(zoom, x, y)
+        where, params = bbox_filter(bbox)
+        bin_size = tile_size(zoom) / BINS_PER_TILE
+        query = MAP_TILE_QUERY.format(where=where)
+        params = [*params, bbox[2], bbox[3], bin_size, bin_size, str(zoom)]
+        return self.fetch_columns(query, params=params)
 
-    def get_property_features_by_property_id(self, property_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM property_features WHERE property_id = ?"
-        return self.execute_query(query, params=(property_id,))
+    def get_map_clusters(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int
+    ) -> Dict[str, list]:
+        """The clusters of every map tile in a viewport at `zoom`."""
+        columns: Dict[str, list] = {}
+        for x, y in viewport_tiles((min_lat, min_lon, max_lat, max_lon), zoom):
+            for name, values in self.get_map_tile(zoom, x, y).items():
+                columns.setdefault(name, []).extend(values)
+        return columns
 
-    def get_county_by_id(self, county_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM counties WHERE id = ?"
-        return self.execute_query(query, params=(county_id,))
+    def comps(
+        self, property_id: str, k: int = 10, kind: str = "rent"
+    ) -> Dict[str, list]:
+        """
+        The `k` rentals (kind "rent") or sale listings (kind "sale") most comparable to a
+        property by location, size, age and type, from the prebuilt comps index (see
+        `rentradar.model.comps`), with each comp's latest listing.
+        """
+        # imported here: the model layer builds on this module, and only this method needs it
+        from rentradar.model.comps import comps_index_path, get_comps_index
+
+        return get_comps_index(comps_index_path(self.db_path)).query(
+            property_id, k, kind
+        )
+
+    def get_property_by_id(self, property_id: str) -> Dict[str, list]:
+        return self.fetch_statement("property_by_id", (property_id,))
+
+    def get_property_features_by_property_id(self, property_id: str) -> Dict[str, list]:
+        return self.fetch_statement("property_features_by_property_id", (property_id,))
+
+    def get_property_features_by_property_ids(
+        self, property_ids: List[str]
+    ) -> Dict[str, list]:
+        return self.fetch_statement(
+            "property_features_by_property_ids", (list(property_ids),)
+        )
+
+    def get_rent_estimates_by_property_ids(
+        self, property_ids: List[str]
+    ) -> Dict[str, list]:
+        """
+        The precomputed fair rent estimates (see `rentradar.model`) of the given properties,
+        or no rows if the rent estimator has not been run on this database.
+        """
+        trained = self.conn.execute(
+            "SELECT 1 FROM duckdb_tables() WHERE table_name = 'rent_estimates'"
+        ).fetchone()
+        if not trained:
+            return {}
+        return self.fetch_statement(
+            "rent_estimates_by_property_ids", (list(property_ids),)
+        )
 
-    def get_all_counties(self) -> pd.DataFrame:
-        query = "SELECT * FROM counties"
-        return self.execute_query(query)
+    def get_county_by_id(self, county_id: str) -> Dict[str, list]:
+        return self.fetch_statement("county_by_id", (county_id,))
 
-    def get_market_stats_by_zip(self, zipcode: int) -> pd.DataFrame:
-        query = "SELECT * FROM current_market_stats WHERE zipCode = ?"
-        return self.execute_query(query, params=(zipcode,))
+    def get_all_counties(self) -> Dict[str, list]:
+        return self.fetch_statement("all_counties")
 
-    def get_market_stats_by_bedrooms(self, bedrooms: int) -> pd.DataFrame:
-        query = "SELECT * FROM current_market_stats WHERE bedrooms = ?"
-        return self.execute_query(query, params=(bedrooms,))
+    def get_market_stats_by_zip(self, zipcode: int) -> Dict[str, list]:
+        return self.fetch_statement("market_stats_by_zip", (zipcode,))
 
-    def get_historic_market_stats_by_zip(self, zip_code: int) -> pd.DataFrame:
-        query = "SELECT * FROM historic_market_stats WHERE zipCode = ?"
-        return self.execute_query(query, params=(zip_code,))
+    def get_market_stats_by_bedrooms(self, bedrooms: int) -> Dict[str, list]:
+        return self.fetch_statement("market_stats_by_bedrooms", (bedrooms,))
+
+    def get_historic_market_stats_by_zip(self, zip_code: int) -> Dict[str, list]:
+        return self.fetch_statement("historic_market_stats_by_zip", (zip_code,))
 
     def get_historic_market_stats_by_bedrooms(
         self, bedrooms: int, zip_code: int
-    ) -> pd.DataFrame:
-        query = "SELECT * FROM historic_market_stats WHERE bedrooms = ? AND zipCode = ?"
-        return self.execute_query(query, params=(bedrooms, zip_code))
+    ) -> Dict[str, list]:
+        return self.fetch_statement(
+            "historic_market_stats_by_bedrooms", (bedrooms, zip_code)
+        )
+
+    def get_market_trend(
+        self,
+        geography_type: str,
+        geography: str,
+        bedrooms: Optional[int] = None,
+        month: Optional[str] = None,
+    ) -> Dict[str, list]:
+        """
+        One row of the `market_trends` rollup (see `rentradar.db.rollups`) for a zip code,
+        county or "all", and a bedroom count (None for all bedrooms). Without a month
+        ("YYYY-MM"), returns the latest month.
+        """
+        query = (
+            "SELECT * FROM market_trends WHERE geography_type = ? AND geography = ? "
+            "AND bedrooms IS NOT DISTINCT FROM ?"
+        )
+        params = [geography_type, geography, bedrooms]
+        if month is not None:
+            query += " AND month = ?"
+            params.append(month)
+        return self.fetch_columns(query + " ORDER BY month DESC LIMIT 1", params=params)
+
+    def get_market_trends(
+        self,
+        geography_type: str,
+        geography: str,
+        bedrooms: Optional[int] = None,
+        since: Optional[str] = None,
+    ) -> Dict[str, list]:
+        """The monthly `market_trends` rows of a geography, oldest first."""
+        params = (geography_type, geography, bedrooms, since or "")
+        return self.fetch_statement("market_trends", params)
+
+    def get_long_term_rentals_by_property_id(self, property_id: str) -> Dict[str, list]:
+        return self.fetch_statement("long_term_rentals_by_property_id", (property_id,))
+
+    def get_long_term_rentals_by_property_ids(
+        self, property_ids: List[str]
+    ) -> Dict[str, list]:
+        return self.fetch_statement(
+            "long_term_rentals_by_property_ids", (list(property_ids),)
+        )
+
+    def get_all_long_term_rentals(self) -> Dict[str, list]:
+        return self.fetch_statement("all_long_term_rentals")
+
+    def get_long_term_rentals_page(
+        self,
+        first: int,
+        after: Optional[str] = None,
+        zip_code: Optional[int] = None,
+        county: Optional[str] = None,
+        property_type: Optional[str] = None,
+        status: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> Dict[str, list]:
+        conditions = self._listing_conditions(
+            zip_code, county, property_type, status, min_price, max_price
+        )
+        return self._fetch_page("long_term_rentals", "id", first, after, conditions)
 
-    def get_long_term_rentals_by_property_id(self, property_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM long_term_rentals WHERE property_id = ?"
-        return self.execute_query(query, params=(property_id,))
+    def get_owners_by_property_id(self, property_id: str) -> Dict[str, list]:
+        return self.fetch_statement("owners_by_property_id", (property_id,))
 
-    def get_all_long_term_rentals(self) -> pd.DataFrame:
-        query = "SELECT * FROM long_term_rentals"
-        return self.execute_query(query)
+    def get_owners_by_property_ids(self, property_ids: List[str]) -> Dict[str, list]:
+        return self.fetch_statement("owners_by_property_ids", (list(property_ids),))
 
-    def get_owners_by_property_id(self, property_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM property_owners WHERE property_id = ?"
-        return self.execute_query(query, params=(property_id,))
+    def get_properties_by_owner_id(self, owner_id: str) -> Dict[str, list]:
+        return self.fetch_statement("properties_by_owner_id", (owner_id,))
 
-    def get_properties_by_owner_id(self, owner_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM property_owners WHERE owner_id = ?"
-        return self.execute_query(query, params=(owner_id,))
+    def get_property_taxes_by_property_id(self, property_id: str) -> Dict[str, list]:
+        return self.fetch_statement("property_taxes_by_property_id", (property_id,))
 
-    def get_property_taxes_by_property_id(self, property_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM property_taxes WHERE property_id = ?"
-        return self.execute_query(query, params=(property_id,))
+    def get_property_taxes_by_property_ids(
+        self, property_ids: List[str]
+    ) -> Dict[str, list]:
+        return self.fetch_statement(
+            "property_taxes_by_property_ids", (list(property_ids),)
+        )
 
-    def get_property_taxes_by_year(self, year: str) -> pd.DataFrame:
-        query = "SELECT * FROM property_taxes WHERE year = ?"
-        return self.execute_query(query, params=(year,))
+    def get_property_taxes_by_year(self, year: str) -> Dict[str, list]:
+        return self.fetch_statement("property_taxes_by_year", (year,))
 
     def get_property_taxes_by_property_id_and_year(
         self, property_id: str, year: str
-    ) -> pd.DataFrame:
-        query = "SELECT * FROM property_taxes WHERE property_id = ? AND year = ?"
-        return self.execute_query(query, params=(property_id, year))
+    ) -> Dict[str, list]:
+        return self.fetch_statement(
+            "property_taxes_by_property_id_and_year", (property_id, year)
+        )
 
-    def get_property_type_by_id(self, type_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM property_types WHERE id = ?"
-        return self.execute_query(query, params=(type_id,))
+    def get_property_type_by_id(self, type_id: str) -> Dict[str, list]:
+        return self.fetch_statement("property_type_by_id", (type_id,))
 
-    def get_all_property_types(self) -> pd.DataFrame:
-        query = "SELECT * FROM property_types"
-        return self.execute_query(query)
+    def get_all_property_types(self) -> Dict[str, list]:
+        return self.fetch_statement("all_property_types")
 
-    def get_description_by_property_type(self, property_type: str) -> pd.DataFrame:
-        query = "SELECT description FROM property_types WHERE propertyType = ?"
-        return self.execute_query(query, params=(property_type,))
+    def get_description_by_property_type(self, property_type: str) -> Dict[str, list]:
+        return self.fetch_statement("description_by_property_type", (property_type,))
 
-    def get_sale_listings_by_property_id(self, property_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM sale_listings WHERE property_id = ?"
-        return self.execute_query(query, params=(property_id,))
+    def get_sale_listings_by_property_id(self, property_id: str) -> Dict[str, list]:
+        return self.fetch_statement("sale_listings_by_property_id", (property_id,))
 
-    def get_all_sale_listings(self) -> pd.DataFrame:
-        query = "SELECT * FROM sale_listings"
-        return self.execute_query(query)
+    def get_sale_listings_by_property_ids(
+        self, property_ids: List[str]
+    ) -> Dict[str, list]:
+        return self.fetch_statement(
+            "sale_listings_by_property_ids", (list(property_ids),)
+        )
 
-    def get_tax_assessments_by_property_id(self, property_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM tax_assessments WHERE property_id = ?"
-        return self.execute_query(query, params=(property_id,))
+    def get_all_sale_listings(self) -> Dict[str, list]:
+        return self.fetch_statement("all_sale_listings")
 
-    def get_tax_assessment_by_id(self, assessment_id: str) -> pd.DataFrame:
-        query = "SELECT * FROM tax_assessments WHERE assessment_id = ?"
-        return self.execute_query(query, params=(assessment_id,))
+    def get_sale_listings_page(
+        self,
+        first: int,
+        after: Optional[str] = None,
+        zip_code: Optional[int] = None,
+        county: Optional[str] = None,
+        property_type: Optional[str] = None,
+        status: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> Dict[str, list]:
+        conditions = self._listing_conditions(
+            zip_code, county, property_type, status, min_price, max_price
+        )
+        return self._fetch_page("sale_listings", "id", first, after, conditions)
+
+    def get_tax_assessments_by_property_id(self, property_id: str) -> Dict[str, list]:
+        return self.fetch_statement("tax_assessments_by_property_id", (property_id,))
+
+    def get_tax_assessments_by_property_ids(
+        self, property_ids: List[str]
+    ) -> Dict[str, list]:
+        return self.fetch_statement(
+            "tax_assessments_by_property_ids", (list(property_ids),)
+        )
+
+    def get_tax_assessment_by_id(self, assessment_id: str) -> Dict[str, list]:
+        return self.fetch_statement("tax_assessment_by_id", (assessment_id,))
 
     def get_tax_assessment_by_property_id_and_year(
         self, property_id: str, year: str
-    ) -> pd.DataFrame:
-        query = "SELECT * FROM tax_assessments WHERE property_id = ? AND year = ?"
-        return self.execute_query(query, params=(property_id, year))
+    ) -> Dict[str, list]:
+        return self.fetch_statement(
+            "tax_assessment_by_property_id_and_year", (property_id, year)
+        )
+
+
+class DuckDBConnectionPool:
+    """
+    Process-wide manager for a single DuckDB database handle shared across threads. Each thread
+    borrows its own cursor from the shared handle, so queries avoid reopening the database file
+    and concurrent readers don't contend for the file lock.
+
+    Async callers run agent methods on a bounded thread pool with `run`, so blocking DuckDB
+    work stays off the event loop and independent queries of one request overlap.
+
+    Attributes:
+        db_path (str): The path to the DuckDB database file.
+        read_only (bool): Whether the shared handle is opened in read-only mode.
+        cache (Optional[QueryCache]): Result cache shared by the agents the pool hands out.
+        max_workers (int): Threads `run` executes queries on, each with its own cursor.
+        conn (Optional[duckdb.DuckDBPyConnection]): The shared database handle, None until opened.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        read_only: bool = True,
+        cache: Optional[QueryCache] = None,
+        max_workers: int = 4,
+    ) -> None:
+        self.db_path = db_path
+        self.read_only = read_only
+        self.cache = cache
+        self.max_workers = max_workers
+        self.conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cursors: list = []
+        self._generation = 0
+
+    def open(self) -> None:
+        """
+        Opens the shared database handle. Safe to call more than once.
+        """
+        with self._lock:
+            self._connection()
+
+    def _connection(self) -> duckdb.DuckDBPyConnection:
+        """
+        The shared database handle, opened if needed. Must be called with `_lock` held, so a
+        concurrent `close` can't reset it in between.
+        """
+        if self.conn is not None:
+            return self.conn
+        try:
+            self.conn = duckdb.connect(database=self.db_path, read_only=self.read_only)
+            self._generation += 1
+            logger.info("Opened DuckDB connection pool at %s", self.db_path)
+        except Exception as e:
+            logger.error("Failed to open DuckDB connection pool: %s", e)
+            raise
+        return self.conn
+
+    def close(self) -> None:
+        """
+        Closes every cursor handed out by the pool and then the shared database handle.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._lock:
+            for cursor in self._cursors:
+                cursor.close()
+            self._cursors.clear()
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+                logger.info("DuckDB connection pool closed.")
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Returns the calling thread's cursor, creating it on first use.
+        """
+        cursor = getattr(self._local, "cursor", None)
+        if (
+            cursor is None
+            or self.conn is None
+            or self._local.generation != self._generation
+        ):
+            with self._lock:
+                cursor = self._connection().cursor()
+                self._cursors.append(cursor)
+                generation = self._generation
+            self._local.cursor = cursor
+            self._local.generation = generation
+        return cursor
+
+    @contextmanager
+    def agent(self, own_cursor: bool = False) -> Iterator[RentRadarQueryAgent]:
+        """
+        Yields a RentRadarQueryAgent bound to the calling thread's cursor. With `own_cursor`,
+        the agent gets a cursor of its own instead, closed on exit, for work that spans several
+        threads, such as a streamed export consumed from a thread pool.
+        """
+        if not own_cursor:
+            yield RentRadarQueryAgent(
+                self.db_path,
+                read_only=self.read_only,
+                conn=self.cursor(),
+                cache=self.cache,
+            )
+            return
+        with self._lock:
+            cursor = self._connection().cursor()
+        try:
+            yield RentRadarQueryAgent(
+                self.db_path, read_only=self.read_only, conn=cursor, cache=self.cache
+            )
+        finally:
+            cursor.close()
+
+    def _call(self, method: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        with self.agent() as agent:
+            return method(agent, *args, **kwargs)
+
+    async def run(self, method: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Calls `method(agent, *args, **kwargs)` on one of the pool's threads, with an agent on
+        that thread's cursor, and awaits the result. The call runs in a copy of the caller's
+        context, so a request's time budget (see `timeout.py`) follows it.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="duckdb"
+                    )
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, context.run, self._call, method, args, kwargs
+        )
+
+    def __enter__(self) -> "DuckDBConnectionPool":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
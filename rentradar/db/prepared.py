@@ -0,0 +1,100 @@
+"""
+Named prepared statements.
+
+DuckDB binds and optimizes every statement it is handed, which costs more than executing a
+point lookup. Statements registered here are prepared once per connection with
+`PREPARE name AS ...` and then run with `EXECUTE name(...)`, which skips both. DuckDB rebinds a
+prepared statement by itself when a table it reads from is replaced.
+
+DuckDB cannot bind parameters to an `EXECUTE`, so arguments are passed as SQL literals;
+`sql_literal` only renders values whose literal form is unambiguous (None, bools, numbers,
+strings and lists of those) and anything else goes through a regular parameterized query.
+"""
+
+import math
+import re
+import threading
+import weakref
+from numbers import Integral, Real
+from typing import Dict, Iterable, Optional, Sequence, Set
+
+import duckdb
+
+_PLACEHOLDER = re.compile(r"\?")
+
+
+def sql_literal(value) -> str:
+    """
+    The SQL literal of a parameter value. Raises TypeError for values without one.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, Integral):
+        return str(int(value))
+    if isinstance(value, Real):
+        value = float(value)
+        if math.isfinite(value):
+            return repr(value)
+        return f"'{value}'::DOUBLE"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(sql_literal(item) for item in value) + "]"
+    raise TypeError(f"No SQL literal for {type(value).__name__}")
+
+
+class StatementRegistry:
+    """
+    A set of named SQL statements with `?` placeholders, prepared lazily on each connection
+    that executes them.
+    """
+
+    def __init__(self, statements: Optional[Dict[str, str]] = None) -> None:
+        self._statements: Dict[str, str] = {}
+        self._prepared: "weakref.WeakKeyDictionary[duckdb.DuckDBPyConnection, Set[str]]"
+        self._prepared = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        for name, sql in (statements or {}).items():
+            self.register(name, sql)
+
+    def register(self, name: str, sql: str) -> str:
+        if not name.isidentifier():
+            raise ValueError(f"Statement names must be identifiers, got {name!r}")
+        if self._statements.get(name, sql) != sql:
+            raise ValueError(f"A different statement is registered as {name!r}")
+        self._statements[name] = sql
+        return name
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._statements
+
+    def __iter__(self) -> Iterable[str]:
+        return iter(self._statements)
+
+    def sql(self, name: str) -> str:
+        return self._statements[name]
+
+    def _prepare(self, conn: duckdb.DuckDBPyConnection, name: str) -> None:
+        with self._lock:
+            prepared = self._prepared.setdefault(conn, set())
+            if name in prepared:
+                return
+            count = iter(range(1, 1_000_000))
+            sql = _PLACEHOLDER.sub(lambda _: f"${next(count)}", self._statements[name])
+            conn.execute(f"PREPARE {name} AS {sql}")
+            prepared.add(name)
+
+    def execute(
+        self, conn: duckdb.DuckDBPyConnection, name: str, params: Sequence = ()
+    ) -> duckdb.DuckDBPyConnection:
+        """Runs a registered statement on `conn`, preparing it there first if needed."""
+        try:
+            arguments = ", ".join(sql_literal(value) for value in params)
+        except TypeError:
+            return conn.execute(self._statements[name], list(params))
+        self._prepare(conn, name)
+        return conn.execute(
+            f"EXECUTE {name}({arguments})" if params else f"EXECUTE {name}"
+        )
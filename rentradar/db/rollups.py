@@ -0,0 +1,268 @@
+"""
+Materialized market rollups.
+
+`market_trends` holds one row per geography (zip code, county or the whole database), bedroom
+count (NULL for all bedrooms) and month, with the median rent and sale listing price of the
+listings in that month, the rent-to-price ratio, RentCast's listing-weighted average rent
+(`historic_market_stats`) and the year-over-year change of each.
+
+Only months whose source rows changed are recomputed (together with the months 12 months
+later, whose YoY change depends on them). Changes are detected with per-month fingerprints of
+the source tables, stored in `rollup_state`; a change to `properties` or `property_features`
+(zip code, county or bedroom assignments) triggers a full rebuild.
+
+Usage:
+    python -m rentradar.db.rollups --db rentradar/db/rentradar.db [--full]
+"""
+
+import argparse
+import logging
+from datetime import date
+from typing import List, Set
+
+import pandas as pd
+
+from rentradar.db.duckdb import DuckDBManager
+
+logger = logging.getLogger(__name__)
+
+MARKET_TRENDS_TABLE = "market_trends"
+ROLLUP_STATE_TABLE = "rollup_state"
+
+ALL_MONTHS = "*"
+
+
+def listing_month(column: str) -> str:
+    """
+    SQL for the `YYYY-MM` month of a listing date, whether the column holds ISO strings (as
+    loaded from RentCast) or timestamps (as inferred by `read_csv_auto`).
+    """
+    return f"strftime(CAST({column} AS TIMESTAMP), '%Y-%m')"
+
+
+# per-month fingerprints of the rows each source contributes; "*" covers the whole table
+FINGERPRINTS = {
+    "long_term_rentals": (
+        listing_month("listedDate"),
+        "hash(property_id, price, listedDate)",
+    ),
+    "sale_listings": (
+        listing_month("listedDate"),
+        "hash(property_id, price, listedDate)",
+    ),
+    "historic_market_stats": (
+        "date",
+        "hash(zipCode, bedrooms, averageRent, totalListings)",
+    ),
+    "properties": (f"'{ALL_MONTHS}'", "hash(property_id, zipCode, county)"),
+    "property_features": (f"'{ALL_MONTHS}'", "hash(property_id, bedrooms)"),
+}
+
+LISTING_SOURCES = {"long_term_rentals": "rent", "sale_listings": "sale"}
+
+
+def _shift_month(month: str, months: int) -> str:
+    year, mon = divmod(int(month[:4]) * 12 + int(month[5:7]) - 1 + months, 12)
+    return f"{year:04d}-{mon + 1:02d}"
+
+
+def _base_query(tables: Set[str]) -> str:
+    """
+    One row per listing or RentCast stat, tagged with its kind, zip code, county, bedrooms and
+    month. Sources missing from the database are left out.
+    """
+    bedrooms = (
+        "CAST(f.bedrooms AS INTEGER)"
+        if "property_features" in tables
+        else "NULL::INTEGER"
+    )
+    features = (
+        "LEFT JOIN property_features f USING (property_id)"
+        if "property_features" in tables
+        else ""
+    )
+    parts = []
+    for table, kind in LISTING_SOURCES.items():
+        if table in tables:
+            parts.append(
+                f"""
+                SELECT '{kind}' AS kind, CAST(p.zipCode AS VARCHAR) AS zip, p.county,
+                    {bedrooms} AS bedrooms, {listing_month("l.listedDate")} AS month,
+                    CAST(l.price AS DOUBLE) AS value, 1 AS weight
+                FROM {table} l JOIN properties p USING (property_id) {features}
+                """
+            )
+    if "historic_market_stats" in tables:
+        parts.append(
+            """
+            SELECT 'market' AS kind, CAST(m.zipCode AS VARCHAR) AS zip, z.county,
+                CAST(m.bedrooms AS INTEGER) AS bedrooms, m.date AS month,
+                CAST(m.averageRent AS DOUBLE) AS value, m.totalListings AS weight
+            FROM historic_market_stats m LEFT JOIN (
+                SELECT zipCode, mode(county) AS county FROM properties GROUP BY zipCode
+            ) z USING (zipCode)
+            """
+        )
+    return " UNION ALL ".join(parts)
+
+
+def market_trends_query(tables: Set[str], months_filter: bool) -> str:
+    """
+    The query computing `market_trends`. With `months_filter`, only the months in the temporary
+    table `__affected_months` are computed, reading just those months and the year before.
+    """
+    base = f"SELECT * FROM ({_base_query(tables)})"
+    if months_filter:
+        base += (
+            " WHERE month IN (SELECT month FROM __affected_months)"
+            " OR month IN (SELECT prior FROM __affected_months)"
+        )
+    trends = """
+    WITH base AS ({base}),
+    rollup AS (
+        SELECT
+            CASE
+                WHEN grouping(zip) = 0 THEN 'zip'
+                WHEN grouping(county) = 0 THEN 'county'
+                ELSE 'all'
+            END AS geography_type,
+            CASE
+                WHEN grouping(zip) = 0 THEN zip
+                WHEN grouping(county) = 0 THEN county
+                ELSE 'all'
+            END AS geography,
+            bedrooms,
+            month,
+            count(*) FILTER (WHERE kind = 'rent') AS rentals,
+            median(value) FILTER (WHERE kind = 'rent') AS median_rent,
+            count(*) FILTER (WHERE kind = 'sale') AS sales,
+            median(value) FILTER (WHERE kind = 'sale') AS median_price,
+            sum(value * weight) FILTER (WHERE kind = 'market')
+                / nullif(sum(weight) FILTER (WHERE kind = 'market'), 0) AS market_rent
+        FROM base
+        WHERE month IS NOT NULL
+        GROUP BY GROUPING SETS (
+            (zip, bedrooms, month), (zip, month),
+            (county, bedrooms, month), (county, month),
+            (bedrooms, month), (month)
+        )
+        -- unknown zip codes, counties and bedroom counts only count towards the totals
+        HAVING NOT (grouping(zip) = 0 AND zip IS NULL)
+            AND NOT (grouping(county) = 0 AND county IS NULL)
+            AND NOT (grouping(bedrooms) = 0 AND bedrooms IS NULL)
+    )
+    SELECT
+        cur.*,
+        cur.median_rent * 12 / nullif(cur.median_price, 0) AS rent_to_price,
+        cur.median_rent / nullif(prev.median_rent, 0) - 1 AS median_rent_yoy,
+        cur.median_price / nullif(prev.median_price, 0) - 1 AS median_price_yoy,
+        cur.market_rent / nullif(prev.market_rent, 0) - 1 AS market_rent_yoy
+    FROM rollup cur
+    LEFT JOIN rollup prev
+        ON prev.geography_type = cur.geography_type
+        AND prev.geography = cur.geography
+        AND prev.bedrooms IS NOT DISTINCT FROM cur.bedrooms
+        AND prev.month = strftime(strptime(cur.month || '-01', '%Y-%m-%d')
+            - INTERVAL 12 MONTH, '%Y-%m')
+    """.format(
+        base=base
+    )
+    if months_filter:
+        trends += " WHERE cur.month IN (SELECT month FROM __affected_months)"
+    return (
+        trends + " ORDER BY cur.geography_type, cur.geography, cur.bedrooms, cur.month"
+    )
+
+
+def source_fingerprints(db: DuckDBManager, tables: Set[str]) -> pd.DataFrame:
+    parts = [
+        f"SELECT '{table}' AS source, {month} AS month, "
+        f"count(*) || ':' || sum({row_hash}) AS fingerprint "
+        f"FROM {table} GROUP BY ALL"
+        for table, (month, row_hash) in FINGERPRINTS.items()
+        if table in tables
+    ]
+    return db.conn.execute(" UNION ALL ".join(parts)).df()
+
+
+def _changed_months(current: pd.DataFrame, stored: pd.DataFrame) -> Set[str]:
+    merged = current.merge(
+        stored, on=["source", "month"], how="outer", suffixes=("", "_stored")
+    )
+    changed = merged[merged["fingerprint"] != merged["fingerprint_stored"]]
+    return set(changed["month"].dropna())
+
+
+def refresh_market_trends(db: DuckDBManager, full: bool = False) -> List[str]:
+    """
+    Brings `market_trends` up to date with its source tables, recomputing only the months
+    that changed since the last refresh unless `full` is set. Returns the months recomputed.
+    """
+    tables = set(db.list_tables()["name"])
+    if "properties" not in tables or not tables & {
+        *LISTING_SOURCES,
+        "historic_market_stats",
+    }:
+        logger.info("No market data to roll up")
+        return []
+
+    current = source_fingerprints(db, tables)
+    months = set(current["month"].dropna()) - {ALL_MONTHS}
+    if ROLLUP_STATE_TABLE in tables and MARKET_TRENDS_TABLE in tables and not full:
+        stored = db.conn.execute(f"SELECT * FROM {ROLLUP_STATE_TABLE}").df()
+        changed = _changed_months(current, stored)
+        full = ALL_MONTHS in changed
+    else:
+        full = True
+
+    if full:
+        db.table_from_query(market_trends_query(tables, False), MARKET_TRENDS_TABLE)
+        affected = sorted(months)
+    else:
+        affected = sorted(changed | {_shift_month(month, 12) for month in changed})
+        affected = [month for month in affected if month <= max(months, default="")]
+        if affected:
+            db.conn.execute(
+                "CREATE OR REPLACE TEMP TABLE __affected_months AS "
+                "SELECT month, strftime(strptime(month || '-01', '%Y-%m-%d') "
+                "- INTERVAL 12 MONTH, '%Y-%m') AS prior FROM (SELECT UNNEST(?) AS month)",
+                [affected],
+            )
+            db.conn.execute(
+                "CREATE OR REPLACE TEMP TABLE __market_trends AS "
+                + market_trends_query(tables, True)
+            )
+            # months left without any source rows are not replaced by the upsert
+            vanished = [month for month in affected if month not in months]
+            if vanished:
+                db.conn.execute(
+                    f"DELETE FROM {MARKET_TRENDS_TABLE} WHERE month IN (SELECT UNNEST(?))",
+                    [vanished],
+                )
+            db.table_from_query(
+                "SELECT * FROM __market_trends",
+                MARKET_TRENDS_TABLE,
+                mode="upsert",
+                key="month",
+            )
+            db.conn.execute("DROP TABLE __market_trends")
+            db.conn.execute("DROP TABLE __affected_months")
+
+    db.table_from_dataframe(current, ROLLUP_STATE_TABLE)
+    logger.info("Refreshed %s months of '%s'", len(affected), MARKET_TRENDS_TABLE)
+    return affected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default="rentradar/db/rentradar.db")
+    parser.add_argument("--full", action="store_true", help="Rebuild every month")
+    args = parser.parse_args()
+
+    with DuckDBManager(args.db) as db:
+        months = refresh_market_trends(db, full=args.full)
+    print(f"Refreshed {len(months)} months ({date.today().isoformat()})")
+
+
+if __name__ == "__main__":
+    main()
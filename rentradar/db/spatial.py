@@ -0,0 +1,196 @@
+"""
+Grid-cell spatial index for the `properties` table.
+
+Locations are bucketed into cells of `CELL_SIZE` degrees, numbered row by row
+(`lat_row * GRID_COLUMNS + lon_column`), and `properties` is stored sorted by cell. A bounding
+box then maps onto one contiguous range of cell ids per grid row, which DuckDB answers from its
+per-row-group min/max statistics without scanning the rest of the table.
+
+Map aggregates are served per tile: at zoom level z the world is split into square tiles of
+`360 / 2**z` degrees (an equirectangular version of the usual slippy-map tiles), and each tile
+is binned into `BINS_PER_TILE` x `BINS_PER_TILE` clusters.
+
+Usage:
+    python -m rentradar.db.spatial --db rentradar/db/rentradar.db
+"""
+
+import argparse
+import math
+from typing import TYPE_CHECKING, List, Tuple
+
+if TYPE_CHECKING:
+    from rentradar.db.duckdb import DuckDBManager
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+CELL_SIZE = 0.01
+GRID_COLUMNS = math.ceil(360 / CELL_SIZE)
+MAX_CELL_RANGES = 64
+
+BINS_PER_TILE = 8
+MAX_ZOOM = 20
+MAX_VIEWPORT_TILES = 64
+
+CELL_SQL = (
+    f"CAST(floor((latitude + 90) / {CELL_SIZE}) AS BIGINT) * {GRID_COLUMNS}"
+    f" + CAST(floor((longitude + 180) / {CELL_SIZE}) AS BIGINT)"
+)
+
+# great-circle distance in km from (?, ?) = (latitude, longitude) to each row
+DISTANCE_SQL = (
+    f"2 * {EARTH_RADIUS_KM} * asin(sqrt("
+    "pow(sin(radians(latitude - ?) / 2), 2)"
+    " + cos(radians(?)) * cos(radians(latitude))"
+    " * pow(sin(radians(longitude - ?) / 2), 2)))"
+)
+
+# clusters of one map tile: the properties in its bounding box (`{where}`, plus the exclusive
+# upper bounds) binned into `BINS_PER_TILE` x `BINS_PER_TILE` cells, with median rent and price
+MAP_TILE_QUERY = """
+WITH points AS (
+    SELECT property_id, latitude, longitude FROM properties
+    WHERE {where} AND latitude < ? AND longitude < ?
+),
+rents AS (
+    SELECT property_id, median(price) AS rent FROM long_term_rentals
+    WHERE property_id IN (SELECT property_id FROM points) GROUP BY property_id
+),
+prices AS (
+    SELECT property_id, median(price) AS price FROM sale_listings
+    WHERE property_id IN (SELECT property_id FROM points) GROUP BY property_id
+),
+bins AS (
+    SELECT
+        CAST(floor((latitude + 90) / ?) AS BIGINT) AS bin_row,
+        CAST(floor((longitude + 180) / ?) AS BIGINT) AS bin_col,
+        count(*) AS count,
+        avg(latitude) AS latitude,
+        avg(longitude) AS longitude,
+        median(rent) AS medianRent,
+        median(price) AS medianPrice
+    FROM points LEFT JOIN rents USING (property_id) LEFT JOIN prices USING (property_id)
+    GROUP BY ALL
+)
+SELECT ? || '/' || bin_row || '/' || bin_col AS id, * FROM bins ORDER BY bin_row, bin_col
+"""
+
+BBox = Tuple[float, float, float, float]
+
+
+def cell_id(latitude: float, longitude: float) -> int:
+    """The grid cell containing a point, matching `CELL_SQL`."""
+    row = math.floor((latitude + 90) / CELL_SIZE)
+    return row * GRID_COLUMNS + math.floor((longitude + 180) / CELL_SIZE)
+
+
+def cell_ranges(bbox: BBox) -> List[Tuple[int, int]]:
+    """
+    The (first, last) cell id ranges covering a bounding box, one per grid row. Boxes spanning
+    more than `MAX_CELL_RANGES` rows are covered by a single range instead; the caller's
+    latitude/longitude filter keeps the result exact either way.
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    first, last = cell_id(min_lat, min_lon), cell_id(max_lat, max_lon)
+    first_row, last_row = first // GRID_COLUMNS, last // GRID_COLUMNS
+    if last_row - first_row >= MAX_CELL_RANGES:
+        return [(first, last)]
+    first_col, last_col = first % GRID_COLUMNS, last % GRID_COLUMNS
+    return [
+        (row * GRID_COLUMNS + first_col, row * GRID_COLUMNS + last_col)
+        for row in range(first_row, last_row + 1)
+    ]
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> BBox:
+    """The bounding box of a circle of `radius_km` around a point."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lon_delta = radius_km / (
+        KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6)
+    )
+    return (
+        max(latitude - lat_delta, -90.0),
+        max(longitude - lon_delta, -180.0),
+        min(latitude + lat_delta, 90.0),
+        min(longitude + lon_delta, 180.0),
+    )
+
+
+def bbox_filter(bbox: BBox) -> Tuple[str, list]:
+    """A WHERE clause (and its parameters) selecting the rows inside a bounding box."""
+    ranges = cell_ranges(bbox)
+    cells = " OR ".join("cell BETWEEN ? AND ?" for _ in ranges)
+    min_lat, min_lon, max_lat, max_lon = bbox
+    clause = f"({cells}) AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?"
+    params = [cell for cell_range in ranges for cell in cell_range]
+    return clause, params + [min_lat, max_lat, min_lon, max_lon]
+
+
+def tile_size(zoom: int) -> float:
+    """The width and height of a map tile at `zoom`, in degrees."""
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError(f"zoom must be between 0 and {MAX_ZOOM}, got {zoom}")
+    return 360 / 2**zoom
+
+
+def tile_bbox(zoom: int, x: int, y: int) -> BBox:
+    """
+    The bounding box of tile (x, y) at `zoom`, where x counts tiles east from -180 longitude
+    and y counts tiles north from -90 latitude.
+    """
+    size = tile_size(zoom)
+    return (
+        y * size - 90,
+        x * size - 180,
+        min((y + 1) * size - 90, 90.0),
+        min((x + 1) * size - 180, 180.0),
+    )
+
+
+def viewport_tiles(bbox: BBox, zoom: int) -> List[Tuple[int, int]]:
+    """The (x, y) tiles covering a viewport at `zoom`."""
+    size = tile_size(zoom)
+    min_lat, min_lon, max_lat, max_lon = bbox
+    xs = range(
+        math.floor((max(min_lon, -180) + 180) / size),
+        math.floor((min(max_lon, 180) + 180) / size) + 1,
+    )
+    ys = range(
+        math.floor((max(min_lat, -90) + 90) / size),
+        math.floor((min(max_lat, 90) + 90) / size) + 1,
+    )
+    if len(xs) * len(ys) > MAX_VIEWPORT_TILES:
+        raise ValueError(
+            f"The viewport covers {len(xs) * len(ys)} tiles at zoom {zoom}; "
+            f"zoom out to stay within {MAX_VIEWPORT_TILES}"
+        )
+    return [(x, y) for y in ys for x in xs]
+
+
+def build_spatial_index(db: "DuckDBManager", table_name: str = "properties") -> None:
+    """
+    Adds (or refreshes) the `cell` column of `table_name` and rewrites the table sorted by it.
+    Run it again whenever properties are loaded other than through `RentCastData.seed`.
+    """
+    columns = db.get_table_schema(table_name)["name"].tolist()
+    select = "* EXCLUDE (cell)" if "cell" in columns else "*"
+    db.table_from_query(
+        f"SELECT {select}, {CELL_SQL} AS cell FROM {table_name} ORDER BY cell, property_id",
+        table_name,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default="rentradar/db/rentradar.db")
+    parser.add_argument("--table", default="properties")
+    args = parser.parse_args()
+
+    from rentradar.db.duckdb import DuckDBManager
+
+    with DuckDBManager(args.db) as db:
+        build_spatial_index(db, args.table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Time budgets for DuckDB queries.
+
+`time_budget(seconds)` sets a deadline for every query run in the current context (a request,
+including the tasks and threads it hands work to with a copy of its context). Queries run under
+`deadline_guard(conn)` are registered with a single watchdog thread, which calls
+`conn.interrupt()` on any still running at the deadline; DuckDB then aborts the query and the
+guard raises `QueryTimeoutError`. Outside a budget the guard does nothing.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import duckdb
+
+_deadline: ContextVar[Optional[float]] = ContextVar("query_deadline", default=None)
+
+
+class QueryTimeoutError(TimeoutError):
+    """A query was interrupted because its time budget ran out."""
+
+
+class _Watchdog:
+    """Interrupts connections whose registered deadline passes before they are released."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int]] = []
+        self._watched: Dict[int, duckdb.DuckDBPyConnection] = {}
+        self._ids = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, conn: duckdb.DuckDBPyConnection, deadline: float) -> int:
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="duckdb-watchdog", daemon=True
+                )
+                self._thread.start()
+            handle = next(self._ids)
+            self._watched[handle] = conn
+            heapq.heappush(self._heap, (deadline, handle))
+            if self._heap[0][1] == handle:
+                self._condition.notify()
+            return handle
+
+    def release(self, handle: int) -> None:
+        with self._condition:
+            self._watched.pop(handle, None)
+
+    def _run(self) -> None:
+        with self._condition:
+            while True:
+                # released entries are dropped lazily, when they reach the top of the heap
+                while self._heap and self._heap[0][1] not in self._watched:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                deadline, handle = self._heap[0]
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+                self._watched.pop(handle).interrupt()
+
+
+_watchdog = _Watchdog()
+
+
+@contextmanager
+def time_budget(seconds: Optional[float]) -> Iterator[None]:
+    """Gives the queries run in this context `seconds` in total; None means no limit."""
+    if seconds is None:
+        yield
+        return
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def deadline_guard(conn: duckdb.DuckDBPyConnection) -> Iterator[None]:
+    """
+    Interrupts the query run on `conn` inside the block if it outlasts the current time budget,
+    raising `QueryTimeoutError`.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        yield
+        return
+    if time.monotonic() >= deadline:
+        raise QueryTimeoutError("Query time budget exceeded")
+    handle = _watchdog.watch(conn, deadline)
+    try:
+        yield
+    except duckdb.InterruptException:
+        raise QueryTimeoutError("Query time budget exceeded") from None
+    finally:
+        _watchdog.release(handle)
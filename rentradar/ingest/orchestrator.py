@@ -0,0 +1,314 @@
+"""
+Fetches RentCast data for many metros in parallel into a Hive-partitioned Parquet dataset and
+loads it into DuckDB.
+
+Usage:
+    python -m rentradar.ingest.orchestrator --metros metros.txt --root data/lake \
+        --db rentradar/db/rentradar.db
+
+`metros.txt` lists one "City, ST" per line. Re-running with the same `--date` resumes the run,
+skipping jobs the manifest records as done.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List
+
+import pandas as pd
+
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.ingest.rentcast_client import RentCastAPIClient, RentCastEndpoints
+from rentradar.ingest.sinks import ParquetSink
+from rentradar.process.process_rentcast_data import RentCastData
+
+logger = logging.getLogger(__name__)
+
+LISTING_DATASETS = {
+    "/properties": "properties",
+    "/listings/rental/long-term": "long_term_rentals",
+    "/listings/sale": "sale_listings",
+}
+
+MARKETS = "markets"
+MARKET_DATASETS = ("current_market_stats", "historical_market_stats")
+
+
+@dataclass(frozen=True)
+class Metro:
+    city: str
+    state: str
+
+    @classmethod
+    def parse(cls, value: str) -> "Metro":
+        """Parses "City, ST"."""
+        city, _, state = value.rpartition(",")
+        if not city.strip() or not state.strip():
+            raise ValueError(f"Expected 'City, ST', got {value!r}")
+        return cls(city.strip(), state.strip().upper())
+
+    @property
+    def query_params(self) -> Dict[str, str]:
+        return {"city": self.city, "state": self.state}
+
+
+class IngestManifest:
+    """
+    JSON record of every ingest job and its status (running, done or failed), rewritten
+    atomically after each change so a crashed run can be resumed from where it stopped.
+
+    Attributes:
+        path (str): The manifest file.
+        jobs (Dict[str, dict]): Job key to its status, row count, output files and error.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self.jobs: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.jobs = json.load(f)["jobs"]
+
+    def is_done(self, key: str) -> bool:
+        return self.jobs.get(key, {}).get("status") == "done"
+
+    def update(self, key: str, **fields) -> None:
+        with self._lock:
+            job = self.jobs.setdefault(key, {})
+            job.update(fields, updated_at=datetime.now().isoformat(timespec="seconds"))
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"jobs": self.jobs}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+@dataclass
+class IngestOrchestrator:
+    """
+    Runs the listing endpoints (`/properties`, `/listings/sale`, `/listings/rental/long-term`)
+    for every metro on a pool of `workers` threads, followed by `/markets` once a metro's
+    properties (and so its zip codes) are in. Each result is written to
+    `<root>/state=<ST>/city=<City>/endpoint=<dataset>/date=<run_date>/part-0.parquet`, so the
+    dataset can also be queried directly with DuckDB or pyarrow.
+
+    All jobs share one `RentCastAPIClient`, so its rate limit applies to the run as a whole.
+
+    Attributes:
+        api_key (str): The RentCast API key.
+        root (str): The root directory of the partitioned dataset and its manifest.
+        metros (List[Metro]): The metros to fetch.
+        run_date (str): The `date` partition written, as YYYY-MM-DD. Reusing a date resumes
+            that run.
+        workers (int): The number of jobs run at once.
+        limit (int): The page size for listing endpoints.
+        history_range (int): Months of market history to request.
+        client_options (Dict): Extra options for the shared `RentCastAPIClient`.
+    """
+
+    api_key: str = field(repr=False)
+    root: str
+    metros: List[Metro]
+    run_date: str = field(default_factory=lambda: date.today().isoformat())
+    workers: int = 8
+    limit: int = 500
+    history_range: int = 36
+    client_options: Dict = field(default_factory=dict)
+    manifest: IngestManifest = field(init=False, repr=False)
+
+    def __post_init__(self):
+        date.fromisoformat(self.run_date)
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest = IngestManifest(os.path.join(self.root, "_manifest.json"))
+
+    def job_key(self, metro: Metro, dataset: str) -> str:
+        return f"{self.run_date}/{metro.state}/{metro.city}/{dataset}"
+
+    def partition_path(self, metro: Metro, dataset: str) -> str:
+        return os.path.join(
+            self.root,
+            f"state={metro.state}",
+            f"city={metro.city}",
+            f"endpoint={dataset}",
+            f"date={self.run_date}",
+            "part-0.parquet",
+        )
+
+    def _write_pages(self, path: str, pages: Iterable[List[Dict]]) -> int:
+        """
+        Streams pages into a temporary file that replaces `path` only once complete, so readers
+        never see a partial partition.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with ParquetSink(tmp_path) as sink:
+            rows = sink.write_pages(pages)
+        if rows:
+            os.replace(tmp_path, path)
+        return rows
+
+    def _fetch_listings(
+        self, client: RentCastAPIClient, metro: Metro, endpoint: RentCastEndpoints
+    ) -> Dict:
+        path = self.partition_path(metro, LISTING_DATASETS[endpoint])
+        pages = client.iter_pages(endpoint, metro.query_params, self.limit)
+        rows = self._write_pages(path, pages)
+        return {"rows": rows, "files": [path] if rows else []}
+
+    def _fetch_markets(self, client: RentCastAPIClient, metro: Metro) -> Dict:
+        properties = self.partition_path(metro, "properties")
+        if not os.path.exists(properties):
+            return {"rows": 0, "files": []}
+        zip_codes = pd.read_parquet(properties, columns=["zipCode"])["zipCode"].dropna()
+        if pd.api.types.is_numeric_dtype(zip_codes):
+            zip_codes = zip_codes.astype(int)
+        # zip codes are strings: 02134 is not 2134
+        query_params = {
+            "zipCodes": zip_codes.astype(str).str.zfill(5).unique().tolist(),
+            "historyRange": self.history_range,
+        }
+        frames = client.process_markets_endpoint("/markets", query_params)
+
+        rows, files = 0, []
+        for dataset, df in zip(MARKET_DATASETS, frames):
+            path = self.partition_path(metro, dataset)
+            written = self._write_pages(path, [df.to_dict("records")])
+            rows += written
+            files += [path] if written else []
+        return {"rows": rows, "files": files}
+
+    def _run_job(self, key: str, fetch: Callable[..., Dict], *args) -> bool:
+        self.manifest.update(key, status="running", error=None)
+        try:
+            result = fetch(*args)
+        except Exception as e:
+            logger.exception("Ingest job %s failed", key)
+            self.manifest.update(key, status="failed", error=repr(e))
+            return False
+        self.manifest.update(key, status="done", **result)
+        logger.info("Ingest job %s wrote %s rows", key, result["rows"])
+        return True
+
+    def run(self) -> Dict[str, dict]:
+        """
+        Runs every job not already done for `run_date`. Returns this run's manifest entries.
+        """
+        options = {
+            "pool_size": self.workers * self.client_options.get("max_workers", 4),
+            **self.client_options,
+        }
+        client = RentCastAPIClient(api_key=self.api_key, **options)
+        futures = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            def submit(metro: Metro, dataset: str, fetch: Callable, *args) -> None:
+                key = self.job_key(metro, dataset)
+                if self.manifest.is_done(key):
+                    return
+                future = executor.submit(
+                    self._run_job, key, fetch, client, metro, *args
+                )
+                futures[future] = (metro, dataset)
+
+            for metro in self.metros:
+                for endpoint, dataset in LISTING_DATASETS.items():
+                    submit(metro, dataset, self._fetch_listings, endpoint)
+                if self.manifest.is_done(self.job_key(metro, "properties")):
+                    submit(metro, MARKETS, self._fetch_markets)
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    metro, dataset = futures.pop(future)
+                    if future.result() and dataset == "properties":
+                        submit(metro, MARKETS, self._fetch_markets)
+
+        client.close()
+        jobs = {
+            key: job
+            for key, job in self.manifest.jobs.items()
+            if key.startswith(f"{self.run_date}/")
+        }
+        failed = [key for key, job in jobs.items() if job["status"] != "done"]
+        if failed:
+            logger.warning("%s ingest jobs did not finish: %s", len(failed), failed)
+        return jobs
+
+    def read_dataset(self, db: DuckDBManager, dataset: str) -> pd.DataFrame:
+        """Reads one dataset for `run_date` across all metros."""
+        pattern = os.path.join(
+            self.root,
+            "state=*",
+            "city=*",
+            f"endpoint={dataset}",
+            f"date={self.run_date}",
+            "*.parquet",
+        )
+        if not glob.glob(pattern):
+            return pd.DataFrame()
+        return db.conn.execute(
+            "SELECT * FROM read_parquet(?, hive_partitioning = false, union_by_name = true)",
+            [pattern],
+        ).df()
+
+    def load(self, db: DuckDBManager) -> Dict[str, int]:
+        """
+        Builds the RentRadar tables from every metro in `run_date` at once and loads them into
+        `db`. Returns the number of rows loaded per table.
+        """
+        data = RentCastData(
+            properties=self.read_dataset(db, "properties"),
+            long_term_rentals=self.read_dataset(db, "long_term_rentals"),
+            sale_listings=self.read_dataset(db, "sale_listings"),
+            markets_current=self.read_dataset(db, "current_market_stats"),
+            markets_history=self.read_dataset(db, "historical_market_stats"),
+        )
+        return data.seed(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--metros", required=True, help="File with one 'City, ST' per line"
+    )
+    parser.add_argument("--root", default="data/lake")
+    parser.add_argument("--db", default="rentradar/db/rentradar.db")
+    parser.add_argument("--date", default=date.today().isoformat())
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--requests-per-second", type=float, default=10.0)
+    parser.add_argument("--no-load", action="store_true", help="Only fetch, don't load")
+    args = parser.parse_args()
+
+    with open(args.metros) as f:
+        metros = [Metro.parse(line) for line in f if line.strip()]
+
+    orchestrator = IngestOrchestrator(
+        api_key=os.environ["RENTCAST_API_KEY"],
+        root=args.root,
+        metros=metros,
+        run_date=args.date,
+        workers=args.workers,
+        client_options={"requests_per_second": args.requests_per_second},
+    )
+    jobs = orchestrator.run()
+    if any(job["status"] != "done" for job in jobs.values()):
+        raise SystemExit(
+            "Some ingest jobs failed; re-run with the same --date to resume"
+        )
+
+    if not args.no_load:
+        with DuckDBManager(args.db) as db:
+            loaded = orchestrator.load(db)
+        for table_name, rows in loaded.items():
+            print(f"{table_name:24} {rows:>10,} rows")
+
+
+if __name__ == "__main__":
+    main()
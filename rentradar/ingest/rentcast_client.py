@@ -1,9 +1,14 @@
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, Literal, Optional, Tuple
+from typing import Dict, Iterator, List, Literal, Optional, Tuple
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,23 +18,77 @@ RentCastEndpoints = Literal[
     "/properties", "/listings/sale", "/listings/rental/long-term", "/markets"
 ]
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter. Tokens refill continuously at `rate` per second up to
+    `capacity`, and `acquire` blocks until one is available.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): The maximum number of tokens, i.e. the largest allowed burst.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
 
 @dataclass
 class RentCastAPIClient:
     """
     A client for fetching rental listing data from the RentCast API.
 
+    Requests share one pooled HTTP session, are throttled by a token bucket, and are retried
+    with exponential backoff on 429/5xx responses and connection errors. Pages and zip codes
+    are fetched concurrently on up to `max_workers` threads.
+
     Attributes:
         api_key (str): The API key for authenticating requests to the RentCast API.
         base_url (str): The base URL of the RentCast API.
         headers (dict): Headers to include in the API requests.
         listings (list): A list to accumulate the fetched rental listings data.
+        max_workers (int): The number of requests allowed in flight at once.
+        requests_per_second (float): The sustained request rate allowed by the rate limiter.
+        max_retries (int): How many times a failed request is retried.
+        backoff_factor (float): Base delay in seconds for exponential backoff between retries.
+        timeout (float): Seconds to wait for a response before giving up on a request.
+        pool_size (Optional[int]): HTTP connections kept open, when the client is shared by
+            several concurrent fetches. Defaults to `max_workers`.
     """
 
     api_key: str = field(repr=False)
     base_url: str = field(default="https://api.rentcast.io/v1")
     headers: dict = field(init=False)
     listings: list = field(default_factory=list)
+    max_workers: int = 4
+    requests_per_second: float = 10.0
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    timeout: float = 30.0
+    pool_size: Optional[int] = None
+    session: requests.Session = field(init=False, repr=False)
+    rate_limiter: TokenBucket = field(init=False, repr=False)
 
     def __post_init__(self):
         self.headers = {
@@ -37,49 +96,138 @@ class RentCastAPIClient:
             "X-Api-Key": self.api_key,
             "User-Agent": "python-requests/2.31.0",
         }
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        pool_size = self.pool_size or self.max_workers
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.rate_limiter = TokenBucket(self.requests_per_second)
+
+    def _retry_delay(
+        self, attempt: int, response: Optional[requests.Response]
+    ) -> float:
+        """Seconds to wait before the next attempt, honoring a Retry-After header."""
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
+        )
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * 2**attempt
 
     def fetch_data(self, endpoint: RentCastEndpoints, params: Dict) -> Dict:
         """Perform the API request and return the response data."""
-        response = requests.get(
-            f"{self.base_url}{endpoint}", headers=self.headers, params=params
-        )
-        response.raise_for_status()
-        return response.json()
+        url = f"{self.base_url}{endpoint}"
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                response, reason = None, e
+            else:
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt == self.max_retries
+                ):
+                    response.raise_for_status()
+                    return response.json()
+                reason = response.status_code
 
-    def process_markets_endpoint(
-        self, endpoint: str, query_params: Dict
-    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        """Process data for each zip code for the markets endpoint."""
-        history_dfs = []
-        current_dfs = []
+            delay = self._retry_delay(attempt, response)
+            logger.warning(
+                "Request to %s failed (%s), retrying in %.1fs", endpoint, reason, delay
+            )
+            time.sleep(delay)
 
-        for zip_code in query_params["zipCodes"]:
-            params = {**query_params, "zipCode": zip_code}
+    def iter_pages(
+        self, endpoint: RentCastEndpoints, query_params: Dict, limit: int
+    ) -> Iterator[List[Dict]]:
+        """
+        Yield the pages of a paginated endpoint in offset order. The first page is requested
+        alone, so a pull that fits in one page costs one request. Once a full page comes back,
+        up to `max_workers` pages are requested ahead of the one being consumed, so up to
+        `max_workers - 1` speculative requests may be sent past the last page.
+        """
+        pending = deque()
+        next_offset = 0
 
-            try:
-                data = self.fetch_data(endpoint, params)["rentalData"]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+
+            def submit():
+                nonlocal next_offset
+                params = {**query_params, "limit": limit, "offset": next_offset}
+                pending.append(executor.submit(self.fetch_data, endpoint, params))
+                next_offset += limit
+
+            submit()
+            while pending:
+                listings = pending.popleft().result()
+                if listings is None:
+                    logger.error("Failed to fetch data for endpoint: %s", endpoint)
+                    break
+
+                yield listings
+
+                if len(listings) < limit:
+                    logger.info(
+                        "Completed fetching all data for endpoint: %s", endpoint
+                    )
+                    break
+                while len(pending) < self.max_workers:
+                    submit()
+
+            for future in pending:
+                future.cancel()
 
-            except requests.HTTPError:
-                logger.error("Failed to fetch data for zip code: %s", zip_code)
-                continue
+    def close(self) -> None:
+        """Close the pooled HTTP session."""
+        self.session.close()
 
-            df_current = pd.json_normalize(data, "dataByBedrooms")
-            df_current["lastUpdatedDate"] = data["lastUpdatedDate"]
-            df_current["zipCode"] = zip_code
+    def _fetch_market(
+        self, endpoint: str, query_params: Dict, zip_code
+    ) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Fetch the current and historic market stats for a single zip code."""
+        params = {**query_params, "zipCode": zip_code}
 
-            current_dfs.append(df_current)
+        try:
+            data = self.fetch_data(endpoint, params)["rentalData"]
 
-            histories = []
-            for date, details in data.get("history", {}).items():
-                for bedroom in details["dataByBedrooms"]:
-                    bedroom["date"] = date
-                    bedroom["zipCode"] = zip_code
-                    histories.append(bedroom)
+        except requests.HTTPError:
+            logger.error("Failed to fetch data for zip code: %s", zip_code)
+            return None
 
-            history_dfs.append(pd.DataFrame(histories))
+        df_current = pd.json_normalize(data, "dataByBedrooms")
+        df_current["lastUpdatedDate"] = data["lastUpdatedDate"]
+        df_current["zipCode"] = zip_code
 
-        history_df = pd.concat(history_dfs, ignore_index=True)
-        current_df = pd.concat(current_dfs, ignore_index=True)
+        histories = []
+        for date, details in data.get("history", {}).items():
+            for bedroom in details["dataByBedrooms"]:
+                bedroom["date"] = date
+                bedroom["zipCode"] = zip_code
+                histories.append(bedroom)
+
+        return df_current, pd.DataFrame(histories)
+
+    def process_markets_endpoint(
+        self, endpoint: str, query_params: Dict
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Process data for each zip code for the markets endpoint, concurrently."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(
+                executor.map(
+                    lambda zip_code: self._fetch_market(
+                        endpoint, query_params, zip_code
+                    ),
+                    query_params["zipCodes"],
+                )
+            )
+
+        results = [result for result in results if result is not None]
+        current_df = pd.concat([current for current, _ in results], ignore_index=True)
+        history_df = pd.concat([history for _, history in results], ignore_index=True)
 
         return current_df, history_df
 
@@ -90,40 +238,45 @@ class RentCastAPIClient:
         endpoint: RentCastEndpoints,
         query_params: Dict,
         limit: Optional[int] = None,
+        **client_options,
     ) -> "RentCastAPIClient":
-        """Factory method to create an instance and fetch all listings with pagination."""
+        """
+        Factory method to create an instance and fetch all listings with pagination. Extra
+        keyword arguments (e.g. max_workers, requests_per_second) configure the client.
+        """
         logger.info("Starting data fetch for endpoint: %s", endpoint)
-        instance = cls(api_key=api_key)
+        instance = cls(api_key=api_key, **client_options)
 
         if endpoint == "/markets" and "zipCodes" in query_params:
             raise ValueError(
                 "The markets endpoint cannot be called this way. Instantiate an instance of RentCastAPIClient and call the process_markets_endpoint method instead."
             )
 
-        offset = 0
-        has_more = True
-
-        while has_more:
-            params = query_params.copy()
-            params.update({"limit": limit, "offset": offset})
-
-            listings = instance.fetch_data(endpoint, params)
-            if listings is not None:
-                instance.listings.extend(listings)
-
-                if len(listings) < limit:
-                    has_more = False
-                    logger.info(
-                        "Completed fetching all data for endpoint: %s", endpoint
-                    )
-                else:
-                    offset += limit
-            else:
-                logger.error("Failed to fetch data for endpoint: %s", endpoint)
-                has_more = False
+        for listings in instance.iter_pages(endpoint, query_params, limit):
+            instance.listings.extend(listings)
 
         return instance
 
+    @classmethod
+    def stream(
+        cls,
+        api_key: str,
+        endpoint: RentCastEndpoints,
+        query_params: Dict,
+        limit: int,
+        **client_options,
+    ) -> Iterator[List[Dict]]:
+        """
+        Like `create`, but yields each page as it arrives instead of accumulating the listings,
+        so a sink (see `rentradar.ingest.sinks`) can persist them with constant memory.
+        """
+        logger.info("Starting streamed data fetch for endpoint: %s", endpoint)
+        instance = cls(api_key=api_key, **client_options)
+        try:
+            yield from instance.iter_pages(endpoint, query_params, limit)
+        finally:
+            instance.close()
+
     def to_frame(self) -> pd.DataFrame:
         """Convert listings to a pandas DataFrame."""
         return pd.DataFrame(self.listings)
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from rentradar.db.duckdb import DuckDBManager, LoadMode, quote_identifier
+
+logger = logging.getLogger(__name__)
+
+
+def page_to_frame(page: List[Dict]) -> pd.DataFrame:
+    """
+    Converts one page of RentCast records into a DataFrame with types that stay stable across
+    pages: nested values (features, owner, taxAssessments, ...) are JSON encoded, integer
+    columns are widened to float, and columns that are entirely null are typed as strings.
+    """
+    df = pd.DataFrame(page)
+    for column in df.columns:
+        values = df[column]
+        if values.isna().all():
+            df[column] = values.astype("string")
+        elif pd.api.types.is_integer_dtype(values):
+            df[column] = values.astype("float64")
+        elif values.dtype == object:
+            nested = values.map(lambda value: isinstance(value, (dict, list)))
+            if nested.any():
+                df[column] = values.where(~nested, values[nested].map(json.dumps))
+    return df
+
+
+class PageSink(ABC):
+    """
+    Base class for sinks that persist RentCast pages one at a time, so memory use is bounded by
+    the page size rather than the number of listings.
+    """
+
+    rows: int = 0
+
+    @abstractmethod
+    def write(self, page: List[Dict]) -> None:
+        """Persist one page of RentCast records."""
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        """Discard everything written so far. Called instead of `close` on errors."""
+        self.close()
+
+    def write_pages(self, pages: Iterable[List[Dict]]) -> int:
+        """Write every page from an iterator (e.g. `RentCastAPIClient.stream`)."""
+        for page in pages:
+            if page:
+                self.write(page)
+        return self.rows
+
+    def __enter__(self) -> "PageSink":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ParquetSink(PageSink):
+    """
+    Writes each page as a row group of a single Parquet file. The schema is taken from the
+    first page unless one is given; later pages are conformed to it, and columns the schema
+    doesn't have are dropped with a warning.
+
+    Attributes:
+        path (str): The Parquet file to write.
+        schema (Optional[pa.Schema]): The file's schema.
+        rows (int): The number of rows written so far.
+    """
+
+    def __init__(self, path: str, schema: Optional[pa.Schema] = None) -> None:
+        self.path = path
+        self.schema = schema
+        self.rows = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def write(self, page: List[Dict]) -> None:
+        df = page_to_frame(page)
+        if self._writer is None:
+            if self.schema is None:
+                self.schema = pa.Schema.from_pandas(df, preserve_index=False)
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+
+        extra = set(df.columns) - set(self.schema.names)
+        if extra:
+            logger.warning("Dropping columns not in the Parquet schema: %s", extra)
+
+        arrays = []
+        for field in self.schema:
+            if field.name not in df or df[field.name].isna().all():
+                arrays.append(pa.nulls(len(df), field.type))
+            else:
+                arrays.append(
+                    pa.array(df[field.name], from_pandas=True).cast(field.type)
+                )
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            logger.info("Wrote %s rows to %s", self.rows, self.path)
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.remove(self.path)
+
+
+class DuckDBSink(PageSink):
+    """
+    Appends each page to a staging table and, on close, moves the staged rows into the target
+    table with `DuckDBManager.table_from_query` (atomic swap, append or upsert). Columns that
+    first appear in later pages are added to the staging table as they arrive.
+
+    Attributes:
+        db (DuckDBManager): The database to load into.
+        table_name (str): The target table.
+        mode (LoadMode): How staged rows are loaded into the target table.
+        key (Optional[Union[str, List[str]]]): The key columns for upserts.
+        rows (int): The number of rows staged so far.
+    """
+
+    def __init__(
+        self,
+        db: DuckDBManager,
+        table_name: str,
+        mode: LoadMode = "replace",
+        key: Optional[Union[str, List[str]]] = None,
+    ) -> None:
+        self.db = db
+        self.table_name = table_name
+        self.mode = mode
+        self.key = key
+        self.rows = 0
+        self.staging = f"{table_name}__stream"
+        self._columns: set = set()
+
+    def _add_new_columns(self, df: pd.DataFrame) -> None:
+        """
+        Creates the staging table, or adds the columns it doesn't have yet, using the types
+        DuckDB infers for the page. Columns with no values yet are declared as VARCHAR.
+        """
+        new_columns = [column for column in df.columns if column not in self._columns]
+        if not new_columns:
+            return
+        self.db.conn.register("__page", df[new_columns])
+        try:
+            described = self.db.conn.execute("DESCRIBE SELECT * FROM __page").fetchall()
+        finally:
+            self.db.conn.unregister("__page")
+
+        definitions = [
+            (
+                quote_identifier(name),
+                "VARCHAR" if df[name].isna().all() else column_type,
+            )
+            for name, column_type, *_ in described
+        ]
+        staging = quote_identifier(self.staging)
+        if not self._columns:
+            columns = ", ".join(
+                f"{name} {column_type}" for name, column_type in definitions
+            )
+            self.db.conn.execute(f"CREATE OR REPLACE TABLE {staging} ({columns})")
+        else:
+            for name, column_type in definitions:
+                self.db.conn.execute(
+                    f"ALTER TABLE {staging} ADD COLUMN {name} {column_type}"
+                )
+        self._columns.update(new_columns)
+
+    def write(self, page: List[Dict]) -> None:
+        df = page_to_frame(page)
+        self._add_new_columns(df)
+        self.db.table_from_dataframe(df, self.staging, mode="append")
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if not self._columns:
+            return
+        try:
+            self.db.table_from_query(
+                f"SELECT * FROM {quote_identifier(self.staging)}",
+                self.table_name,
+                mode=self.mode,
+                key=self.key,
+            )
+            logger.info("Loaded %s streamed rows into '%s'", self.rows, self.table_name)
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        self.db.conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(self.staging)}")
+        self._columns = set()
@@ -0,0 +1,270 @@
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from rentradar.db.cache import table_versions
+from rentradar.db.duckdb import DuckDBManager, quote_identifier
+from rentradar.db.rollups import refresh_market_trends
+from rentradar.ingest.rentcast_client import RentCastAPIClient, RentCastEndpoints
+from rentradar.process.process_rentcast_data import prepare_listings
+
+logger = logging.getLogger(__name__)
+
+SYNC_STATE_TABLE = "sync_state"
+# which listing ids each endpoint and city has returned, so a reconcile only retires its own
+SYNC_LISTINGS_TABLE = "sync_listings"
+
+LISTING_TABLES = {
+    "/listings/rental/long-term": "long_term_rentals",
+    "/listings/sale": "sale_listings",
+}
+
+
+@dataclass
+class ListingSync:
+    """
+    Incrementally refreshes a listings table from RentCast. A high-water mark (the latest
+    `lastSeenDate` merged so far) is kept per endpoint and city in the `sync_state` table.
+    Most runs only ask RentCast for listings listed inside the window since that mark
+    (`daysOld` counts days since a listing was listed) and merge them into the table by `id`,
+    which picks up new listings at the cost of a page or two.
+
+    Changes to older listings are outside that window, so every `reconcile_days` a run pulls
+    the city's active listings instead. Their current price and status are merged, and stored
+    listings of the city that are no longer returned are marked `Inactive` with a
+    `removedDate`. Listings already stored before a city's first sync are counted as the
+    city's by their property's address, so they can be retired too.
+
+    Attributes:
+        db (DuckDBManager): The database holding the listings and sync state tables.
+        api_key (str): The RentCast API key.
+        limit (int): The page size used when fetching listings.
+        window_param (str): The RentCast query parameter that bounds listings by age in days.
+        overlap_days (int): Extra days added to the window so nothing at the boundary is missed.
+        reconcile_days (float): Days between full pulls of the active listings.
+    """
+
+    db: DuckDBManager
+    api_key: str
+    limit: int = 500
+    window_param: str = "daysOld"
+    overlap_days: int = 1
+    reconcile_days: float = 1.0
+
+    def _ensure_state_tables(self) -> None:
+        self.db.conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {SYNC_STATE_TABLE} (
+                endpoint VARCHAR,
+                city VARCHAR,
+                state VARCHAR,
+                high_water_mark TIMESTAMP,
+                synced_at TIMESTAMP
+            )
+            """
+        )
+        # added after the table was introduced; older databases don't have it yet
+        self.db.conn.execute(
+            f"ALTER TABLE {SYNC_STATE_TABLE} "
+            "ADD COLUMN IF NOT EXISTS reconciled_at TIMESTAMP"
+        )
+        self.db.conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {SYNC_LISTINGS_TABLE} (
+                endpoint VARCHAR,
+                city VARCHAR,
+                state VARCHAR,
+                id VARCHAR
+            )
+            """
+        )
+
+    def _sync_state(
+        self, endpoint: str, city: str, state: str
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        self._ensure_state_tables()
+        row = self.db.conn.execute(
+            f"SELECT high_water_mark, reconciled_at FROM {SYNC_STATE_TABLE} "
+            "WHERE endpoint = ? AND city = ? AND state = ?",
+            [endpoint, city, state],
+        ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def high_water_mark(
+        self, endpoint: str, city: str, state: str
+    ) -> Optional[datetime]:
+        return self._sync_state(endpoint, city, state)[0]
+
+    def _table_exists(self, table_name: str) -> bool:
+        return table_name in self.db.list_tables()["name"].tolist()
+
+    def _fetch(
+        self, endpoint: RentCastEndpoints, params: Dict, **client_options
+    ) -> pd.DataFrame:
+        # `stream` closes its client once the pages run out or a request fails
+        pages = RentCastAPIClient.stream(
+            self.api_key, endpoint, params, self.limit, **client_options
+        )
+        return pd.DataFrame([listing for page in pages for listing in page])
+
+    def _backfill_listings(
+        self, endpoint: str, table_name: str, city: str, state: str
+    ) -> None:
+        """
+        Records the stored listings whose property is in `city`, `state` as this sync's, so
+        listings loaded before the first sync (e.g. by the process pipeline) can be retired.
+        """
+        if not (self._table_exists(table_name) and self._table_exists("properties")):
+            return
+        table = quote_identifier(table_name)
+        self.db.conn.execute(
+            f"""
+            INSERT INTO {SYNC_LISTINGS_TABLE}
+            SELECT DISTINCT ?, ?, ?, listings.id
+            FROM {table} AS listings
+            JOIN properties USING (property_id)
+            WHERE properties.formattedAddress ILIKE ?
+              AND listings.id NOT IN (
+                  SELECT id FROM {SYNC_LISTINGS_TABLE}
+                  WHERE endpoint = ? AND city = ? AND state = ?
+              )
+            """,
+            [endpoint, city, state, f"%, {city}, {state} %", endpoint, city, state],
+        )
+        table_versions.bump(self.db.db_path, SYNC_LISTINGS_TABLE)
+
+    def _retire_missing(
+        self,
+        endpoint: str,
+        table_name: str,
+        city: str,
+        state: str,
+        active_ids: pd.Series,
+        now: datetime,
+    ) -> int:
+        """
+        Marks the city's stored active listings that are not in `active_ids` as `Inactive`,
+        removed at `now`. Returns the number of listings retired.
+        """
+        table = quote_identifier(table_name)
+        self.db.conn.register("__active_ids", pd.DataFrame({"id": active_ids}))
+        try:
+            retired = self.db.conn.execute(
+                f"""
+                UPDATE {table} SET status = 'Inactive', removedDate = ?
+                WHERE status = 'Active'
+                  AND id IN (
+                      SELECT id FROM {SYNC_LISTINGS_TABLE}
+                      WHERE endpoint = ? AND city = ? AND state = ?
+                  )
+                  AND id NOT IN (SELECT id FROM __active_ids)
+                """,
+                [now.strftime("%Y-%m-%dT%H:%M:%S.000Z"), endpoint, city, state],
+            ).fetchone()[0]
+        finally:
+            self.db.conn.unregister("__active_ids")
+        table_versions.bump(self.db.db_path, table_name)
+        return retired
+
+    def sync(
+        self,
+        endpoint: RentCastEndpoints,
+        query_params: Dict,
+        now: Optional[datetime] = None,
+        **client_options,
+    ) -> int:
+        """
+        Fetches the listings that changed since the last sync for `query_params` (city/state)
+        and merges them into the endpoint's table, reconciling the city's active listings when
+        one is due. Returns the number of listings merged.
+        """
+        table_name = LISTING_TABLES[endpoint]
+        city, state = query_params.get("city", ""), query_params.get("state", "")
+        now = (now or datetime.now(timezone.utc)).replace(tzinfo=None)
+        mark, reconciled_at = self._sync_state(endpoint, city, state)
+
+        params = dict(query_params)
+        reconcile = False
+        if mark is None:
+            logger.info(
+                "No sync state for %s in %s, %s; fetching all", endpoint, city, state
+            )
+            self._backfill_listings(endpoint, table_name, city, state)
+            reconciled_at = now
+        elif reconciled_at is None or (
+            now - reconciled_at >= timedelta(days=self.reconcile_days)
+        ):
+            reconcile = True
+            params["status"] = "Active"
+            logger.info("Reconciling active %s for %s, %s", endpoint, city, state)
+        else:
+            days = math.ceil((now - mark).total_seconds() / 86400) + self.overlap_days
+            params[self.window_param] = max(days, 1)
+            logger.info("Syncing %s for %s, %s since %s", endpoint, city, state, mark)
+
+        df = self._fetch(endpoint, params, **client_options)
+
+        if not df.empty:
+            listings = prepare_listings(df, table_name)
+            mode = "upsert" if self._table_exists(table_name) else "replace"
+            self.db.table_from_dataframe(listings, table_name, mode=mode, key="id")
+            seen = pd.DataFrame(
+                {
+                    "endpoint": endpoint,
+                    "city": city,
+                    "state": state,
+                    "id": listings["id"],
+                }
+            )
+            self.db.table_from_dataframe(
+                seen,
+                SYNC_LISTINGS_TABLE,
+                mode="upsert",
+                key=["endpoint", "city", "state", "id"],
+            )
+            last_seen = pd.to_datetime(listings["lastSeenDate"], utc=True).max()
+            if pd.notna(last_seen):
+                last_seen = last_seen.tz_localize(None).to_pydatetime()
+                mark = max(mark, last_seen) if mark is not None else last_seen
+
+        retired = 0
+        if reconcile:
+            if df.empty:
+                # more likely a failed pull than a city with no listings left
+                logger.warning(
+                    "No active %s returned for %s, %s; not retiring any",
+                    endpoint,
+                    city,
+                    state,
+                )
+            else:
+                retired = self._retire_missing(
+                    endpoint, table_name, city, state, listings["id"], now
+                )
+                logger.info("Marked %s listings in '%s' removed", retired, table_name)
+            reconciled_at = now
+
+        state_row = pd.DataFrame(
+            {
+                "endpoint": [endpoint],
+                "city": [city],
+                "state": [state],
+                "high_water_mark": [mark],
+                "synced_at": [now],
+                "reconciled_at": [reconciled_at],
+            }
+        )
+        self.db.table_from_dataframe(
+            state_row,
+            SYNC_STATE_TABLE,
+            mode="upsert",
+            key=["endpoint", "city", "state"],
+        )
+        logger.info("Merged %s listings into '%s'", len(df), table_name)
+        if not df.empty or retired:
+            refresh_market_trends(self.db)
+        return len(df)
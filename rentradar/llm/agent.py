@@ -1,37 +1,113 @@
+import logging
+import threading
+from typing import Any, Dict, Optional
+
 from langchain.agents import create_sql_agent
 from langchain.agents.agent_types import AgentType
 from langchain.sql_database import SQLDatabase
 from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
+from langchain_community.callbacks import get_openai_callback
+from langchain_core.language_models import BaseLanguageModel
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import OpenAI
 
-from rentradar.llm.templates import rr_template
+from rentradar.db.cache import database_version
+from rentradar.db.catalog import get_schema_catalog
+from rentradar.llm.cache import AnswerCache, generated_sql
+from rentradar.llm.templates import (
+    DEFAULT_SCHEMA_TOKENS,
+    SchemaPromptBuilder,
+    agent_prefix,
+    count_tokens,
+    rr_template,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def sql_database(db_uri: str) -> SQLDatabase:
+    """
+    A read-only LangChain `SQLDatabase` over the DuckDB database at `db_uri`.
+
+    Table info and sample rows come from the cached schema catalog rather than being sampled
+    from every table, and the tables are reflected once here. The result holds a SQLAlchemy
+    engine and is safe to share between agents and sessions.
+
+    Parameters:
+        db_uri (str): URI to connect to the DuckDB database.
+
+    Returns:
+        SQLDatabase: The database wrapper used by the agent's SQL tools.
+    """
+    catalog = get_schema_catalog(db_uri.removeprefix("duckdb:///"))
+    return SQLDatabase.from_uri(
+        db_uri,
+        engine_args={"connect_args": {"read_only": True}},
+        sample_rows_in_table_info=0,
+        custom_table_info=catalog.table_info(),
+    )
 
 
 class RentRadarLLMAgent:
-    def __init__(self, db_uri: str, openai_api_key: str):
+    def __init__(
+        self,
+        db_uri: str,
+        openai_api_key: Optional[str] = None,
+        llm: Optional[BaseLanguageModel] = None,
+        db: Optional[SQLDatabase] = None,
+        cache: Optional[AnswerCache] = None,
+        schema_tokens: int = DEFAULT_SCHEMA_TOKENS,
+    ):
         """
         Initializes the RentRadar LLM Agent with connection to the DuckDB database.
 
+        Building an agent creates the LLM client, the SQL toolkit and the agent executor, so
+        callers should build one per API key and reuse it for every question.
+
         Parameters:
             db_uri (str): URI to connect to the DuckDB database.
+            openai_api_key (str): OpenAI API key, used when no `llm` is given.
+            llm (BaseLanguageModel): The model to use instead of OpenAI, e.g. a fake LLM in tests.
+            db (SQLDatabase): A database from `sql_database(db_uri)` to share with other agents.
+            cache (AnswerCache): Answers to past questions, which may be shared between agents.
+            schema_tokens (int): The token budget of the schema sent with each question.
         """
-        self.db = SQLDatabase.from_uri(db_uri, sample_rows_in_table_info=3)
-        self.toolkit = SQLDatabaseToolkit(
-            db=self.db,
-            llm=OpenAI(openai_api_key=openai_api_key, temperature=0),
+        if llm is None:
+            llm = OpenAI(openai_api_key=openai_api_key, temperature=0)
+        self.db_path = db_uri.removeprefix("duckdb:///")
+        self.catalog = get_schema_catalog(self.db_path)
+        self.cache = cache
+        self.schema_prompts = SchemaPromptBuilder(
+            self.catalog, max_tokens=schema_tokens
         )
+        self.db = db if db is not None else sql_database(db_uri)
+        self.toolkit = SQLDatabaseToolkit(db=self.db, llm=llm)
         self.agent_executor = create_sql_agent(
-            llm=OpenAI(openai_api_key=openai_api_key, temperature=0),
+            llm=llm,
             toolkit=self.toolkit,
+            prefix=agent_prefix,
             verbose=True,
             agent_type=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+            # the SQL behind each answer is kept in the answer cache
+            agent_executor_kwargs={"return_intermediate_steps": True},
         )
         self.prompt_template = PromptTemplate.from_template(rr_template)
+        # agents are shared between sessions, which each run in their own thread
+        self._usage = threading.local()
+
+    @property
+    def last_usage(self) -> Dict[str, Any]:
+        """
+        The prompt size and token usage of the last question asked from this thread: the
+        tables in its schema, the tokens of the schema and of the whole question, and the
+        prompt and completion tokens of every LLM call of the agent loop.
+        """
+        return getattr(self._usage, "value", {})
 
     def execute_query(self, query):
         """
-        Executes a given SQL query using the LLM agent and returns the result.
+        Executes a given SQL query using the LLM agent and returns the result. Questions
+        answered before are served from the answer cache, without calling the LLM.
 
         Parameters:
             query (str): The SQL query to be executed by the LLM agent.
@@ -39,6 +115,39 @@ class RentRadarLLMAgent:
         Returns:
             The result of the executed query.
         """
-        formatted_prompt = self.prompt_template.format(query=query)
-        result = self.agent_executor.invoke(formatted_prompt)
+        if self.cache is not None:
+            answer = self.cache.get(query)
+            if answer is not None:
+                self._usage.value = {"cached": True, "prompt_tokens": 0}
+                return answer
+
+        version = database_version(self.db_path)
+        schema = self.schema_prompts.build(query)
+        formatted_prompt = self.prompt_template.format(
+            dialect=self.db.dialect, schema=schema.text, query=query
+        )
+        with get_openai_callback() as usage:
+            result = self.agent_executor.invoke(formatted_prompt)
+        report = {
+            "cached": False,
+            "tables": schema.tables,
+            "schema_tokens": schema.tokens,
+            "question_tokens": count_tokens(formatted_prompt),
+            "llm_calls": usage.successful_requests,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+        }
+        self._usage.value = report
+        logger.info(
+            "Answered with %s LLM calls, %s prompt tokens (question %s, schema %s: %s)",
+            usage.successful_requests,
+            usage.prompt_tokens,
+            report["question_tokens"],
+            schema.tokens,
+            ", ".join(schema.tables),
+        )
+        sql = generated_sql(result["intermediate_steps"])
+        # answers that didn't come from the database (e.g. the agent gave up) aren't kept
+        if self.cache is not None and sql is not None:
+            self.cache.put(query, result["output"], sql, version)
         return result["output"]
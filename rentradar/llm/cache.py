@@ -0,0 +1,271 @@
+"""
+Answer cache for the natural-language agent.
+
+A question goes through several LLM round-trips and SQL calls in the agent's ReAct loop, so
+answers are cached on the normalized question together with the SQL the agent ran to answer
+it. While the database is unchanged (see `database_version`) the stored answer is returned
+as is. After a data reload the stored SQL is re-executed against the current data instead,
+capped at `MAX_RESULT_ROWS` rows, and the result is shown as a table after the original
+answer, so a repeat question never costs tokens. Optionally, a question that misses is
+embedded and matched to a past question by cosine similarity, provided both mention the same
+numbers.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+import duckdb
+import numpy as np
+
+from rentradar.db.cache import database_version
+from rentradar.db.duckdb import DuckDBManager
+
+# words that change how a question is phrased but not what it asks for
+FILLER_WORDS = frozenset(
+    {"a", "an", "the", "please", "me", "show", "give", "tell", "what", "whats", "is"}
+)
+WORD_PATTERN = re.compile(r"[a-z0-9_.]+")
+QUERY_TOOL = "sql_db_query"
+# rows of a re-executed query shown with a cached answer
+MAX_RESULT_ROWS = 20
+
+
+def normalize_question(question: str) -> str:
+    """
+    Lowercases a question and drops punctuation and filler words, so that e.g. "What is the
+    median rent by zip code?" and "median rent by zip code" share a cache entry. Numbers are
+    kept, so questions about different zip codes or years don't.
+    """
+    words = WORD_PATTERN.findall(question.lower())
+    return " ".join(
+        word.strip(".") for word in words if word.strip(".") not in FILLER_WORDS
+    )
+
+
+def numbers(key: str) -> FrozenSet[str]:
+    """The words of a normalized question that contain digits, e.g. zip codes and years."""
+    return frozenset(word for word in key.split() if any(c.isdigit() for c in word))
+
+
+def generated_sql(intermediate_steps: Iterable) -> Optional[str]:
+    """
+    The last SQL query the agent ran successfully, from the `intermediate_steps` of an
+    `AgentExecutor` result: a list of (action, observation) pairs.
+    """
+    sql = None
+    for action, observation in intermediate_steps:
+        if getattr(action, "tool", None) != QUERY_TOOL:
+            continue
+        if str(observation).startswith("Error"):
+            continue
+        tool_input = action.tool_input
+        sql = tool_input.get("query") if isinstance(tool_input, dict) else tool_input
+    return sql.strip() if sql else None
+
+
+def markdown_table(columns: Dict[str, list]) -> str:
+    """Query results as a Markdown table."""
+    names = list(columns)
+    rows = zip(*columns.values())
+    lines = [
+        "| " + " | ".join(names) + " |",
+        "|" + "---|" * len(names),
+        *("| " + " | ".join(str(value) for value in row) + " |" for row in rows),
+    ]
+    return "\n".join(lines)
+
+
+def render_rerun(
+    question: str, answer: str, columns: Dict[str, list], truncated: bool
+) -> str:
+    """A cached answer whose data has changed since, followed by its query's current result."""
+    shown = f" (first {MAX_RESULT_ROWS} rows)" if truncated else ""
+    return (
+        f'The data has been reloaded since "{question}" was answered. The answer then was: '
+        f"{answer}\n\nIts query now returns{shown}:\n\n{markdown_table(columns)}"
+    )
+
+
+@dataclass
+class AnswerEntry:
+    """
+    A cached answer. `answer` is the agent's answer at `version` and is never rewritten; a
+    re-executed query's result is kept next to it, as of `result_version`.
+    """
+
+    question: str
+    answer: str
+    sql: str
+    version: float
+    expires_at: float
+    vector: Optional[np.ndarray] = None
+    result: Optional[str] = None
+    result_version: Optional[float] = None
+
+
+class AnswerCache:
+    """
+    Thread-safe LRU cache of agent answers by normalized question.
+
+    Attributes:
+        db_path (str): The database the agent answers from.
+        ttl (Optional[float]): Seconds an entry stays valid, or None to never expire.
+        max_entries (int): The maximum number of cached questions.
+        embeddings: Optional LangChain `Embeddings` (anything with `embed_query`) used to match
+            questions that miss to a past question.
+        min_similarity (float): The cosine similarity a past question needs to be a match. It
+            must also mention the same numbers (zip codes, years) as the question.
+        hits, misses, reruns, expirations, evictions (int): Usage counters.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl: Optional[float] = 24 * 3600.0,
+        max_entries: int = 1024,
+        embeddings: Any = None,
+        min_similarity: float = 0.95,
+    ) -> None:
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embeddings = embeddings
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, AnswerEntry]" = OrderedDict()
+        self._miss_vectors: Dict[str, np.ndarray] = {}
+        self.hits = 0
+        self.misses = 0
+        self.reruns = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def _embed(self, key: str) -> Optional[np.ndarray]:
+        if self.embeddings is None or not key:
+            return None
+        vector = np.asarray(self.embeddings.embed_query(key), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _find(self, key: str, vector: Optional[np.ndarray]) -> Optional[str]:
+        if key in self._entries:
+            return key
+        if vector is None:
+            return None
+        # questions about different zip codes or years embed alike but aren't a match
+        wanted = numbers(key)
+        keys = [
+            k
+            for k, entry in self._entries.items()
+            if entry.vector is not None and numbers(k) == wanted
+        ]
+        if not keys:
+            return None
+        vectors = np.stack([self._entries[k].vector for k in keys])
+        similarities = vectors @ vector
+        best = int(np.argmax(similarities))
+        return keys[best] if similarities[best] >= self.min_similarity else None
+
+    def get(self, question: str) -> Optional[str]:
+        """
+        The answer to `question` as of the current data, or None if it has to be asked.
+        """
+        key = normalize_question(question)
+        version = database_version(self.db_path)
+        with self._lock:
+            match = self._find(key, None)
+        if match is None and self.embeddings is not None:
+            vector = self._embed(key)
+            with self._lock:
+                match = self._find(key, vector)
+                if match is None and vector is not None:
+                    # kept for `put`, so the question is embedded once
+                    self._miss_vectors[key] = vector
+
+        with self._lock:
+            entry = self._entries.get(match) if match is not None else None
+            if entry is not None and entry.expires_at < time.monotonic():
+                self.expirations += 1
+                del self._entries[match]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(match)
+            if entry.version == version:
+                self.hits += 1
+                return entry.answer
+            if entry.result_version == version:
+                self.hits += 1
+                return entry.result
+
+        try:
+            columns, truncated = self._run(entry.sql)
+        except duckdb.Error:
+            # e.g. a column the query reads was dropped; the agent's next answer replaces it
+            with self._lock:
+                self.misses += 1
+            return None
+        result = render_rerun(entry.question, entry.answer, columns, truncated)
+        with self._lock:
+            entry.result, entry.result_version = result, version
+            self.reruns += 1
+        return result
+
+    def _run(self, sql: str) -> Tuple[Dict[str, list], bool]:
+        """The first `MAX_RESULT_ROWS` rows of `sql`, and whether there were more."""
+        query = (
+            f"SELECT * FROM ({sql.rstrip().rstrip(';')}) AS answer "
+            f"LIMIT {MAX_RESULT_ROWS + 1}"
+        )
+        with DuckDBManager(self.db_path, read_only=True) as db:
+            columns = db.fetch_columns(query)
+        truncated = any(len(values) > MAX_RESULT_ROWS for values in columns.values())
+        rows = {name: values[:MAX_RESULT_ROWS] for name, values in columns.items()}
+        return rows, truncated
+
+    def put(self, question: str, answer: str, sql: str, version: float) -> None:
+        """
+        Stores the answer to `question` and the SQL it came from. `version` is the
+        `database_version` read before the agent ran, so an answer computed while the data was
+        being reloaded is re-checked on its next use.
+        """
+        key = normalize_question(question)
+        expires_at = (
+            time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        )
+        with self._lock:
+            vector = self._miss_vectors.pop(key, None)
+        if vector is None:
+            vector = self._embed(key)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = AnswerEntry(
+                question, answer, sql, version, expires_at, vector
+            )
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if len(self._miss_vectors) > self.max_entries:
+                self._miss_vectors.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._miss_vectors.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reruns": self.reruns,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
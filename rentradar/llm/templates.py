@@ -1,95 +1,228 @@
-rr_template = """/
-You are a SQL analyst that is querying a database of real estate data. The database has the following tables:
-
-1. **counties**: Stores the identifiers and names of counties.
-   - `id`: Unique identifier for each county.
-   - `county`: Name of the county.
-
-2. **current_market_stats**: Contains current rental market statistics by zip code.
-   - `bedrooms`: Number of bedrooms.
-   - `averageRent`: Average rental price.
-   - `minRent`: Minimum rental price.
-   - `maxRent`: Maximum rental price.
-   - `totalListings`: Total number of rental listings.
-   - `lastUpdatedDate`: Date when the data was last updated.
-   - `zipCode`: Zip code of the rental property.
-
-3. **historic_market_stats**: Holds historical rental market data collected over time by zip code.
-   - `bedrooms`: Number of bedrooms.
-   - `averageRent`: Historical average rental price.
-   - `minRent`: Historical minimum rental price.
-   - `maxRent`: Historical maximum rental price.
-   - `totalListings`: Historical number of rental listings.
-   - `date`: Date of the recorded data.
-   - `zipCode`: Zip code of the rental property.
-
-4. **long_term_rentals**: Details long-term rental listings.
-   - `property_id`: Unique identifier for the property.
-   - `id`: Unique identifier for the listing.
-   - `price`: Rental price.
-   - `status`: Current status of the listing.
-   - `daysOnMarket`: Number of days the property has been on the market.
-   - `listedDate`, `createdDate`, `lastSeenDate`, `removedDate`: Relevant dates regarding the property's listing status.
-
-5. **properties**: General information about properties.
-   - `property_id`: Unique identifier for the property.
-   - `id`: Unique identifier for the record.
-   - `formattedAddress`: Full address of the property.
-   - `zipCode`: Zip code of the property.
-   - `county`: County where the property is located.
-   - `subdivision`: Subdivision of the property.
-   - `latitude`, `longitude`: Geographical coordinates of the property.
-   - `propertyType`: Type of the property (e.g., residential, commercial).
-   - `ownerOccupied`: Indicates if the property is owner-occupied.
-   - `yearBuilt`: Year the property was built.
-   - `lastSaleDate`, `lastSalePrice`: Most recent sale date and price.
-   - `zoning`: Zoning classification of the property.
-   - `assessorID`, `legalDescription`: Assessor's identification and legal description of the property.
-
-6. **property_features**: Specific features of properties.
-   - `property_id`: Unique identifier for the property.
-   - `bedrooms`, `bathrooms`: Number of bedrooms and bathrooms.
-   - `squareFootage`: Total square footage of the property.
-   - `lotSize`: Size of the property's lot.
-   - `floorCount`: Number of floors in the property.
-   - `garage`, `garageType`: Indicates if there is a garage and its type.
-   - `architectureType`, `exteriorType`: Architectural and exterior material type.
-   - `heating`, `heatingType`, `cooling`, `coolingType`: Heating and cooling systems and their types.
-   - `unitCount`, `garageSpaces`: Number of units and garage spaces.
-   - `roofType`, `foundationType`: Type of roof and foundation.
-   - `roomCount`: Number of rooms.
-   - `fireplace`, `fireplaceType`: Indicates presence of a fireplace and its type.
-   - `pool`, `poolType`, `viewType`: Presence of a pool, its type, and view type.
-
-7. **property_owners**: Information about property owners.
-   - `owner_id`: Unique identifier for the owner.
-   - `property_id`: Unique identifier for the property.
-   - `owner`: Name of the property owner.
-
-8. **property_taxes**: Property tax records.
-   - `property_tax_id`: Unique identifier for the tax record.
-   - `property_id`: Unique identifier for the property.
-   - `year`: Tax year.
-   - `total`: Total amount of property tax.
-
-9. **property_types**: Descriptions of different property types.
-   - `id`: Unique identifier for the property type.
-   - `propertyType`: Type of property.
-   - `description`: Description of the property type.
-
-10. **sale_listings**: Details about properties listed for sale.
-    - `property_id`: Unique identifier for the property.
-    - `id`: Unique identifier for the listing.
-    - `status`: Current status of the listing (e.g., active, sold).
-    - `price`: Listing price.
-    - `listedDate`, `removedDate`, `createdDate`, `lastSeenDate`, `daysOnMarket`: Relevant dates and duration on market for the listing.
-
-11. **tax_assessments**: Valuation assessments for tax purposes.
-    - `assessment_id`: Unique identifier for the assessment.
-    - `property_id`: Unique identifier for the property.
-    - `year`: Year of the assessment.
-    - `total_value`, `land_value`, `improvements_value`: Total, land, and improvements valuation.
-
-Your job is to write and execute a query that answers the following question:
+"""
+Prompts of the natural-language agent.
+
+Instead of describing every table in prose, the question is sent with a compact schema built
+from the schema catalog: one line per table with its columns, types, row count and a short
+description. Only the tables relevant to the question are included, ranked by keyword overlap
+(or embedding similarity) with their names, columns and descriptions, up to a token budget.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from rentradar.db.catalog import SchemaCatalog, TableInfo
+
+DEFAULT_SCHEMA_TOKENS = 400
+# tables scoring below this fraction of the most relevant table are left out
+MIN_RELEVANCE = 0.3
+
+rr_template = """You are a SQL analyst querying a {dialect} database of real estate data.
+Relevant tables, as name(column type, ...) with row counts:
+{schema}
+
+Rows join on property_id. Write and execute a query that answers the following question:
 {query}
 """
+
+# replaces LangChain's SQL agent prefix, which has the agent list the tables and fetch their
+# schema before every query; the schema is already in the question
+agent_prefix = """You are an agent designed to interact with a SQL database.
+Given an input question, create a syntactically correct {dialect} query to run, then look at \
+the results of the query and return the answer. Unless the user specifies a specific number \
+of examples, limit your query to at most {top_k} results. Only select the columns relevant \
+to the question. The tables you need are described in the question, so query them directly \
+and only look up a table's schema if a query fails. Double check your query before executing \
+it. DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the database.
+"""
+
+TABLE_DESCRIPTIONS = {
+    "counties": "county names",
+    "current_market_stats": "current rent statistics per zip code and bedrooms",
+    "historic_market_stats": "monthly rent statistics per zip code and bedrooms",
+    "long_term_rentals": "rental listings: asking rent price, status, days on market",
+    "properties": "every property: address, location, type, year built, last sale",
+    "property_features": "bedrooms, bathrooms, square footage, amenities per property",
+    "property_owners": "owner names per property",
+    "property_taxes": "property tax paid per property and year",
+    "property_types": "property type descriptions",
+    "sale_listings": "for-sale listings: asking price, status, days on market",
+    "tax_assessments": "assessed land and improvement values per property and year",
+    "market_trends": (
+        "monthly median rent and sale price, rent-to-price ratio and year-over-year "
+        "change per zip code, county or all, and bedrooms"
+    ),
+    "rent_estimates": "estimated fair market rent per property",
+}
+HIDDEN_TABLES = frozenset({"rollup_state"})
+
+WORD_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|[0-9]+")
+STOP_WORDS = frozenset(
+    {"a", "an", "and", "are", "by", "for", "how", "in", "is", "many", "me", "of"}
+    | {"on", "or", "per", "show", "the", "to", "what", "which", "with"}
+)
+
+
+def keywords(text: str) -> Set[str]:
+    """
+    The words of `text`, split on case changes and underscores, lowercased and crudely
+    stemmed: "squareFootage" gives {"square", "footage"}, "properties" gives {"property"} and
+    both "owners" and "owns" give {"own"}.
+    """
+    words = (word.lower() for word in WORD_PATTERN.findall(text))
+    return {_stem(word) for word in words if word not in STOP_WORDS}
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    for suffix in ("ing", "ed", "er"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    """
+    The number of tokens of `text` for OpenAI models, or an estimate of four characters per
+    token where tiktoken is not installed.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
+
+
+def compact_table(table: TableInfo) -> str:
+    """A table as one line: `name(column TYPE, ...) ~rows rows -- description`."""
+    columns = ", ".join(f"{name} {data_type}" for name, data_type, _ in table.columns)
+    line = f"{table.name}({columns}) ~{table.row_count:,} rows"
+    description = TABLE_DESCRIPTIONS.get(table.name)
+    return f"{line} -- {description}" if description else line
+
+
+@dataclass
+class SchemaPrompt:
+    """
+    The schema sent with a question.
+
+    Attributes:
+        text (str): One line per selected table.
+        tables (List[str]): The selected tables, most relevant first.
+        tokens (int): The number of tokens of `text`.
+    """
+
+    text: str
+    tables: List[str]
+    tokens: int
+
+
+class SchemaPromptBuilder:
+    """
+    Builds the compact schema of the tables relevant to a question, from a schema catalog.
+
+    Tables are ranked by the question's keywords found in their name, column names and
+    description, each weighted by how few tables it is found in, and those scoring at least
+    `MIN_RELEVANCE` of the best are kept. With `embeddings` (LangChain `Embeddings`, or anything
+    with `embed_query` and `embed_documents`), tables are ranked by cosine similarity instead.
+    They are added in that order as long as the schema stays within `max_tokens`. A question
+    matching no table gets as much of the whole schema as fits.
+
+    Attributes:
+        catalog (SchemaCatalog): The tables to choose from.
+        max_tokens (int): The token budget of the schema.
+        embeddings: Optional embeddings used to rank tables instead of keywords.
+    """
+
+    def __init__(
+        self,
+        catalog: SchemaCatalog,
+        max_tokens: int = DEFAULT_SCHEMA_TOKENS,
+        embeddings: Any = None,
+    ) -> None:
+        self.catalog = catalog
+        self.max_tokens = max_tokens
+        self.embeddings = embeddings
+        tables = [
+            table
+            for name, table in catalog.tables.items()
+            if name not in HIDDEN_TABLES and not name.startswith("__")
+        ]
+        self.lines: Dict[str, str] = {
+            table.name: compact_table(table) for table in tables
+        }
+        self.tokens: Dict[str, int] = {
+            name: count_tokens(line) for name, line in self.lines.items()
+        }
+        self.keywords: Dict[str, Set[str]] = {
+            table.name: keywords(
+                " ".join([table.name, *table.column_names])
+                + " "
+                + TABLE_DESCRIPTIONS.get(table.name, "")
+            )
+            for table in tables
+        }
+        # words found in fewer tables say more about which table a question is about
+        counts = Counter(word for words in self.keywords.values() for word in words)
+        self.weights: Dict[str, float] = {
+            word: math.log(len(tables) / count) for word, count in counts.items()
+        }
+        self._vectors: Optional[np.ndarray] = None
+
+    def _table_vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            vectors = np.asarray(
+                self.embeddings.embed_documents(list(self.lines.values())),
+                dtype=np.float32,
+            )
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            self._vectors = vectors / np.where(norms == 0, 1, norms)
+        return self._vectors
+
+    def scores(self, question: str) -> Dict[str, float]:
+        """The relevance of every table to `question`; 0 for tables it doesn't mention."""
+        if self.embeddings is not None:
+            vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            similarities = self._table_vectors() @ (vector / norm if norm else vector)
+            return dict(zip(self.lines, similarities.tolist()))
+        words = keywords(question)
+        return {
+            name: sum(self.weights[word] for word in words & table_words)
+            for name, table_words in self.keywords.items()
+        }
+
+    def build(self, question: str) -> SchemaPrompt:
+        scores = self.scores(question)
+        ranked = sorted(self.lines, key=lambda name: scores[name], reverse=True)
+        if not ranked or scores[ranked[0]] <= 0:
+            ranked = list(self.lines)
+        elif self.embeddings is None:
+            cutoff = MIN_RELEVANCE * scores[ranked[0]]
+            ranked = [name for name in ranked if scores[name] >= cutoff]
+
+        selected, tokens = [], 0
+        for name in ranked:
+            # one more token for the newline between tables
+            if tokens + self.tokens[name] + 1 > self.max_tokens:
+                continue
+            selected.append(name)
+            tokens += self.tokens[name] + 1
+        text = "\n".join(self.lines[name] for name in selected)
+        return SchemaPrompt(text=text, tables=selected, tokens=count_tokens(text))
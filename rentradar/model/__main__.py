@@ -0,0 +1,30 @@
+"""
+Trains the rent estimator and stores a fair rent estimate for every property.
+
+Usage:
+    python -m rentradar.model --db rentradar/db/rentradar.db
+"""
+
+import argparse
+import logging
+
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.model.rent_estimator import RENT_ESTIMATES_TABLE, RentEstimator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="rentradar/db/rentradar.db")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with DuckDBManager(args.db) as db:
+        estimator = RentEstimator(db)
+        estimates = estimator.run()
+    for name, value in estimator.metrics.items():
+        print(f"{name:24} {value:>10,.3f}")
+    print(f"Stored {len(estimates):,} estimates in '{RENT_ESTIMATES_TABLE}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Comparable-properties (comps) engine.
+
+Every property is embedded as a vector of appraiser-style normalized features, where one unit
+of distance is about one kilometer, one bedroom or bathroom, `FEATURE_SCALES["squareFootage"]`
+square feet or `FEATURE_SCALES["yearBuilt"]` years of age. A different property type costs
+`PROPERTY_TYPE_WEIGHT` units, so comps of another type only show up when nothing of the same
+type is close. A KD-tree per listing kind (rentals and sale listings) indexes the listed
+properties, together with the columns a comp is displayed with, so a lookup never touches the
+database.
+
+The index is built offline and persisted next to the database; agents load it once per process
+and reload it when the file changes.
+
+Usage:
+    python -m rentradar.model.comps --db rentradar/db/rentradar.db
+"""
+
+import argparse
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from rentradar.db.spatial import EARTH_RADIUS_KM, KM_PER_DEGREE
+from rentradar.utils.utils import column_to_list
+
+if TYPE_CHECKING:
+    from rentradar.db.duckdb import DuckDBManager
+
+logger = logging.getLogger(__name__)
+
+COMP_KINDS = {"rent": "long_term_rentals", "sale": "sale_listings"}
+
+# feature units: the amount of each feature that counts as much as one km of distance
+FEATURE_SCALES = {
+    "bedrooms": 1.0,
+    "bathrooms": 1.0,
+    "squareFootage": 250.0,
+    "yearBuilt": 15.0,
+}
+PROPERTY_TYPE_WEIGHT = 10.0
+
+COMP_COLUMNS = [
+    "property_id",
+    "formattedAddress",
+    "propertyType",
+    "latitude",
+    "longitude",
+    *FEATURE_SCALES,
+]
+LISTING_COLUMNS = ["price", "status", "listedDate"]
+
+PROPERTIES_QUERY = """
+SELECT {columns}
+FROM properties p
+LEFT JOIN property_features f USING (property_id)
+WHERE p.latitude IS NOT NULL AND p.longitude IS NOT NULL
+"""
+
+# the latest listing of each property
+LISTINGS_QUERY = """
+SELECT
+    property_id,
+    arg_max(price, coalesce(listedDate, lastSeenDate)) AS price,
+    arg_max(status, coalesce(listedDate, lastSeenDate)) AS status,
+    max(listedDate) AS listedDate
+FROM {table}
+WHERE price > 0
+GROUP BY property_id
+"""
+
+_loaded: Dict[str, Tuple[float, "CompsIndex"]] = {}
+_load_lock = threading.Lock()
+
+
+def comps_index_path(db_path: str) -> str:
+    """Where the comps index of a database is stored: next to it, e.g. `rentradar.comps`."""
+    return os.path.splitext(db_path)[0] + ".comps"
+
+
+def embed(properties: pd.DataFrame) -> np.ndarray:
+    """
+    The normalized feature vectors of `properties`: location in km on a plane tangent at the
+    median latitude, the `FEATURE_SCALES` features (missing values take the median) and a
+    one-hot property type weighted by `PROPERTY_TYPE_WEIGHT`.
+    """
+    origin = np.radians(properties["latitude"].median())
+    columns = [
+        properties["latitude"].to_numpy() * KM_PER_DEGREE,
+        properties["longitude"].to_numpy() * KM_PER_DEGREE * np.cos(origin),
+    ]
+    for name, scale in FEATURE_SCALES.items():
+        values = properties[name]
+        columns.append(values.fillna(values.median()).fillna(0).to_numpy() / scale)
+    property_types = properties["propertyType"].fillna("Unknown")
+    for property_type in sorted(property_types.unique()):
+        columns.append(
+            (property_types == property_type).to_numpy() * PROPERTY_TYPE_WEIGHT
+        )
+    return np.column_stack(columns).astype(np.float64)
+
+
+def haversine_km(
+    origin: Tuple[float, float], latitudes: np.ndarray, longitudes: np.ndarray
+) -> np.ndarray:
+    lat, lon = np.radians(origin[0]), np.radians(origin[1])
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+    a = (
+        np.sin((latitudes - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(latitudes) * np.sin((longitudes - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+@dataclass
+class CompsIndex:
+    """
+    Nearest-neighbor index over the listed properties of a database.
+
+    Attributes:
+        property_ids (np.ndarray): Every indexed property_id, sorted, for subject lookups.
+        vectors (np.ndarray): The normalized feature vector of each of `property_ids`.
+        locations (np.ndarray): The (latitude, longitude) of each of `property_ids`.
+        trees (Dict): One KD-tree per comp kind over the vectors of the listed properties.
+        listings (Dict): Per comp kind, the display columns of the tree's rows.
+        built_at (str): When the index was built (UTC, ISO 8601).
+    """
+
+    property_ids: np.ndarray
+    vectors: np.ndarray
+    locations: np.ndarray
+    trees: Dict[str, object]
+    listings: Dict[str, Dict[str, np.ndarray]]
+    built_at: str
+
+    @classmethod
+    def build(cls, db: "DuckDBManager", leaf_size: int = 40) -> "CompsIndex":
+        """Embeds every located property and indexes the latest listing of each kind."""
+        from sklearn.neighbors import KDTree
+
+        features = ", ".join(
+            f"CAST({name} AS DOUBLE) AS {name}" for name in FEATURE_SCALES
+        )
+        columns = "p.property_id, p.formattedAddress, p.propertyType, p.latitude, "
+        properties = db.conn.execute(
+            PROPERTIES_QUERY.format(columns=columns + f"p.longitude, {features}")
+        ).df()
+        properties = properties.sort_values("property_id", ignore_index=True)
+        vectors = embed(properties)
+
+        trees, listings = {}, {}
+        tables = set(db.list_tables()["name"])
+        positions = pd.Series(properties.index, index=properties["property_id"])
+        for kind, table in COMP_KINDS.items():
+            if table not in tables:
+                continue
+            listed = db.conn.execute(LISTINGS_QUERY.format(table=table)).df()
+            listed = listed[listed["property_id"].isin(positions.index)]
+            rows = positions.loc[listed["property_id"]].to_numpy()
+            if not len(rows):
+                continue
+            trees[kind] = KDTree(vectors[rows], leaf_size=leaf_size)
+            listings[kind] = {
+                **{name: properties[name].to_numpy()[rows] for name in COMP_COLUMNS},
+                **{name: listed[name].to_numpy() for name in LISTING_COLUMNS},
+            }
+            logger.info("Indexed %s %s comps", len(rows), kind)
+
+        return cls(
+            property_ids=properties["property_id"].to_numpy(),
+            vectors=vectors,
+            locations=properties[["latitude", "longitude"]].to_numpy(),
+            trees=trees,
+            listings=listings,
+            built_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def query(
+        self, property_id: str, k: int = 10, kind: str = "rent"
+    ) -> Dict[str, list]:
+        """
+        The `k` listed properties of `kind` ("rent" or "sale") most similar to `property_id`,
+        most similar first, as columns. The subject itself is left out; unknown properties
+        have no comps.
+        """
+        if kind not in COMP_KINDS:
+            raise ValueError(f"kind must be one of {sorted(COMP_KINDS)}, got {kind!r}")
+        row = np.searchsorted(self.property_ids, property_id)
+        if (
+            kind not in self.trees
+            or row == len(self.property_ids)
+            or self.property_ids[row] != property_id
+        ):
+            return {}
+
+        tree, listings = self.trees[kind], self.listings[kind]
+        count = min(k + 1, len(listings["property_id"]))
+        distances, rows = tree.query(self.vectors[row : row + 1], k=count)
+        distances, rows = distances[0], rows[0]
+        keep = listings["property_id"][rows] != property_id
+        distances, rows = distances[keep][:k], rows[keep][:k]
+
+        columns = {
+            name: column_to_list(values[rows]) for name, values in listings.items()
+        }
+        columns["similarity_distance"] = distances.tolist()
+        columns["distance_km"] = haversine_km(
+            self.locations[row], listings["latitude"][rows], listings["longitude"][rows]
+        ).tolist()
+        return columns
+
+    def save(self, path: str) -> None:
+        """Writes the index to `path`, replacing it atomically."""
+        tmp_path = f"{path}.tmp"
+        # fields rather than the instance, so the file loads however this module was imported
+        joblib.dump(vars(self), tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompsIndex":
+        return cls(**joblib.load(path))
+
+
+def get_comps_index(path: str) -> CompsIndex:
+    """
+    The comps index stored at `path`, loaded once per process and reloaded when the file is
+    rebuilt.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"No comps index at {path}; build it with `python -m rentradar.model.comps`"
+        ) from None
+    with _load_lock:
+        loaded = _loaded.get(path)
+        if loaded is None or loaded[0] != mtime:
+            loaded = (mtime, CompsIndex.load(path))
+            _loaded[path] = loaded
+            logger.info("Loaded comps index %s (built %s)", path, loaded[1].built_at)
+    return loaded[1]
+
+
+def build_comps_index(db: "DuckDBManager") -> CompsIndex:
+    """Builds the comps index of `db` and stores it next to the database."""
+    index = CompsIndex.build(db)
+    index.save(comps_index_path(db.db_path))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default="rentradar/db/rentradar.db")
+    args = parser.parse_args()
+
+    from rentradar.db.duckdb import DuckDBManager
+
+    logging.basicConfig(level=logging.INFO)
+    with DuckDBManager(args.db, read_only=True) as db:
+        index = build_comps_index(db)
+    for kind, listings in index.listings.items():
+        print(f"{kind:8} {len(listings['property_id']):>10,} comps")
+
+
+if __name__ == "__main__":
+    main()
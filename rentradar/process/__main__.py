@@ -0,0 +1,34 @@
+"""
+Builds the RentRadar tables from raw RentCast exports and loads them into DuckDB.
+
+Usage:
+    python -m rentradar.process --raw-dir data/raw --prefix cville --db rentradar/db/rentradar.db
+"""
+
+import argparse
+import logging
+
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.process.process_rentcast_data import RentCastData
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--raw-dir", default="data/raw")
+    parser.add_argument("--prefix", default="cville")
+    parser.add_argument("--db", default="rentradar/db/rentradar.db")
+    parser.add_argument(
+        "--tables", nargs="*", help="Only load these tables (default: all)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    data = RentCastData.from_directory(args.raw_dir, args.prefix)
+    with DuckDBManager(args.db) as db:
+        loaded = data.seed(db, args.tables)
+    for table_name, rows in loaded.items():
+        print(f"{table_name:24} {rows:>10,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+import ast
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.db.rollups import refresh_market_trends
+from rentradar.db.spatial import build_spatial_index
+from rentradar.utils.utils import batch_uuid5
+
+logger = logging.getLogger(__name__)
+
+RAW_FILES = {
+    "properties": "properties",
+    "long_term_rentals": "long_term_rentals",
+    "sale_listings": "sale_listings",
+    "markets_current": "current_market_stats",
+    "markets_history": "historical_market_stats",
+}
+
+COUNTY_ALIASES = {
+    "Albemarle": "Albemarle County",
+    "Charlottesville": "Charlottesville City",
+    "Charlottesville City County": "Charlottesville City",
+    "Fluvanna": "Fluvanna County",
+}
+
+COUNTY_SUFFIXES = ("County", "City", "Parish", "Borough")
+
+PROPERTY_TYPE_MAP = {
+    "Multi Family": "Multi-Family",
+    "Single Family": "Single-Family",
+    "Duplex-Triplex": "Multi-Family",
+}
+
+PROPERTY_TYPE_DESCRIPTIONS = {
+    "Apartment": "A commercial multi-family building or apartment complex (5+ units)",
+    "Condo": "A single unit in a condominium development or building, which is part of a homeowner’s association (HOA)",
+    "Multi-Family": "A residential multi-family building (2-4 units)",
+    "Land": "A single parcel of vacant, undeveloped land",
+    "Manufactured": "A pre-fabricated or mobile home, typically constructed at a factory",
+    "Single-Family": "A detached, single-family property",
+    "Townhouse": "A single-family property that shares walls with other adjacent homes, and is typically part of a homeowner’s association (HOA)",
+    "Vacant": "A property that is unoccupied",
+}
+
+DEFAULT_PROPERTY_TYPE_DESCRIPTION = "A miscellaneous property type"
+
+PROPERTY_COLUMNS = [
+    "property_id",
+    "id",
+    "formattedAddress",
+    "zipCode",
+    "county",
+    "subdivision",
+    "latitude",
+    "longitude",
+    "propertyType",
+    "ownerOccupied",
+    "yearBuilt",
+    "lastSaleDate",
+    "lastSalePrice",
+    "zoning",
+    "assessorID",
+    "legalDescription",
+]
+
+FEATURE_COLUMNS = [
+    "property_id",
+    "bedrooms",
+    "bathrooms",
+    "squareFootage",
+    "lotSize",
+    "floorCount",
+    "garage",
+    "garageType",
+    "architectureType",
+    "exteriorType",
+    "heating",
+    "heatingType",
+    "cooling",
+    "coolingType",
+    "unitCount",
+    "garageSpaces",
+    "roofType",
+    "foundationType",
+    "roomCount",
+    "fireplace",
+    "fireplaceType",
+    "pool",
+    "poolType",
+    "viewType",
+]
+
+LISTING_COLUMNS = {
+    "long_term_rentals": [
+        "property_id",
+        "id",
+        "price",
+        "status",
+        "daysOnMarket",
+        "listedDate",
+        "createdDate",
+        "lastSeenDate",
+        "removedDate",
+    ],
+    "sale_listings": [
+        "property_id",
+        "id",
+        "status",
+        "price",
+        "listedDate",
+        "removedDate",
+        "createdDate",
+        "lastSeenDate",
+        "daysOnMarket",
+    ],
+}
+
+
+def _parse_value(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return ast.literal_eval(value)
+
+
+def parse_nested(values: pd.Series) -> pd.Series:
+    """
+    Parses a column of nested RentCast values (features, owner, taxAssessments, ...). Values
+    may already be dicts (straight from the API), JSON strings (written by the ingest sinks) or
+    Python reprs (CSV exports of the raw DataFrames). Nulls and empty values are dropped.
+    """
+    values = values.dropna()
+    try:
+        # a column of JSON strings parses in a single call
+        parsed = json.loads("[" + ",".join(values) + "]")
+    except (TypeError, ValueError):
+        parsed = [_parse_value(value) for value in values]
+    parsed = pd.Series(parsed, index=values.index, dtype=object)
+    return parsed[parsed.map(bool)]
+
+
+def normalize_county(counties: pd.Series, aliases: Dict[str, str]) -> pd.Series:
+    """
+    Maps county spellings onto one name per county: known aliases first, then a " County"
+    suffix for bare names.
+    """
+    counties = counties.str.strip().replace(aliases)
+    bare = counties.notna() & ~counties.str.endswith(COUNTY_SUFFIXES, na=False)
+    return counties.mask(bare, counties + " County")
+
+
+def normalize_properties(
+    properties: pd.DataFrame, county_aliases: Optional[Dict[str, str]] = None
+) -> pd.DataFrame:
+    """
+    Adds `property_id` and cleans up the county and property type columns of the raw
+    properties. Properties without a county take the most common county of their zip code.
+    """
+    properties = properties.drop_duplicates(subset="id").reset_index(drop=True)
+    properties["property_id"] = batch_uuid5(properties["id"])
+    properties["propertyType"] = properties["propertyType"].replace(PROPERTY_TYPE_MAP)
+
+    county = normalize_county(
+        properties["county"].astype(object),
+        COUNTY_ALIASES if county_aliases is None else county_aliases,
+    )
+    missing = county.isna()
+    if missing.any():
+        zip_county = (
+            pd.DataFrame({"zipCode": properties["zipCode"], "county": county})
+            .dropna()
+            .groupby(["zipCode", "county"])
+            .size()
+            .sort_values(ascending=False)
+            .reset_index()
+            .drop_duplicates(subset="zipCode")
+            .set_index("zipCode")["county"]
+        )
+        county = county.fillna(properties["zipCode"].map(zip_county))
+    properties["county"] = county
+    return properties
+
+
+def build_counties(properties: pd.DataFrame) -> pd.DataFrame:
+    counties = pd.Series(properties["county"].dropna().unique(), dtype=object)
+    return pd.DataFrame({"id": batch_uuid5(counties), "county": counties})
+
+
+def build_property_types(properties: pd.DataFrame) -> pd.DataFrame:
+    property_types = pd.Series(
+        properties["propertyType"].dropna().unique(), dtype=object
+    )
+    descriptions = property_types.map(PROPERTY_TYPE_DESCRIPTIONS).fillna(
+        DEFAULT_PROPERTY_TYPE_DESCRIPTION
+    )
+    return pd.DataFrame(
+        {
+            "id": batch_uuid5(property_types),
+            "propertyType": property_types,
+            "description": descriptions,
+        }
+    )
+
+
+def _explode_years(
+    properties: pd.DataFrame, column: str, fields: Dict[str, str]
+) -> pd.DataFrame:
+    """
+    Turns a column of `{year: {...}}` dicts into one row per property and year, keeping
+    `fields` (source key -> output column) from each year's record.
+    """
+    parsed = parse_nested(properties[column]) if column in properties else pd.Series()
+    positions = np.repeat(parsed.index.to_numpy(), parsed.map(len).to_numpy(dtype=int))
+    # iterating keys and values separately avoids allocating an (year, record) tuple per row
+    records = pd.DataFrame.from_records(
+        [record for value in parsed for record in value.values()], columns=list(fields)
+    ).rename(columns=fields)
+    records.insert(0, "year", [str(year) for value in parsed for year in value])
+    records.insert(0, "property_id", properties["property_id"].to_numpy()[positions])
+    return records
+
+
+def build_tax_assessments(properties: pd.DataFrame) -> pd.DataFrame:
+    assessments = _explode_years(
+        properties,
+        "taxAssessments",
+        {
+            "value": "total_value",
+            "land": "land_value",
+            "improvements": "improvements_value",
+        },
+    )
+    assessments.insert(
+        0,
+        "assessment_id",
+        batch_uuid5(assessments["property_id"] + assessments["year"]),
+    )
+    return assessments
+
+
+def build_property_taxes(properties: pd.DataFrame) -> pd.DataFrame:
+    taxes = _explode_years(properties, "propertyTaxes", {"total": "total"})
+    taxes.insert(
+        0, "property_tax_id", batch_uuid5(taxes["property_id"] + taxes["year"])
+    )
+    return taxes
+
+
+def build_property_features(properties: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per property: the size columns from `properties` plus the flattened `features`.
+    """
+    features = properties.reindex(
+        columns=["property_id", "bedrooms", "bathrooms", "squareFootage", "lotSize"]
+    )
+    if "features" in properties:
+        parsed = parse_nested(properties["features"])
+        expanded = pd.json_normalize(parsed.tolist())
+        expanded.index = parsed.index
+        features = features.join(
+            expanded.drop(columns=features.columns, errors="ignore")
+        )
+    return features.reindex(columns=FEATURE_COLUMNS)
+
+
+def build_property_owners(properties: pd.DataFrame) -> pd.DataFrame:
+    """
+    The first listed owner of each property, keyed by a UUID derived from the owner's name.
+    """
+    if "owner" not in properties:
+        return pd.DataFrame(columns=["owner_id", "property_id", "owner"])
+    names = parse_nested(properties["owner"]).str.get("names").str.get(0).dropna()
+    return pd.DataFrame(
+        {
+            "owner_id": batch_uuid5(names),
+            "property_id": properties["property_id"].to_numpy()[names.index.to_numpy()],
+            "owner": names.to_numpy(),
+        }
+    )
+
+
+def build_properties(properties: pd.DataFrame) -> pd.DataFrame:
+    return properties.reindex(columns=PROPERTY_COLUMNS)
+
+
+def prepare_listings(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    """
+    Shapes raw RentCast listings like the `long_term_rentals`/`sale_listings` tables: derives
+    property_id from the listing id and keeps the table's columns. Listings RentCast reports
+    as removed are marked Inactive.
+    """
+    df = df.reindex(columns=LISTING_COLUMNS[table_name])
+    for column in (
+        "status",
+        "listedDate",
+        "createdDate",
+        "lastSeenDate",
+        "removedDate",
+    ):
+        df[column] = df[column].astype(object)
+    df["property_id"] = batch_uuid5(df["id"])
+    df.loc[df["removedDate"].notna(), "status"] = "Inactive"
+    return df
+
+
+@dataclass
+class RentCastData:
+    """
+    Raw RentCast exports for one market and the normalization that turns them into the
+    RentRadar tables.
+
+    Attributes:
+        properties (pd.DataFrame): Raw `/properties` records.
+        long_term_rentals (pd.DataFrame): Raw `/listings/rental/long-term` records.
+        sale_listings (pd.DataFrame): Raw `/listings/sale` records.
+        markets_current (pd.DataFrame): Current market statistics.
+        markets_history (pd.DataFrame): Historical market statistics.
+        county_aliases (Dict[str, str]): County spellings to normalize, beyond adding a
+            " County" suffix to bare names.
+    """
+
+    properties: pd.DataFrame
+    long_term_rentals: pd.DataFrame = field(default_factory=pd.DataFrame)
+    sale_listings: pd.DataFrame = field(default_factory=pd.DataFrame)
+    markets_current: pd.DataFrame = field(default_factory=pd.DataFrame)
+    markets_history: pd.DataFrame = field(default_factory=pd.DataFrame)
+    county_aliases: Dict[str, str] = field(default_factory=lambda: dict(COUNTY_ALIASES))
+
+    @classmethod
+    def from_directory(cls, directory: str, prefix: str) -> "RentCastData":
+        """
+        Reads `<prefix>_properties`, `<prefix>_long_term_rentals`, ... from `directory`,
+        preferring Parquet over CSV. Missing listing and market files load as empty frames.
+        """
+        frames = {}
+        for attribute, name in RAW_FILES.items():
+            base = os.path.join(directory, f"{prefix}_{name}")
+            if os.path.exists(f"{base}.parquet"):
+                frames[attribute] = pd.read_parquet(f"{base}.parquet")
+            elif os.path.exists(f"{base}.csv"):
+                frames[attribute] = pd.read_csv(f"{base}.csv")
+            elif attribute == "properties":
+                raise FileNotFoundError(
+                    f"No properties file found at {base}.parquet/.csv"
+                )
+        return cls(**frames)
+
+    @property
+    def zipcodes(self) -> np.ndarray:
+        return self.properties["zipCode"].dropna().unique()
+
+    @property
+    def counties(self) -> np.ndarray:
+        return self.properties["county"].dropna().unique()
+
+    def build_tables(self) -> Dict[str, pd.DataFrame]:
+        """
+        Builds every RentRadar table from the raw frames. Tables without source data are left
+        out.
+        """
+        properties = normalize_properties(self.properties, self.county_aliases)
+        tables = {
+            "counties": build_counties(properties),
+            "property_types": build_property_types(properties),
+            "tax_assessments": build_tax_assessments(properties),
+            "property_taxes": build_property_taxes(properties),
+            "property_features": build_property_features(properties),
+            "property_owners": build_property_owners(properties),
+            "properties": build_properties(properties),
+        }
+        for table_name in LISTING_COLUMNS:
+            listings = getattr(self, table_name)
+            if not listings.empty:
+                tables[table_name] = prepare_listings(listings, table_name)
+        if not self.markets_current.empty:
+            tables["current_market_stats"] = self.markets_current
+        if not self.markets_history.empty:
+            tables["historic_market_stats"] = self.markets_history
+        return tables
+
+    def seed(
+        self, db: DuckDBManager, tables: Optional[List[str]] = None
+    ) -> Dict[str, int]:
+        """
+        Builds the tables and loads them into `db`, replacing existing tables, and indexes the
+        property locations (see `rentradar.db.spatial`) and refreshes the market rollups (see
+        `rentradar.db.rollups`). Returns the number of rows loaded per table.
+        """
+        loaded = {}
+        for table_name, df in self.build_tables().items():
+            if tables is not None and table_name not in tables:
+                continue
+            db.table_from_dataframe(df, table_name)
+            loaded[table_name] = len(df)
+            logger.info("Loaded %s rows into '%s'", len(df), table_name)
+        if "properties" in loaded:
+            build_spatial_index(db)
+        refresh_market_trends(db)
+        return loaded
@@ -1,7 +1,13 @@
+import dataclasses
+import hashlib
 import uuid
+from typing import Dict, Iterable, List, Type, TypeVar
 
+import numpy as np
 import pandas as pd
 
+T = TypeVar("T")
+
 
 def string_to_uuid(input_string):
     namespace = uuid.NAMESPACE_DNS
@@ -9,6 +15,32 @@ def string_to_uuid(input_string):
     return result_uuid
 
 
+def _uuid5_string(namespace: bytes, name: str) -> str:
+    h = hashlib.sha1(namespace + name.encode()).hexdigest()
+    variant = "89ab"[int(h[16], 16) & 3]
+    return f"{h[:8]}-{h[8:12]}-5{h[13:16]}-{variant}{h[17:20]}-{h[20:32]}"
+
+
+def batch_uuid5(values: Iterable) -> List[str]:
+    """
+    Vectorized `string_to_uuid` for a whole column: each distinct value is hashed once and the
+    UUIDs are returned as strings, skipping the per-row `uuid.UUID` objects.
+
+    Args:
+        values (Iterable): The values to derive UUIDs from. Nulls map to None.
+
+    Returns:
+        List[str]: `str(string_to_uuid(str(value)))` for each value, in order.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    namespace = uuid.NAMESPACE_DNS.bytes
+    ids = np.array(
+        [_uuid5_string(namespace, str(value)) for value in uniques] + [None],
+        dtype=object,
+    )
+    return ids[codes].tolist()
+
+
 def convert_nan_to_none(data: dict) -> dict:
     """
     Recursively converts all occurrences of numpy.nan in a dictionary to None.
@@ -30,3 +62,48 @@ def convert_nan_to_none(data: dict) -> dict:
         else:
             data[key] = None if pd.isna(value) else value
     return data
+
+
+def column_to_list(values: np.ndarray) -> list:
+    """
+    Converts a (possibly masked) NumPy column into a list of Python objects, replacing nulls
+    and NaNs with None in a single vectorized pass instead of checking each value.
+
+    Args:
+        values (np.ndarray): The column, as returned by DuckDB's `fetchnumpy`.
+
+    Returns:
+        list: The column values with every null replaced by None.
+    """
+    mask = np.ma.getmaskarray(values)
+    data = np.ma.getdata(values)
+    if data.dtype.kind == "f":
+        mask = mask | np.isnan(data)
+    if not mask.any():
+        return data.tolist()
+    objects = data.astype(object)
+    objects[mask] = None
+    return objects.tolist()
+
+
+def build_objects(cls: Type[T], columns: Dict[str, list]) -> List[T]:
+    """
+    Constructs instances of a dataclass (e.g. a Strawberry type) from column lists, using only
+    the columns that match the class's init fields.
+
+    Args:
+        cls (Type[T]): The dataclass to construct.
+        columns (Dict[str, list]): Column name to null-cleaned values, as returned by
+            `DuckDBManager.fetch_columns`.
+
+    Returns:
+        List[T]: One instance per row.
+    """
+    names = [
+        field.name
+        for field in dataclasses.fields(cls)
+        if field.init and field.name in columns
+    ]
+    if not names:
+        return []
+    return [cls(**dict(zip(names, row))) for row in zip(*(columns[n] for n in names))]
@@ -0,0 +1,83 @@
+import time
+
+from rentradar.db.cache import (
+    QueryCache,
+    TableVersions,
+    VersionedResource,
+    database_version,
+    referenced_tables,
+)
+from rentradar.db.duckdb import DuckDBManager
+
+
+def make_cache(**kwargs):
+    return QueryCache(versions=TableVersions(), **kwargs)
+
+
+def test_referenced_tables():
+    query = (
+        "SELECT * FROM long_term_rentals WHERE property_id IN "
+        "(SELECT property_id FROM properties WHERE zipCode = ?)"
+    )
+    assert referenced_tables(query) == {"long_term_rentals", "properties"}
+
+
+def test_cache_hits_until_table_is_replaced():
+    cache = make_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"id": [len(calls)]}
+
+    query = "SELECT * FROM properties WHERE property_id IN (SELECT UNNEST(?))"
+    assert cache.get_or_compute("db", query, (["a", "b"],), compute) == {"id": [1]}
+    assert cache.get_or_compute("db", query, (["a", "b"],), compute) == {"id": [1]}
+
+    cache.versions.bump("db", "properties")
+    assert cache.get_or_compute("db", query, (["a", "b"],), compute) == {"id": [2]}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_cache_expires_and_evicts():
+    cache = make_cache(ttl=0)
+    cache.get_or_compute("db", "SELECT 1 FROM t", None, lambda: {"a": [1]})
+    cache.get_or_compute("db", "SELECT 1 FROM t", None, lambda: {"a": [1]})
+    assert cache.stats()["expirations"] == 1
+
+    cache = make_cache(max_bytes=5000)
+    for i in range(10):
+        cache.get_or_compute("db", f"SELECT {i} FROM t", None, lambda: {"a": [0] * 50})
+    stats = cache.stats()
+    assert stats["evictions"] > 0
+    assert 0 < stats["bytes"] <= 5000
+
+
+def test_database_version_changes_on_writes(tmp_path):
+    path = str(tmp_path / "version.db")
+    assert database_version(path) == 0.0
+    with DuckDBManager(path) as db:
+        db.execute_query("CREATE TABLE t AS SELECT 1 AS a")
+    before = database_version(path)
+    assert before > 0
+    time.sleep(0.01)
+    with DuckDBManager(path) as db:
+        db.execute_query("INSERT INTO t VALUES (2)")
+    assert database_version(path) > before
+
+
+def test_versioned_resource_closes_replaced_resources():
+    created, closed = [], []
+
+    def create():
+        created.append(len(created))
+        return created[-1]
+
+    resources = VersionedResource(create, closed.append)
+    assert resources.get(1.0) == resources.get(1.0) == 0
+    assert resources.get(2.0) == 1
+    assert closed == [0]
+    # a version read before the reload keeps the current resource
+    assert resources.get(1.0) == 1
+    assert closed == [0]
@@ -0,0 +1,69 @@
+import os
+import time
+
+import pandas as pd
+
+from rentradar.db import catalog as catalog_module
+from rentradar.db.catalog import catalog_path, get_schema_catalog
+from rentradar.db.duckdb import DuckDBManager
+
+
+def make_db(path):
+    with DuckDBManager(path) as db:
+        db.table_from_dataframe(
+            pd.DataFrame({"id": ["a", "b", "c", "d"], "county": "Albemarle County"}),
+            "counties",
+        )
+        db.execute_query(
+            "CREATE TABLE property_types (id VARCHAR NOT NULL, description VARCHAR)"
+        )
+
+
+def test_catalog_describes_tables_for_the_landing_page_and_agent(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    make_db(path)
+    catalog = get_schema_catalog(path)
+
+    assert list(catalog.tables) == ["counties", "property_types"]
+    counties = catalog.tables["counties"]
+    assert counties.row_count == 4
+    assert counties.sample_rows == [
+        ["a", "Albemarle County"],
+        ["b", "Albemarle County"],
+        ["c", "Albemarle County"],
+    ]
+    assert catalog.table_info()["property_types"].startswith(
+        "CREATE TABLE property_types (\n\tid VARCHAR NOT NULL,\n\tdescription VARCHAR\n)"
+    )
+    assert "3 rows from counties table:\nid\tcounty\na\tAlbemarle County" in (
+        catalog.table_info()["counties"]
+    )
+
+    with DuckDBManager(path, read_only=True) as db:
+        pd.testing.assert_frame_equal(catalog.to_frame(), db.get_database_schema())
+    assert catalog.to_frame().loc[("counties", 1), "name"] == "county"
+
+
+def test_catalog_is_cached_in_memory_and_on_disk_until_the_database_changes(
+    tmp_path, monkeypatch
+):
+    path = str(tmp_path / "catalog.db")
+    make_db(path)
+    catalog = get_schema_catalog(path)
+    assert get_schema_catalog(path) is catalog
+    assert os.path.exists(catalog_path(path))
+
+    # a new process loads the stored catalog instead of introspecting the database
+    monkeypatch.setattr(catalog_module, "_loaded", {})
+    with monkeypatch.context() as patch:
+        patch.setattr(catalog_module.SchemaCatalog, "build", None)
+        loaded = get_schema_catalog(path)
+    assert loaded.version == catalog.version
+    assert loaded.table_info() == catalog.table_info()
+
+    time.sleep(0.01)
+    with DuckDBManager(path) as db:
+        db.execute_query("CREATE TABLE owners AS SELECT 1 AS owner_id")
+    rebuilt = get_schema_catalog(path)
+    assert rebuilt.version > catalog.version
+    assert "owners" in rebuilt.tables
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rentradar.db.duckdb import RentRadarQueryAgent
+from rentradar.model.comps import (
+    PROPERTY_TYPE_WEIGHT,
+    build_comps_index,
+    comps_index_path,
+    embed,
+    get_comps_index,
+)
+
+
+def make_properties():
+    rng = np.random.default_rng(1)
+    n = 300
+    properties = pd.DataFrame(
+        {
+            "property_id": [f"p{i:03d}" for i in range(n)],
+            "formattedAddress": [f"{i} Main St" for i in range(n)],
+            "propertyType": rng.choice(["Single-Family", "Condo"], n),
+            "latitude": 38.0 + rng.random(n) / 20,
+            "longitude": -78.5 + rng.random(n) / 20,
+            "yearBuilt": rng.integers(1950, 2020, n).astype(float),
+        }
+    )
+    features = pd.DataFrame(
+        {
+            "property_id": properties["property_id"],
+            "bedrooms": rng.integers(1, 5, n).astype(float),
+            "bathrooms": rng.integers(1, 3, n).astype(float),
+            "squareFootage": rng.integers(600, 3000, n).astype(float),
+        }
+    )
+    features.loc[5, "squareFootage"] = None
+    return properties, features
+
+
+@pytest.fixture
+def agent(tmp_path):
+    properties, features = make_properties()
+
+    def listings(ids):
+        return pd.DataFrame(
+            {
+                "id": ids,
+                "property_id": ids,
+                "price": 1500,
+                "status": "Active",
+                "listedDate": "2024-01-01",
+                "lastSeenDate": "2024-01-02",
+            }
+        )
+
+    with RentRadarQueryAgent(str(tmp_path / "comps.db")) as agent:
+        agent.table_from_dataframe(properties, "properties")
+        agent.table_from_dataframe(features, "property_features")
+        agent.table_from_dataframe(
+            listings(properties["property_id"][::2]), "long_term_rentals"
+        )
+        agent.table_from_dataframe(
+            listings(properties["property_id"][1::3]), "sale_listings"
+        )
+        build_comps_index(agent)
+        yield agent
+
+
+def test_comps_match_brute_force_nearest_neighbors(agent):
+    properties, features = make_properties()
+    rented = properties.index[::2]
+    properties = properties.merge(features, on="property_id")
+    vectors = embed(properties)
+
+    for subject in ["p000", "p005", "p101"]:
+        row = properties.index[properties["property_id"] == subject][0]
+        distances = np.linalg.norm(vectors[rented] - vectors[row], axis=1)
+        order = np.argsort(distances, kind="stable")
+        order = [i for i in order if rented[i] != row][:5]
+
+        comps = agent.comps(subject, k=5)
+
+        assert comps["property_id"] == properties["property_id"][rented[order]].tolist()
+        assert comps["similarity_distance"] == pytest.approx(distances[order].tolist())
+        assert subject not in comps["property_id"]
+        assert comps["price"] == [1500] * 5
+        # comps of another property type are at least PROPERTY_TYPE_WEIGHT away
+        subject_type = properties["propertyType"][row]
+        for property_type, distance in zip(
+            comps["propertyType"], comps["similarity_distance"]
+        ):
+            assert property_type == subject_type or distance >= PROPERTY_TYPE_WEIGHT
+
+
+def test_comps_kinds_unknown_properties_and_rebuilds(agent):
+    sales = agent.comps("p000", k=3, kind="sale")
+    assert len(sales["property_id"]) == 3
+    assert all(int(property_id[1:]) % 3 == 1 for property_id in sales["property_id"])
+
+    assert agent.comps("missing", k=3) == {}
+    with pytest.raises(ValueError):
+        agent.comps("p000", kind="lease")
+
+    path = comps_index_path(agent.db_path)
+    index = get_comps_index(path)
+    assert get_comps_index(path) is index
+
+    agent.execute_query("DELETE FROM sale_listings")
+    rebuilt = build_comps_index(agent)
+    # the loaded index is replaced once the file changes
+    assert get_comps_index(path).built_at == rebuilt.built_at
+    assert agent.comps("p000", kind="sale") == {}
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+
+import pandas as pd
+import pytest
+
+from rentradar.db.duckdb import DuckDBConnectionPool, DuckDBManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "test.db")
+    with DuckDBManager(path) as db:
+        db.execute_query(
+            "CREATE TABLE properties AS "
+            "SELECT 'p' || i AS property_id, i AS zipCode FROM range(10) t(i)"
+        )
+    return path
+
+
+def test_pool_agent_borrows_connection(db_path):
+    with DuckDBConnectionPool(db_path) as pool:
+        with pool.agent() as agent:
+            columns = agent.get_property_by_id("p3")
+        assert columns == {"property_id": ["p3"], "zipCode": [3]}
+        # closing the agent must not close the shared cursor
+        assert (
+            pool.cursor().execute("SELECT count(*) FROM properties").fetchone()[0] == 10
+        )
+
+
+def test_pool_hands_each_thread_its_own_cursor(db_path):
+    cursors = {}
+
+    with DuckDBConnectionPool(db_path) as pool:
+
+        def borrow(name):
+            cursors[name] = pool.cursor()
+
+        threads = [threading.Thread(target=borrow, args=(i,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(cursor) for cursor in cursors.values()}) == 3
+        assert pool.cursor() is pool.cursor()
+
+
+def test_pool_hands_out_cursors_while_being_closed(db_path):
+    pool = DuckDBConnectionPool(db_path)
+    errors = []
+    stop = threading.Event()
+
+    def take_cursor():
+        try:
+            pool.cursor()
+        except Exception as e:
+            errors.append(e)
+
+    def borrow():
+        while not stop.is_set():
+            try:
+                with pool.agent(own_cursor=True):
+                    pass
+            except Exception as e:
+                errors.append(e)
+            # a new thread has no cursor yet, so it takes one from the shared handle
+            thread = threading.Thread(target=take_cursor)
+            thread.start()
+            thread.join()
+
+    threads = [threading.Thread(target=borrow) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(1000):
+        pool.close()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    pool.close()
+    assert errors == []
+
+
+def test_pool_runs_agent_methods_concurrently_off_the_event_loop(db_path):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def lookup(agent, property_id):
+        # every call waits for the other two, so this only passes if they overlap
+        barrier.wait()
+        return threading.current_thread(), agent.get_property_by_id(property_id)
+
+    async def resolve():
+        return await asyncio.gather(*(pool.run(lookup, f"p{i}") for i in range(3)))
+
+    with DuckDBConnectionPool(db_path, max_workers=3) as pool:
+        results = asyncio.run(resolve())
+
+    threads = {thread for thread, _ in results}
+    assert len(threads) == 3 and threading.current_thread() not in threads
+    assert [columns["zipCode"] for _, columns in results] == [[0], [1], [2]]
+
+
+def test_pool_is_read_only(db_path):
+    with DuckDBConnectionPool(db_path) as pool:
+        with pytest.raises(Exception):
+            pool.cursor().execute("DELETE FROM properties")
+
+
+def test_properties_page_uses_keyset_and_filters(db_path):
+    with DuckDBConnectionPool(db_path) as pool:
+        with pool.agent() as agent:
+            first_page = agent.get_properties_page(3)
+            next_page = agent.get_properties_page(
+                3, after=first_page["property_id"][-1]
+            )
+            filtered = agent.get_properties_page(10, zip_code=7)
+
+    assert first_page["property_id"] == ["p0", "p1", "p2"]
+    assert next_page["property_id"] == ["p3", "p4", "p5"]
+    assert filtered["property_id"] == ["p7"]
+
+
+def test_table_from_dataframe_modes(tmp_path):
+    with DuckDBManager(str(tmp_path / "load.db")) as db:
+        db.table_from_dataframe(pd.DataFrame({"id": ["a", "b"], "v": [1, 2]}), "t")
+        db.table_from_dataframe(
+            pd.DataFrame({"v": [3], "id": ["c"]}), "t", mode="append"
+        )
+        db.table_from_dataframe(
+            pd.DataFrame({"id": ["b", "d"], "v": [20, 4]}), "t", mode="upsert", key="id"
+        )
+        rows = db.execute_query("SELECT id, v FROM t ORDER BY id")
+        tables = db.list_tables()["name"].tolist()
+
+    assert rows.values.tolist() == [["a", 1], ["b", 20], ["c", 3], ["d", 4]]
+    assert tables == ["t"]
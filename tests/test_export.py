@@ -0,0 +1,111 @@
+import asyncio
+import io
+from contextlib import contextmanager
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+from rentradar.api import deploy
+from rentradar.api.deploy import app
+from rentradar.db.duckdb import DuckDBConnectionPool, DuckDBManager
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = str(tmp_path / "export.db")
+    n = 1000
+    with DuckDBManager(path) as db:
+        db.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "property_id": [f"p{i:04d}" for i in range(n)],
+                    "zipCode": [22901 + i % 3 for i in range(n)],
+                    "propertyType": "Condo",
+                }
+            ),
+            "properties",
+        )
+        db.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "id": [f"r{i:04d}" for i in range(n)],
+                    "property_id": [f"p{i:04d}" for i in range(n)],
+                    "price": [1000 + i for i in range(n)],
+                    "status": ["Active", "Inactive"] * (n // 2),
+                }
+            ),
+            "long_term_rentals",
+        )
+    pool = DuckDBConnectionPool(path, read_only=True)
+    monkeypatch.setattr("rentradar.api.deploy.pool", pool)
+    yield TestClient(app)
+    pool.close()
+
+
+def test_export_streams_filtered_tables_as_arrow_and_parquet(client):
+    params = {"zipCode": "22902", "status": "Active", "minPrice": "1500"}
+    response = client.get("/export/long_term_rentals", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    arrow = pa.ipc.open_stream(response.content).read_all()
+
+    response = client.get(
+        "/export/long_term_rentals", params={**params, "format": "parquet"}
+    )
+    assert response.headers["content-disposition"].endswith('.parquet"')
+    parquet = pq.read_table(io.BytesIO(response.content))
+
+    expected = [f"r{i:04d}" for i in range(500, 1000) if i % 3 == 1 and i % 2 == 0]
+    assert arrow["id"].to_pylist() == expected
+    assert arrow.equals(parquet)
+
+    response = client.get("/export/properties", params={"compression": "zstd"})
+    assert pa.ipc.open_stream(response.content).read_all().num_rows == 1000
+
+    for path, query in [
+        ("/export/property_owners", {}),
+        ("/export/properties", {"status": "Active"}),
+        ("/export/properties", {"zipCode": "north"}),
+        ("/export/properties", {"format": "csv"}),
+    ]:
+        assert client.get(path, params=query).status_code == 400
+
+
+def test_export_cursor_is_closed_when_the_client_disconnects_first(client, monkeypatch):
+    agents = []
+    agent = deploy.pool.agent
+
+    @contextmanager
+    def recording_agent(**kwargs):
+        with agent(**kwargs) as export_agent:
+            agents.append(export_agent)
+            yield export_agent
+
+    monkeypatch.setattr(deploy.pool, "agent", recording_agent)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/export/properties",
+        "query_string": b"",
+        "headers": [],
+        "path_params": {"table": "properties"},
+    }
+    response = deploy.export(Request(scope))
+    sent = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(response(scope, receive, send))
+    # the client left before the body started
+    assert not any(message.get("body") for message in sent)
+    with pytest.raises(duckdb.ConnectionException):
+        agents[0].conn.execute("SELECT 1")
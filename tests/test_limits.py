@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+import strawberry
+from graphql import parse
+
+from rentradar.api.deploy import schema
+from rentradar.api.graphql import RentRadarGraphQLAPI
+from rentradar.api.limits import QueryCostLimiter, query_cost
+from rentradar.api.loaders import RentRadarLoaders
+from rentradar.db.duckdb import DuckDBConnectionPool, DuckDBManager
+from rentradar.db.timeout import QueryTimeoutError, time_budget
+
+ALL_LISTINGS = "{ allLongTermRentals { id } allSaleListings { id } }"
+PAGE = """
+query ($first: Int!) {
+  properties(first: $first) {
+    edges { node { propertyId features { bedrooms } owners { owner } } }
+  }
+}
+"""
+
+
+def test_query_cost_counts_rows_pages_and_lists():
+    row_counts = {"long_term_rentals": 5000, "sale_listings": 2000}
+    assert query_cost(schema._schema, parse(ALL_LISTINGS), row_counts=row_counts) == (
+        7000
+    )
+    # 50 nodes, each with one feature set and up to ten owners
+    cost = query_cost(schema._schema, parse(PAGE), variables={"first": 50})
+    assert cost == 50 * (1 + 1 + (1 + 1 + 10))
+
+
+def test_costly_operations_are_rejected_before_running(tmp_path):
+    path = str(tmp_path / "limits.db")
+    counties = pd.DataFrame({"id": range(300), "county": "Albemarle County"})
+    with DuckDBManager(path) as db:
+        db.table_from_dataframe(counties, "counties")
+
+    limited = strawberry.Schema(
+        query=RentRadarGraphQLAPI, extensions=[QueryCostLimiter(max_cost=500)]
+    )
+    with DuckDBConnectionPool(path) as pool:
+        context = {"pool": pool, "loaders": RentRadarLoaders(pool)}
+        result = asyncio.run(
+            limited.execute("{ allCounties { id } }", context_value=context)
+        )
+        assert result.errors is None
+        assert len(result.data["allCounties"]) == 300
+
+        twice = "{ a: allCounties { id } b: allCounties { county } }"
+        result = asyncio.run(limited.execute(twice, context_value=context))
+        assert result.data is None
+        assert result.errors[0].extensions["code"] == "QUERY_TOO_COSTLY"
+        assert result.errors[0].extensions["cost"] == 600
+
+
+def test_time_budget_interrupts_running_queries(tmp_path):
+    slow = "SELECT count(*) AS n FROM range(10000000000) a"
+    with DuckDBManager(str(tmp_path / "timeout.db")) as db:
+        start = time.monotonic()
+        with time_budget(0.2), pytest.raises(QueryTimeoutError):
+            db.fetch_columns(slow)
+        assert time.monotonic() - start < 5
+        # the connection is still usable, and fast queries within a budget are untouched
+        with time_budget(5):
+            assert db.fetch_columns("SELECT 42 AS n") == {"n": [42]}
+        assert db.fetch_columns("SELECT 1 AS n") == {"n": [1]}
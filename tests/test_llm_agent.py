@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from rentradar.db.duckdb import DuckDBManager
+
+pytest.importorskip("langchain")
+pytest.importorskip("duckdb_engine")
+
+from langchain_community.llms.fake import FakeListLLM  # noqa: E402
+
+from rentradar.llm.agent import RentRadarLLMAgent, sql_database  # noqa: E402
+from rentradar.llm.cache import AnswerCache  # noqa: E402
+
+
+def test_agent_answers_every_turn_with_a_local_llm(tmp_path):
+    path = str(tmp_path / "llm.db")
+    with DuckDBManager(path) as db:
+        db.table_from_dataframe(
+            pd.DataFrame({"id": ["a", "b", "c", "d"], "county": "Albemarle County"}),
+            "counties",
+        )
+    db_uri = f"duckdb:///{path}"
+    llm = FakeListLLM(
+        responses=[
+            "I should count the counties.\n"
+            "Action: sql_db_query\n"
+            "Action Input: SELECT count(*) FROM counties",
+            "I now know the final answer.\nFinal Answer: There are 4 counties.",
+        ]
+    )
+
+    database = sql_database(db_uri)
+    assert database.get_table_info(["counties"]) == (
+        database._custom_table_info["counties"]
+    )
+    agent = RentRadarLLMAgent(db_uri, llm=llm, db=database)
+    # the same agent serves one question after another
+    for _ in range(2):
+        assert agent.execute_query("How many counties are there?") == (
+            "There are 4 counties."
+        )
+    assert agent.last_usage["tables"] == ["counties"]
+    assert agent.last_usage["schema_tokens"] > 0
+
+    # with an answer cache, repeat questions skip the LLM
+    cache = AnswerCache(path)
+    cached = RentRadarLLMAgent(
+        db_uri, llm=FakeListLLM(responses=llm.responses), db=database, cache=cache
+    )
+    assert cached.execute_query("How many counties are there?") == (
+        "There are 4 counties."
+    )
+    assert cached.execute_query("how many counties are there") == (
+        "There are 4 counties."
+    )
+    assert cache.stats()["hits"] == 1
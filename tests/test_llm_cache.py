@@ -0,0 +1,104 @@
+import time
+
+import pandas as pd
+
+from rentradar.db.cache import database_version
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.llm.cache import (
+    MAX_RESULT_ROWS,
+    AnswerCache,
+    generated_sql,
+    normalize_question,
+)
+
+MEDIAN_RENT = "SELECT zipCode, median(price) AS rent FROM rentals GROUP BY 1"
+
+
+class Action:
+    def __init__(self, tool, tool_input):
+        self.tool = tool
+        self.tool_input = tool_input
+
+
+class WordEmbeddings:
+    words = ["median", "average", "rent", "price", "zip", "code", "county"]
+
+    def embed_query(self, text):
+        return [text.split().count(word) for word in self.words]
+
+
+def load_rentals(path, prices):
+    with DuckDBManager(path) as db:
+        db.table_from_dataframe(
+            pd.DataFrame({"zipCode": 22903, "price": prices}), "rentals"
+        )
+
+
+def test_normalize_question_and_generated_sql():
+    assert normalize_question("What is the median rent by zip code?") == (
+        normalize_question("median rent  by Zip Code")
+    )
+    assert normalize_question("Rent in 22903") != normalize_question("Rent in 22901")
+
+    steps = [
+        (Action("sql_db_list_tables", ""), "rentals"),
+        (Action("sql_db_query", f" {MEDIAN_RENT}\n"), "[(22903, 1500.0)]"),
+        (Action("sql_db_query", "SELECT rent FROM rentals"), "Error: no rent column"),
+    ]
+    assert generated_sql(steps) == MEDIAN_RENT
+    assert generated_sql(steps[:1]) is None
+
+
+def test_answers_are_reused_then_recomputed_from_sql_after_a_reload(tmp_path):
+    path = str(tmp_path / "answers.db")
+    load_rentals(path, [1000, 2000])
+    cache = AnswerCache(path)
+    assert cache.get("Median rent by zip code?") is None
+
+    version = database_version(path)
+    cache.put("Median rent by zip code?", "It is $1,500.", MEDIAN_RENT, version)
+    assert cache.get("what is the median rent by zip code") == "It is $1,500."
+
+    # after a reload the stored SQL answers from the new data, without the agent, and the
+    # original answer is kept
+    time.sleep(0.01)
+    load_rentals(path, [3000, 4000])
+    expected = (
+        'The data has been reloaded since "Median rent by zip code?" was answered. '
+        "The answer then was: It is $1,500.\n\nIts query now returns:\n\n"
+        "| zipCode | rent |\n|---|---|\n| 22903 | 3500.0 |"
+    )
+    assert cache.get("Median rent by zip code?") == expected
+    assert cache.get("median rent by zip code") == expected
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["reruns"]) == (2, 1, 1)
+
+    # re-executed queries are capped
+    time.sleep(0.01)
+    load_rentals(path, list(range(100)))
+    cache.put("every rent", "Here they are.", "SELECT price FROM rentals;", version)
+    answer = cache.get("every rent")
+    assert "now returns (first 20 rows):" in answer
+    assert answer.count("\n| ") == MAX_RESULT_ROWS + 1
+
+
+def test_answers_expire_and_similar_questions_match_by_embedding(tmp_path):
+    path = str(tmp_path / "answers.db")
+    load_rentals(path, [1000, 2000])
+    version = database_version(path)
+
+    cache = AnswerCache(path, embeddings=WordEmbeddings(), min_similarity=0.9)
+    assert cache.get("median rent by zip code") is None
+    cache.put("median rent by zip code", "It is $1,500.", MEDIAN_RENT, version)
+    assert cache.get("rent median per zip code") == "It is $1,500."
+    assert cache.get("average price by county") is None
+    # numbers keep questions apart even when they embed alike
+    cache.put("median rent in 22903", "It is $1,500.", MEDIAN_RENT, version)
+    assert cache.get("rent median in 22903") == "It is $1,500."
+    assert cache.get("median rent in 22901") is None
+
+    expiring = AnswerCache(path, ttl=0.01)
+    expiring.put("median rent by zip code", "It is $1,500.", MEDIAN_RENT, version)
+    time.sleep(0.02)
+    assert expiring.get("median rent by zip code") is None
+    assert expiring.stats()["expirations"] == 1
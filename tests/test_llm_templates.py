@@ -0,0 +1,93 @@
+from rentradar.db.catalog import SchemaCatalog, TableInfo
+from rentradar.llm.templates import (
+    SchemaPromptBuilder,
+    compact_table,
+    count_tokens,
+    keywords,
+)
+
+CATALOG = SchemaCatalog(
+    version=0.0,
+    tables={
+        "counties": TableInfo(
+            "counties", 2, [("id", "VARCHAR", True), ("county", "VARCHAR", True)]
+        ),
+        "long_term_rentals": TableInfo(
+            "long_term_rentals",
+            500,
+            [
+                ("property_id", "VARCHAR", True),
+                ("price", "BIGINT", True),
+                ("status", "VARCHAR", True),
+            ],
+        ),
+        "properties": TableInfo(
+            "properties",
+            2000,
+            [
+                ("property_id", "VARCHAR", True),
+                ("zipCode", "BIGINT", True),
+                ("county", "VARCHAR", True),
+            ],
+        ),
+        "property_features": TableInfo(
+            "property_features",
+            2000,
+            [
+                ("property_id", "VARCHAR", True),
+                ("bedrooms", "DOUBLE", True),
+                ("pool", "BOOLEAN", True),
+            ],
+        ),
+        "rollup_state": TableInfo("rollup_state", 1, [("month", "DATE", True)]),
+    },
+)
+
+
+class WordEmbeddings:
+    words = ["rent", "rental", "pool", "county", "zip"]
+
+    def embed_query(self, text):
+        return [
+            sum(word in part for part in text.lower().split()) for word in self.words
+        ]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def test_keywords_and_compact_tables():
+    assert keywords("How many properties have squareFootage over 2000?") == {
+        "property",
+        "have",
+        "square",
+        "footage",
+        "over",
+        "2000",
+    }
+    assert compact_table(CATALOG.tables["long_term_rentals"]) == (
+        "long_term_rentals(property_id VARCHAR, price BIGINT, status VARCHAR) ~500 rows"
+        " -- rental listings: asking rent price, status, days on market"
+    )
+
+
+def test_schema_includes_the_relevant_tables_within_the_budget():
+    builder = SchemaPromptBuilder(CATALOG)
+    prompt = builder.build("How many properties have a pool?")
+    assert prompt.tables == ["property_features"]
+    assert prompt.tokens == count_tokens(prompt.text)
+
+    prompt = builder.build("Median rent by zip code")
+    assert prompt.tables == ["properties", "long_term_rentals"]
+    assert prompt.text.splitlines()[1].startswith("long_term_rentals(property_id")
+
+    # an unrelated question gets as much of the schema as fits, hidden tables excepted
+    everything = builder.build("hello")
+    assert everything.tables == list(CATALOG.tables)[:4]
+    small = SchemaPromptBuilder(CATALOG, max_tokens=60).build("hello")
+    assert 0 < len(small.tables) < 4 and small.tokens <= 60
+
+    ranked = SchemaPromptBuilder(CATALOG, embeddings=WordEmbeddings()).build(
+        "Which listings have a pool?"
+    )
+    assert ranked.tables[0] == "property_features"
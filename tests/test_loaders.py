@@ -0,0 +1,106 @@
+import asyncio
+import dataclasses
+
+import pandas as pd
+
+from rentradar.api.deploy import schema
+from rentradar.api.loaders import RentRadarLoaders
+from rentradar.api.schema import (
+    LongTermRental,
+    Property,
+    PropertyFeature,
+    PropertyOwner,
+    PropertyTax,
+)
+from rentradar.db.duckdb import DuckDBConnectionPool, DuckDBManager, RentRadarQueryAgent
+
+PROPERTY_IDS = ["p1", "p2", "p3"]
+BATCHED = [
+    "get_long_term_rentals_by_property_ids",
+    "get_owners_by_property_ids",
+    "get_property_features_by_property_ids",
+    "get_property_taxes_by_property_ids",
+]
+QUERY = """
+{
+  allProperties {
+    propertyId
+    features { bedrooms }
+    owners { owner }
+    taxes { year total }
+    longTermRentals { id price }
+  }
+}
+"""
+
+
+def table(cls, rows):
+    """Rows of a Strawberry type as a DataFrame, with None for the columns a row leaves out."""
+    names = [field.name for field in dataclasses.fields(cls) if field.init]
+    return pd.DataFrame([{name: row.get(name) for name in names} for row in rows])
+
+
+def load_properties(path):
+    properties = [
+        {
+            "property_id": pid,
+            "id": pid,
+            "formattedAddress": f"{n} Main St",
+            "zipCode": 22903,
+            "latitude": 38.0 + n / 100,
+            "longitude": -78.5,
+        }
+        for n, pid in enumerate(PROPERTY_IDS)
+    ]
+    features = [{"property_id": pid, "bedrooms": 2.0} for pid in PROPERTY_IDS[:2]]
+    owners = [
+        {"owner_id": "o1", "property_id": "p1", "owner": "Ann"},
+        {"owner_id": "o2", "property_id": "p1", "owner": "Bob"},
+        {"owner_id": "o3", "property_id": "p3", "owner": "Cy"},
+    ]
+    taxes = [
+        {"property_tax_id": f"t{n}", "property_id": pid, "year": "2023", "total": 900}
+        for n, pid in enumerate(PROPERTY_IDS)
+    ]
+    rentals = [{"property_id": "p2", "id": "r1", "price": 1500}]
+    with DuckDBManager(path) as db:
+        db.table_from_dataframe(table(Property, properties), "properties")
+        db.table_from_dataframe(table(PropertyFeature, features), "property_features")
+        db.table_from_dataframe(table(PropertyOwner, owners), "property_owners")
+        db.table_from_dataframe(table(PropertyTax, taxes), "property_taxes")
+        db.table_from_dataframe(table(LongTermRental, rentals), "long_term_rentals")
+
+
+def test_relationship_fields_are_batched_one_query_per_table(tmp_path, monkeypatch):
+    path = str(tmp_path / "loaders.db")
+    load_properties(path)
+
+    batches = []
+
+    def recording(name):
+        fetch = getattr(RentRadarQueryAgent, name)
+
+        def fetch_batch(self, property_ids):
+            batches.append((name, sorted(property_ids)))
+            return fetch(self, property_ids)
+
+        return fetch_batch
+
+    for name in BATCHED:
+        monkeypatch.setattr(RentRadarQueryAgent, name, recording(name))
+    with DuckDBConnectionPool(path) as pool:
+        context = {"pool": pool, "loaders": RentRadarLoaders(pool)}
+        result = asyncio.run(schema.execute(QUERY, context_value=context))
+
+    assert result.errors is None
+    by_id = {row["propertyId"]: row for row in result.data["allProperties"]}
+    assert by_id["p1"]["features"] == {"bedrooms": 2.0}
+    assert by_id["p3"]["features"] is None
+    assert sorted(o["owner"] for o in by_id["p1"]["owners"]) == ["Ann", "Bob"]
+    assert by_id["p2"]["owners"] == []
+    assert [t["total"] for t in by_id["p3"]["taxes"]] == [900]
+    assert by_id["p2"]["longTermRentals"] == [{"id": "r1", "price": 1500}]
+    assert by_id["p1"]["longTermRentals"] == []
+
+    # one query per table, for every property at once
+    assert sorted(batches) == [(name, PROPERTY_IDS) for name in BATCHED]
@@ -0,0 +1,109 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rentradar.api.deploy import schema
+from rentradar.api.loaders import RentRadarLoaders
+from rentradar.db.duckdb import DuckDBConnectionPool, DuckDBManager
+from rentradar.model.rent_estimator import RENT_ESTIMATES_TABLE, RentEstimator
+from rentradar.process.process_rentcast_data import PROPERTY_COLUMNS
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 600
+    property_ids = [f"p{i}" for i in range(n)]
+    bedrooms = rng.integers(1, 5, n)
+    square_footage = bedrooms * 400 + rng.integers(0, 300, n)
+    zip_codes = rng.choice([22901, 22902, 22903], n)
+
+    path = str(tmp_path / "model.db")
+    with DuckDBManager(path) as db:
+        db.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "property_id": property_ids,
+                    "zipCode": zip_codes,
+                    "county": "Albemarle County",
+                    "propertyType": rng.choice(["Single-Family", "Condo"], n),
+                    "latitude": 38.0 + rng.random(n) / 10,
+                    "longitude": -78.5 + rng.random(n) / 10,
+                    "yearBuilt": rng.integers(1950, 2020, n).astype(float),
+                }
+            ).reindex(columns=PROPERTY_COLUMNS),
+            "properties",
+        )
+        db.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "property_id": property_ids,
+                    "bedrooms": bedrooms.astype(float),
+                    "bathrooms": np.maximum(bedrooms - 1, 1).astype(float),
+                    "squareFootage": square_footage.astype(float),
+                    "lotSize": None,
+                    "floorCount": 1.0,
+                    "unitCount": None,
+                    "garageSpaces": None,
+                    "garage": rng.random(n) < 0.5,
+                    "pool": False,
+                    "cooling": True,
+                    "heating": True,
+                    "fireplace": None,
+                }
+            ),
+            "property_features",
+        )
+        # two thirds of the properties have been listed for rent
+        rented = slice(0, 400)
+        db.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "id": property_ids[rented],
+                    "property_id": property_ids[rented],
+                    "price": (square_footage * 1.5 + (zip_codes - 22900) * 100)[rented],
+                    "listedDate": "2024-01-01T00:00:00.000Z",
+                    "lastSeenDate": "2024-02-01T00:00:00.000Z",
+                }
+            ),
+            "long_term_rentals",
+        )
+    return path
+
+
+def test_rent_estimator_scores_every_property(db_path):
+    with DuckDBManager(db_path) as db:
+        estimator = RentEstimator(db)
+        estimates = estimator.run()
+        expected = db.execute_query(
+            "SELECT property_id, squareFootage * 1.5 + (zipCode - 22900) * 100 AS rent "
+            "FROM properties JOIN property_features USING (property_id)"
+        )
+        stored = db.execute_query(f"SELECT count(*) AS n FROM {RENT_ESTIMATES_TABLE}")
+
+    assert stored["n"][0] == 600
+    assert estimator.metrics["mape"] < 0.1
+    merged = estimates.merge(expected, on="property_id")
+    errors = (merged["fair_rent_estimate"] / merged["rent"] - 1).abs()
+    assert errors.median() < 0.1
+    assert estimates["model_version"].nunique() == 1
+
+
+def test_fair_rent_estimate_field_reads_precomputed_scores(db_path):
+    query = '{ propertyById(id: "p1") { fairRentEstimate } }'
+
+    def execute():
+        with DuckDBConnectionPool(db_path, read_only=True) as pool:
+            context = {"pool": pool, "loaders": RentRadarLoaders(pool)}
+            result = asyncio.run(schema.execute(query, context_value=context))
+        assert result.errors is None
+        return result.data["propertyById"]["fairRentEstimate"]
+
+    # not trained yet
+    assert execute() is None
+
+    with DuckDBManager(db_path) as db:
+        estimates = RentEstimator(db).run().set_index("property_id")
+    assert execute() == pytest.approx(estimates.loc["p1", "fair_rent_estimate"])
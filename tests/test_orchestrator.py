@@ -0,0 +1,85 @@
+import json
+import os
+
+import requests
+
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.ingest.orchestrator import IngestOrchestrator, Metro
+from rentradar.ingest.rentcast_client import RentCastAPIClient
+
+ZIP_CODES = {"Charlottesville": "22903", "Boston": "02134"}
+
+
+def fake_fetch_data(calls, fail):
+    def fetch_data(self, endpoint, params):
+        calls.append((endpoint, params.get("city", params.get("zipCode"))))
+        if (endpoint, params.get("city")) in fail:
+            fail.remove((endpoint, params.get("city")))
+            raise requests.HTTPError("503 Server Error")
+        if endpoint == "/markets":
+            return {
+                "rentalData": {
+                    "lastUpdatedDate": "2024-03-01",
+                    "dataByBedrooms": [{"bedrooms": 1, "averageRent": 1500}],
+                    "history": {},
+                }
+            }
+        if params["offset"] > 0:
+            return []
+        city = params["city"]
+        record = {
+            "id": f"1 Main St, {city}",
+            "city": city,
+            "zipCode": ZIP_CODES[city],
+            "county": "Albemarle",
+            "propertyType": "Single Family",
+            "price": 1000,
+            "owner": {"names": [f"Owner of {city}"]},
+        }
+        return [record]
+
+    return fetch_data
+
+
+def test_orchestrator_resumes_failed_jobs_and_loads(tmp_path, monkeypatch):
+    calls = []
+    fail = {("/listings/sale", "Boston")}
+    monkeypatch.setattr(RentCastAPIClient, "fetch_data", fake_fetch_data(calls, fail))
+    orchestrator = IngestOrchestrator(
+        api_key="test",
+        root=str(tmp_path / "lake"),
+        metros=[Metro.parse("Charlottesville, va"), Metro.parse("Boston, MA")],
+        run_date="2024-03-01",
+        workers=4,
+        limit=10,
+        client_options={"max_workers": 1, "max_retries": 0},
+    )
+
+    jobs = orchestrator.run()
+    assert len(jobs) == 8
+    assert jobs["2024-03-01/MA/Boston/sale_listings"]["status"] == "failed"
+    assert os.path.exists(
+        tmp_path
+        / "lake/state=MA/city=Boston/endpoint=current_market_stats"
+        / "date=2024-03-01/part-0.parquet"
+    )
+
+    # zip codes keep their leading zeros
+    markets = sorted(zip_code for endpoint, zip_code in calls if endpoint == "/markets")
+    assert markets == ["02134", "22903"]
+
+    calls.clear()
+    jobs = orchestrator.run()
+    assert calls == [("/listings/sale", "Boston")]
+    assert all(job["status"] == "done" for job in jobs.values())
+    with open(tmp_path / "lake/_manifest.json") as f:
+        assert json.load(f)["jobs"].keys() == jobs.keys()
+
+    with DuckDBManager(str(tmp_path / "metros.db")) as db:
+        loaded = orchestrator.load(db)
+        owners = db.execute_query("SELECT owner FROM property_owners ORDER BY owner")
+
+    assert loaded["properties"] == 2
+    assert loaded["sale_listings"] == 2
+    assert loaded["current_market_stats"] == 2
+    assert owners["owner"].tolist() == ["Owner of Boston", "Owner of Charlottesville"]
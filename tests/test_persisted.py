@@ -0,0 +1,55 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from rentradar.api.deploy import RentRadarGraphQL, schema
+from rentradar.api.persisted import PersistedQueryStore, query_hash
+
+QUERY = "{ __typename }"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = PersistedQueryStore(max_size=1)
+    monkeypatch.setattr("rentradar.api.deploy.persisted_queries", store)
+    return TestClient(RentRadarGraphQL(schema))
+
+
+def persisted(query=QUERY):
+    return {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+
+
+def test_automatic_persisted_queries(client):
+    response = client.post("/", json={"extensions": persisted()})
+    assert response.status_code == 200
+    assert response.json()["errors"][0]["message"] == "PersistedQueryNotFound"
+
+    response = client.post("/", json={"query": QUERY, "extensions": persisted()})
+    assert response.json() == {"data": {"__typename": "RentRadarGraphQLAPI"}}
+
+    # later requests send only the hash, over POST or GET
+    response = client.post("/", json={"extensions": persisted()})
+    assert response.json() == {"data": {"__typename": "RentRadarGraphQLAPI"}}
+    response = client.get("/", params={"extensions": json.dumps(persisted())})
+    assert response.json() == {"data": {"__typename": "RentRadarGraphQLAPI"}}
+
+    response = client.post("/", json={"query": QUERY, "extensions": persisted("{ a }")})
+    assert response.status_code == 400
+
+
+def test_store_preloads_documents_and_evicts_registered_ones(tmp_path):
+    path = tmp_path / "persisted.json"
+    path.write_text(json.dumps({query_hash(QUERY): QUERY}))
+    store = PersistedQueryStore(str(path), max_size=1)
+
+    for query in ["{ a }", "{ b }"]:
+        store.register(query_hash(query), query)
+
+    assert store.get(query_hash(QUERY)) == QUERY
+    assert store.get(query_hash("{ a }")) is None
+    assert store.get(query_hash("{ b }")) == "{ b }"
+
+    path.write_text(json.dumps({query_hash(QUERY): "{ tampered }"}))
+    with pytest.raises(ValueError):
+        PersistedQueryStore(str(path))
@@ -0,0 +1,56 @@
+import duckdb
+import pytest
+
+from rentradar.db.cache import QueryCache
+from rentradar.db.duckdb import STATEMENTS, RentRadarQueryAgent
+from rentradar.db.prepared import StatementRegistry, sql_literal
+
+
+def test_sql_literals():
+    assert sql_literal(None) == "NULL"
+    assert sql_literal(True) == "TRUE"
+    assert sql_literal(22903) == "22903"
+    assert sql_literal(1.5) == "1.5"
+    assert sql_literal(float("nan")) == "'nan'::DOUBLE"
+    assert sql_literal("O'Neil") == "'O''Neil'"
+    assert sql_literal(["a", None]) == "['a', NULL]"
+    with pytest.raises(TypeError):
+        sql_literal(object())
+
+
+def test_statements_are_prepared_once_per_connection_and_rebound():
+    registry = StatementRegistry({"by_id": "SELECT v FROM t WHERE id = ? OR id = ?"})
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE t AS SELECT 'p' || i AS id, i AS v FROM range(5) t(i)")
+
+    assert registry.execute(
+        conn, "by_id", ("p1", "p'; DROP TABLE t; --")
+    ).fetchall() == [(1,)]
+    assert registry.execute(conn, "by_id", ["p2", "p3"]).fetchall() == [(2,), (3,)]
+
+    # a replaced table is picked up by the prepared statement
+    conn.execute("CREATE OR REPLACE TABLE t AS SELECT 'p1' AS id, 10 AS v")
+    assert registry.execute(conn, "by_id", ("p1", None)).fetchall() == [(10,)]
+
+    # each cursor prepares its own copy
+    cursor = conn.cursor()
+    assert registry.execute(cursor, "by_id", ("p1", None)).fetchall() == [(10,)]
+
+    with pytest.raises(ValueError):
+        registry.register("by_id", "SELECT 1")
+
+
+def test_agent_lookups_use_registered_statements(tmp_path):
+    with RentRadarQueryAgent(str(tmp_path / "prepared.db")) as agent:
+        agent.execute_query(
+            "CREATE TABLE properties AS SELECT 'p' || i AS property_id FROM range(3) t(i)"
+        )
+        agent.cache = QueryCache()
+
+        assert agent.get_property_by_id("p1") == {"property_id": ["p1"]}
+        assert agent.get_property_by_id("p1") == {"property_id": ["p1"]}
+        assert agent.cache.misses == 1
+
+        agent.table_from_query("SELECT 'p9' AS property_id", "properties")
+        assert agent.get_all_properties() == {"property_id": ["p9"]}
+        assert "property_by_id" in STATEMENTS
@@ -0,0 +1,80 @@
+import json
+
+import pandas as pd
+
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.process.process_rentcast_data import RentCastData
+from rentradar.utils.utils import string_to_uuid
+
+
+def raw_properties():
+    assessments = {"2022": {"year": 2022, "value": 300, "land": 100}}
+    return pd.DataFrame(
+        {
+            "id": ["1 A St", "2 B St", "3 C St"],
+            "zipCode": [22903, 22903, 22901],
+            "county": ["Charlottesville", None, "Albemarle"],
+            "propertyType": ["Single Family", "Condo", None],
+            "bedrooms": [3.0, 2.0, None],
+            # python reprs (CSV exports) and JSON (ingest sinks) are both accepted
+            "features": [repr({"garage": True, "floorCount": 2}), None, "{}"],
+            "owner": [
+                repr({"names": ["Jane O'Neil", "John O'Neil"]}),
+                json.dumps({"names": ["ACME LLC"], "mailingAddress": {"id": "x"}}),
+                None,
+            ],
+            "taxAssessments": [repr(assessments), json.dumps(assessments), None],
+            "propertyTaxes": [None, json.dumps({"2021": {"total": 12}}), None],
+        }
+    )
+
+
+def test_build_tables_normalizes_raw_properties():
+    tables = RentCastData(properties=raw_properties()).build_tables()
+    property_id = str(string_to_uuid("1 A St"))
+
+    properties = tables["properties"]
+    assert properties["property_id"].iloc[0] == property_id
+    assert properties["county"].tolist() == [
+        "Charlottesville City",
+        "Charlottesville City",
+        "Albemarle County",
+    ]
+    assert properties["propertyType"].tolist()[:2] == ["Single-Family", "Condo"]
+    assert set(tables["counties"]["county"]) == {
+        "Charlottesville City",
+        "Albemarle County",
+    }
+
+    assessments = tables["tax_assessments"]
+    assert assessments[["year", "total_value", "land_value"]].values.tolist() == [
+        ["2022", 300, 100],
+        ["2022", 300, 100],
+    ]
+    assert assessments["assessment_id"].iloc[0] == str(
+        string_to_uuid(property_id + "2022")
+    )
+    assert tables["property_taxes"]["total"].tolist() == [12]
+
+    features = tables["property_features"].set_index("property_id")
+    assert features.loc[property_id, "garage"] is True
+    assert features.loc[property_id, "floorCount"] == 2
+    assert len(features) == 3
+
+    owners = tables["property_owners"]
+    assert owners["owner"].tolist() == ["Jane O'Neil", "ACME LLC"]
+    assert owners["owner_id"].iloc[1] == str(string_to_uuid("ACME LLC"))
+
+
+def test_seed_loads_tables(tmp_path):
+    listings = pd.DataFrame(
+        {"id": ["1 A St"], "price": [1500], "removedDate": ["2024-01-01"]}
+    )
+    data = RentCastData(properties=raw_properties(), long_term_rentals=listings)
+    with DuckDBManager(str(tmp_path / "seed.db")) as db:
+        loaded = data.seed(db)
+        rentals = db.execute_query("SELECT property_id, status FROM long_term_rentals")
+
+    assert loaded["properties"] == 3
+    assert "sale_listings" not in loaded
+    assert rentals.values.tolist() == [[str(string_to_uuid("1 A St")), "Inactive"]]
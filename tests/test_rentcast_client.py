@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pyarrow.parquet as pq
+import pytest
+
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.ingest.rentcast_client import RentCastAPIClient, TokenBucket
+from rentradar.ingest.sinks import DuckDBSink, ParquetSink
+
+LISTINGS = [{"id": str(i), "price": 1000 + i} for i in range(25)]
+
+
+class StubRentCastHandler(BaseHTTPRequestHandler):
+    """Serves paginated listings and per-zip market stats, failing the first request with a 429."""
+
+    requests = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with self.lock:
+            self.requests.append((url.path, params))
+            first_request = len(self.requests) == 1
+
+        if first_request:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        if url.path == "/markets":
+            body = {
+                "rentalData": {
+                    "lastUpdatedDate": "2024-03-01",
+                    "dataByBedrooms": [{"bedrooms": 1, "averageRent": 1500}],
+                    "history": {
+                        "2024-02": {
+                            "dataByBedrooms": [{"bedrooms": 1, "averageRent": 1400}]
+                        }
+                    },
+                }
+            }
+        else:
+            offset, limit = int(params["offset"]), int(params["limit"])
+            body = LISTINGS[offset : offset + limit]
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubRentCastHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRentCastHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_create_fetches_all_pages_concurrently_and_retries(stub_server):
+    client = RentCastAPIClient.create(
+        api_key="test",
+        endpoint="/listings/rental/long-term",
+        query_params={"city": "Charlottesville", "state": "VA"},
+        limit=10,
+        base_url=stub_server,
+        max_workers=3,
+        requests_per_second=100,
+        backoff_factor=0,
+    )
+
+    assert client.listings == LISTINGS
+    offsets = [params["offset"] for _, params in StubRentCastHandler.requests]
+    assert {"0", "10", "20"} <= set(offsets)
+    assert len(offsets) - len(set(offsets)) == 1  # the retried 429
+
+
+def test_a_single_page_pull_sends_one_request(stub_server):
+    client = RentCastAPIClient.create(
+        api_key="test",
+        endpoint="/listings/sale",
+        query_params={"city": "Charlottesville"},
+        limit=50,
+        base_url=stub_server,
+        max_workers=4,
+        requests_per_second=100,
+        backoff_factor=0,
+    )
+
+    assert client.listings == LISTINGS
+    offsets = [params["offset"] for _, params in StubRentCastHandler.requests]
+    assert offsets == ["0", "0"]  # the first attempt is the stub's 429
+
+
+def test_process_markets_endpoint(stub_server):
+    client = RentCastAPIClient(
+        api_key="test", base_url=stub_server, requests_per_second=100, backoff_factor=0
+    )
+    current, history = client.process_markets_endpoint(
+        "/markets", {"zipCodes": [22901, 22902, 22903]}
+    )
+
+    assert sorted(current["zipCode"]) == [22901, 22902, 22903]
+    assert history["date"].tolist() == ["2024-02"] * 3
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_stream_into_sinks(stub_server, tmp_path):
+    options = dict(base_url=stub_server, requests_per_second=100, backoff_factor=0)
+    pages = RentCastAPIClient.stream(
+        "test", "/listings/sale", {"city": "Charlottesville"}, limit=10, **options
+    )
+    with ParquetSink(str(tmp_path / "sale.parquet")) as sink:
+        assert sink.write_pages(pages) == len(LISTINGS)
+    assert pq.read_table(tmp_path / "sale.parquet").num_rows == len(LISTINGS)
+
+    with DuckDBManager(str(tmp_path / "stream.db")) as db:
+        with DuckDBSink(db, "listings") as sink:
+            sink.write([{"id": "1", "price": 1000, "features": None}])
+            sink.write([{"id": "2", "price": 1500.5, "features": {"pool": True}}])
+            sink.write([{"id": "3", "status": "Active"}])
+        rows = db.execute_query("SELECT * FROM listings ORDER BY id")
+        tables = db.list_tables()["name"].tolist()
+
+    assert rows["price"].tolist()[:2] == [1000, 1500.5]
+    assert rows["features"].tolist()[1] == '{"pool": true}'
+    assert rows["status"].tolist()[2] == "Active"
+    assert tables == ["listings"]
@@ -0,0 +1,118 @@
+import pandas as pd
+import pytest
+
+from rentradar.db.duckdb import RentRadarQueryAgent
+from rentradar.db.rollups import refresh_market_trends
+
+
+@pytest.fixture
+def agent(tmp_path):
+    with RentRadarQueryAgent(str(tmp_path / "rollups.db")) as agent:
+        agent.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "property_id": ["a", "b", "c"],
+                    "zipCode": [22903, 22903, 22901],
+                    "county": ["Charlottesville City"] * 2 + ["Albemarle County"],
+                }
+            ),
+            "properties",
+        )
+        agent.table_from_dataframe(
+            pd.DataFrame({"property_id": ["a", "b", "c"], "bedrooms": [2, 3, 2]}),
+            "property_features",
+        )
+        agent.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "id": ["r1", "r2", "r3", "r4"],
+                    "property_id": ["a", "b", "c", "a"],
+                    "price": [1000, 2000, 1500, 1100],
+                    "listedDate": [
+                        "2023-01-05T00:00:00.000Z",
+                        "2024-01-10T00:00:00.000Z",
+                        "2024-01-20T00:00:00.000Z",
+                        "2024-01-25T00:00:00.000Z",
+                    ],
+                }
+            ),
+            "long_term_rentals",
+        )
+        agent.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "id": ["s1"],
+                    "property_id": ["b"],
+                    "price": [300000],
+                    "listedDate": ["2024-01-03T00:00:00.000Z"],
+                }
+            ),
+            "sale_listings",
+        )
+        agent.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "zipCode": [22903, 22903],
+                    "bedrooms": [2, 3],
+                    "averageRent": [1000.0, 2000.0],
+                    "totalListings": [3, 1],
+                    "date": ["2024-01", "2024-01"],
+                }
+            ),
+            "historic_market_stats",
+        )
+        yield agent
+
+
+def test_market_trends_rollups(agent):
+    assert refresh_market_trends(agent) == ["2023-01", "2024-01"]
+
+    county = agent.get_market_trend("county", "Charlottesville City")
+    assert county["month"] == ["2024-01"]
+    assert county["rentals"] == [2]
+    assert county["median_rent"] == [1550.0]
+    assert county["median_price"] == [300000.0]
+    assert county["rent_to_price"] == [pytest.approx(1550 * 12 / 300000)]
+    assert county["market_rent"] == [1250.0]
+
+    two_beds = agent.get_market_trend("zip", "22903", bedrooms=2)
+    assert two_beds["median_rent"] == [1100.0]
+    assert two_beds["median_rent_yoy"] == [pytest.approx(0.1)]
+    assert two_beds["market_rent"] == [1000.0]
+
+    totals = agent.get_market_trends("all", "all")
+    assert totals["month"] == ["2023-01", "2024-01"]
+    assert totals["rentals"] == [1, 3]
+
+
+def test_market_trends_refresh_only_changed_months(agent):
+    refresh_market_trends(agent)
+    assert refresh_market_trends(agent) == []
+
+    agent.execute_query("UPDATE long_term_rentals SET price = 1200 WHERE id = 'r1'")
+    # the YoY change of the month a year later depends on the changed month
+    assert refresh_market_trends(agent) == ["2023-01", "2024-01"]
+    incremental = agent.execute_query("SELECT * FROM market_trends ORDER BY ALL")
+
+    refresh_market_trends(agent, full=True)
+    full = agent.execute_query("SELECT * FROM market_trends ORDER BY ALL")
+    pd.testing.assert_frame_equal(incremental, full)
+    assert agent.get_market_trend("zip", "22903", 2)["median_rent_yoy"] == [
+        pytest.approx(1100 / 1200 - 1)
+    ]
+
+    agent.execute_query("DELETE FROM long_term_rentals WHERE id = 'r1'")
+    assert refresh_market_trends(agent) == ["2023-01", "2024-01"]
+    assert agent.get_market_trends("all", "all")["month"] == ["2024-01"]
+
+
+def test_market_trends_from_listings_loaded_from_csv(agent, tmp_path):
+    # read_csv_auto types the listing dates as timestamps rather than strings
+    path = str(tmp_path / "long_term_rentals.csv")
+    agent.execute_query("SELECT * FROM long_term_rentals").to_csv(path, index=False)
+    agent.table_from_file(path, "long_term_rentals")
+    columns = agent.conn.execute("DESCRIBE long_term_rentals").fetchall()
+    assert dict(column[:2] for column in columns)["listedDate"].startswith("TIMESTAMP")
+
+    assert refresh_market_trends(agent) == ["2023-01", "2024-01"]
+    assert agent.get_market_trends("all", "all")["rentals"] == [1, 3]
@@ -0,0 +1,90 @@
+import math
+
+import pytest
+
+from rentradar.db.cache import QueryCache
+from rentradar.db.duckdb import RentRadarQueryAgent
+from rentradar.db.spatial import EARTH_RADIUS_KM, build_spatial_index
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    dlat, dlon = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(math.radians(lat1))
+        * math.cos(math.radians(lat2))
+        * math.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+@pytest.fixture
+def agent(tmp_path):
+    with RentRadarQueryAgent(str(tmp_path / "spatial.db")) as agent:
+        agent.execute_query(
+            "CREATE TABLE properties AS SELECT 'p' || i AS property_id, "
+            "37.9 + (i // 100) * 0.003 AS latitude, "
+            "-78.6 + (i % 100) * 0.003 AS longitude FROM range(10000) t(i)"
+        )
+        build_spatial_index(agent)
+        yield agent
+
+
+def test_properties_within_matches_brute_force(agent):
+    points = agent.execute_query(
+        "SELECT property_id, latitude, longitude FROM properties"
+    )
+    expected = sorted(
+        (haversine(38.03, -78.48, lat, lon), property_id)
+        for property_id, lat, lon in points.values.tolist()
+        if haversine(38.03, -78.48, lat, lon) <= 2.5
+    )
+
+    columns = agent.properties_within(38.03, -78.48, 2.5)
+
+    assert columns["property_id"] == [property_id for _, property_id in expected]
+    assert columns["distance_km"] == pytest.approx([d for d, _ in expected])
+
+
+def test_bbox_and_nearest(agent):
+    columns = agent.properties_in_bbox(38.0, -78.5, 38.01, -78.49)
+    assert len(columns["property_id"]) == 9
+    assert all(38.0 <= lat <= 38.01 for lat in columns["latitude"])
+
+    nearest = agent.nearest_properties(37.9, -78.6, k=3)
+    assert nearest["property_id"] == ["p0", "p1", "p100"]
+
+    # the index survives a rebuild, e.g. after properties are reloaded
+    build_spatial_index(agent)
+    assert agent.nearest_properties(37.9, -78.6, k=1)["property_id"] == ["p0"]
+
+
+def test_map_clusters_cover_viewport_and_cache_per_tile(agent):
+    agent.execute_query(
+        "CREATE TABLE long_term_rentals AS SELECT property_id, 1000 + i AS price "
+        "FROM (SELECT property_id, row_number() OVER (ORDER BY property_id) AS i "
+        "FROM properties) WHERE i <= 10"
+    )
+    agent.execute_query(
+        "CREATE TABLE sale_listings AS SELECT property_id, 250000 AS price "
+        "FROM properties LIMIT 0"
+    )
+    agent.cache = QueryCache()
+
+    clusters = agent.get_map_clusters(37.8, -78.7, 38.3, -78.2, zoom=8)
+    assert sum(clusters["count"]) == 10000
+    assert len(clusters["id"]) == len(set(clusters["id"]))
+    assert sum(rent is not None for rent in clusters["medianRent"]) >= 1
+    assert set(clusters["medianPrice"]) == {None}
+
+    # zooming in splits the same properties into more, smaller clusters
+    zoomed = agent.get_map_clusters(37.8, -78.7, 38.3, -78.2, zoom=10)
+    assert sum(zoomed["count"]) == 10000
+    assert len(zoomed["id"]) > len(clusters["id"])
+
+    misses = agent.cache.misses
+    agent.get_map_clusters(37.8, -78.7, 38.3, -78.2, zoom=8)
+    assert agent.cache.misses == misses
+
+    with pytest.raises(ValueError):
+        agent.get_map_clusters(-90, -180, 90, 180, zoom=10)
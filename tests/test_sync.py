@@ -0,0 +1,153 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from rentradar.db.duckdb import DuckDBManager
+from rentradar.ingest.rentcast_client import RentCastAPIClient
+from rentradar.ingest.sync import ListingSync
+from rentradar.process.process_rentcast_data import prepare_listings
+
+
+def listing(id, price, last_seen, removed=None):
+    return {
+        "id": id,
+        "price": price,
+        "status": "Active",
+        "lastSeenDate": last_seen,
+        "removedDate": removed,
+        "city": "Charlottesville",
+    }
+
+
+def test_sync_merges_deltas_and_tracks_high_water_mark(tmp_path, monkeypatch):
+    responses = [
+        [
+            listing("a", 1000, "2024-03-01T00:00:00.000Z"),
+            listing("b", 1200, "2024-03-02T00:00:00.000Z"),
+        ],
+        [
+            listing(
+                "b",
+                1100,
+                "2024-03-09T00:00:00.000Z",
+                removed="2024-03-09T00:00:00.000Z",
+            ),
+            listing("c", 900, "2024-03-10T00:00:00.000Z"),
+        ],
+    ]
+    requested = []
+
+    def fetch_data(self, endpoint, params):
+        requested.append(params)
+        return responses[len(requested) - 1]
+
+    monkeypatch.setattr(RentCastAPIClient, "fetch_data", fetch_data)
+    params = {"city": "Charlottesville", "state": "VA"}
+    endpoint = "/listings/rental/long-term"
+
+    with DuckDBManager(str(tmp_path / "sync.db")) as db:
+        sync = ListingSync(db, api_key="test", limit=10, reconcile_days=30)
+        sync.sync(endpoint, params, now=datetime(2024, 3, 3), max_workers=1)
+        sync.sync(endpoint, params, now=datetime(2024, 3, 10), max_workers=1)
+        rows = db.execute_query(
+            "SELECT id, price, status FROM long_term_rentals ORDER BY id"
+        )
+        mark = sync.high_water_mark(endpoint, "Charlottesville", "VA")
+
+    assert "daysOld" not in requested[0]
+    assert requested[1]["daysOld"] == 9
+    assert rows.values.tolist() == [
+        ["a", 1000, "Active"],
+        ["b", 1100, "Inactive"],
+        ["c", 900, "Active"],
+    ]
+    assert mark == datetime(2024, 3, 10)
+
+
+def test_reconcile_updates_and_retires_older_listings(tmp_path, monkeypatch):
+    responses = [
+        [
+            listing("a", 1000, "2024-03-01T00:00:00.000Z"),
+            listing("b", 1200, "2024-03-02T00:00:00.000Z"),
+            listing("c", 900, "2024-03-02T00:00:00.000Z"),
+        ],
+        # a delta: only listings listed inside the window
+        [listing("d", 1500, "2024-03-05T00:00:00.000Z")],
+        # the reconcile: "a" dropped its price, "b" is gone
+        [
+            listing("a", 950, "2024-03-10T00:00:00.000Z"),
+            listing("c", 900, "2024-03-10T00:00:00.000Z"),
+            listing("d", 1500, "2024-03-10T00:00:00.000Z"),
+        ],
+    ]
+    requested = []
+
+    def fetch_data(self, endpoint, params):
+        requested.append(params)
+        return responses[len(requested) - 1]
+
+    monkeypatch.setattr(RentCastAPIClient, "fetch_data", fetch_data)
+    endpoint = "/listings/rental/long-term"
+
+    with DuckDBManager(str(tmp_path / "sync.db")) as db:
+        # listings loaded before the first sync: "y" is in Charlottesville and retired by
+        # its reconcile, "z" is in another city and isn't
+        loaded = prepare_listings(
+            pd.DataFrame(
+                [
+                    listing("y", 700, "2024-02-01T00:00:00.000Z"),
+                    listing("z", 800, "2024-03-01T00:00:00.000Z"),
+                ]
+            ),
+            "long_term_rentals",
+        )
+        db.table_from_dataframe(loaded, "long_term_rentals")
+        addresses = [
+            "1 Main St, Charlottesville, VA 22903",
+            "2 Broad St, Richmond, VA 23219",
+        ]
+        db.table_from_dataframe(
+            pd.DataFrame(
+                {
+                    "property_id": loaded["property_id"],
+                    "formattedAddress": addresses,
+                    "zipCode": [22903, 23219],
+                    "county": ["Albemarle County", "Richmond City"],
+                }
+            ),
+            "properties",
+        )
+        sync = ListingSync(db, api_key="test", limit=10, reconcile_days=7)
+        params = {"city": "Charlottesville", "state": "VA"}
+        for day in (3, 5, 10):
+            sync.sync(endpoint, params, now=datetime(2024, 3, day), max_workers=1)
+        rows = db.execute_query(
+            "SELECT id, price, status, removedDate FROM long_term_rentals ORDER BY id"
+        )
+
+    assert requested[1]["daysOld"] == 4 and "status" not in requested[1]
+    assert requested[2]["status"] == "Active" and "daysOld" not in requested[2]
+    assert rows.values.tolist() == [
+        ["a", 950, "Active", None],
+        ["b", 1200, "Inactive", "2024-03-10T00:00:00.000Z"],
+        ["c", 900, "Active", None],
+        ["d", 1500, "Active", None],
+        ["y", 700, "Inactive", "2024-03-10T00:00:00.000Z"],
+        ["z", 800, "Active", None],
+    ]
+
+
+def test_client_is_closed_when_a_fetch_fails(tmp_path, monkeypatch):
+    closed = []
+
+    def fetch_data(self, endpoint, params):
+        raise RuntimeError("RentCast is down")
+
+    monkeypatch.setattr(RentCastAPIClient, "fetch_data", fetch_data)
+    monkeypatch.setattr(RentCastAPIClient, "close", lambda self: closed.append(1))
+    with DuckDBManager(str(tmp_path / "sync.db")) as db:
+        sync = ListingSync(db, api_key="test", limit=10)
+        with pytest.raises(RuntimeError):
+            sync.sync("/listings/sale", {"city": "Charlottesville", "state": "VA"})
+    assert closed == [1]
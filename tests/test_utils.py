@@ -0,0 +1,22 @@
+import numpy as np
+
+from rentradar.api.schema import County, HistoricMarketStat
+from rentradar.utils.utils import build_objects, column_to_list
+
+
+def test_column_to_list_replaces_masked_and_nan_values():
+    masked = np.ma.masked_array([1, 2, 3], mask=[False, True, False])
+    floats = np.array([1.5, np.nan, 2.5])
+
+    assert column_to_list(masked) == [1, None, 3]
+    assert column_to_list(floats) == [1.5, None, 2.5]
+    assert column_to_list(np.array(["a", "b"], dtype=object)) == ["a", "b"]
+
+
+def test_build_objects_ignores_extra_columns():
+    counties = build_objects(
+        County, {"id": ["1", "2"], "county": ["A", "B"], "extra": [0, 0]}
+    )
+
+    assert [(c.id, c.county) for c in counties] == [("1", "A"), ("2", "B")]
+    assert build_objects(HistoricMarketStat, {}) == []